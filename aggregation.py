@@ -0,0 +1,45 @@
+"""
+Football Match Analysis - Aggregation Helpers
+Name interning, keyed sums and row hashing shared by the checkpointed aggregates
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+
+def intern_codes(known, names):
+    """Integer codes for names, appending unseen names to the list known.
+
+    Codes are positions in known, so a name keeps its code for the life of
+    the aggregate and new names are numbered in order of first appearance.
+    Returns the codes and the names that were added.
+    """
+    names = pd.Series(names).astype(str)
+    codes = pd.Index(known).get_indexer(names)
+    new = pd.unique(names[codes < 0])
+    if len(new):
+        known.extend(new)
+        codes = pd.Index(known).get_indexer(names)
+    return codes, new
+
+
+def reduce_by_key(keys, values):
+    """Sum the rows of values per distinct key in one sort plus reduceat pass."""
+    if keys.size == 0:
+        return keys, values[:0]
+    order = np.argsort(keys, kind='stable')
+    keys, values = keys[order], values[order]
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+    return keys[starts], np.add.reduceat(values, starts, axis=0)
+
+
+def row_hashes(frame, columns):
+    """One uint64 per row over the typed columns; no string conversion."""
+    return pd.util.hash_pandas_object(frame[columns], index=False).to_numpy()
+
+
+def digest(hashes):
+    """Content hash of a run of row hashes, e.g. hashes[:done] for a checkpointed prefix."""
+    return hashlib.sha256(hashes.tobytes()).hexdigest()
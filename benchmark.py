@@ -0,0 +1,322 @@
+"""
+Football Match Analysis - Scaling Benchmark
+Times every pipeline stage on synthetic datasets at multiples of the bundled size
+"""
+
+import argparse
+import json
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SCALES = '1,10,100'
+DATE_JITTER_DAYS = 180
+MAX_DATE = pd.Timestamp('2026-12-31')
+
+
+# ============================================================================
+# Synthetic datasets
+# ============================================================================
+def _bool_strings(values):
+    return np.where(values, 'TRUE', 'FALSE')
+
+
+def generate_datasets(source_dir, out_dir, scale, seed=0):
+    """Write results/goalscorers/shootouts CSVs with scale x the bundled row counts.
+
+    Matches are bootstrapped from the bundled results (so team pairings,
+    tournaments, venues and scores keep their real distributions) with
+    jittered dates. Team and tournament sets therefore stay at their real
+    size, while the scorer pool grows with the scale, as it would with a
+    longer or wider feed. Goal rows are generated only for matches whose
+    source match has goal rows, keeping the real coverage ratio.
+    """
+    from data_loader import load_datasets
+
+    rng = np.random.default_rng(seed)
+    results, goalscorers, shootouts = load_datasets(source_dir, use_cache=False, verbose=False)
+    n = int(len(results) * scale)
+
+    # Results: bootstrap rows, jitter dates, keep file in date order
+    pick = rng.integers(0, len(results), n)
+    dates = results['date'].to_numpy()[pick] + rng.integers(
+        -DATE_JITTER_DAYS, DATE_JITTER_DAYS + 1, n).astype('timedelta64[D]')
+    dates = np.clip(dates, results['date'].min().to_datetime64(), MAX_DATE.to_datetime64())
+    order = np.argsort(dates, kind='stable')
+    pick, dates = pick[order], dates[order]
+    source = results.iloc[pick].reset_index(drop=True)
+    synthetic = pd.DataFrame({
+        'date': pd.DatetimeIndex(dates).strftime('%Y-%m-%d'),
+        'home_team': source['home_team'].astype(str),
+        'away_team': source['away_team'].astype(str),
+        'home_score': source['home_score'],
+        'away_score': source['away_score'],
+        'tournament': source['tournament'].astype(str),
+        'city': source['city'].astype(str),
+        'country': source['country'].astype(str),
+        'neutral': _bool_strings(source['neutral'].to_numpy(dtype=bool)),
+    })
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    synthetic.to_csv(out_dir / 'results.csv', index=False)
+
+    # Goalscorers: one row per goal of covered matches
+    covered = np.bincount(goalscorers['match_id'][goalscorers['match_id'] >= 0],
+                          minlength=len(results)) > 0
+    home_goals = np.where(covered[pick], source['home_score'].fillna(0).to_numpy(dtype=np.int64), 0)
+    away_goals = np.where(covered[pick], source['away_score'].fillna(0).to_numpy(dtype=np.int64), 0)
+    match = np.concatenate([np.repeat(np.arange(n), home_goals), np.repeat(np.arange(n), away_goals)])
+    home_side = np.concatenate([np.ones(home_goals.sum(), bool), np.zeros(away_goals.sum(), bool)])
+    goal_order = np.argsort(match, kind='stable')
+    match, home_side = match[goal_order], home_side[goal_order]
+    goals = len(match)
+
+    minutes = goalscorers['minute'].to_numpy(dtype=np.float64, na_value=np.nan)
+    scorers = pd.Series(goalscorers['scorer'].dropna().unique())
+    scorer_ids = rng.integers(0, int(len(scorers) * scale), goals)
+    copies = pd.Series(scorer_ids // len(scorers))
+    scorer = scorers.iloc[scorer_ids % len(scorers)].reset_index(drop=True)
+    scorer = scorer.where(copies == 0, scorer + ' (' + copies.astype(str) + ')')
+    team = np.where(home_side, synthetic['home_team'].to_numpy()[match],
+                    synthetic['away_team'].to_numpy()[match])
+    flags = rng.random(goals)
+    penalty_rate = goalscorers['penalty'].mean()
+    own_goal_rate = goalscorers['own_goal'].mean()
+    pd.DataFrame({
+        'date': synthetic['date'].to_numpy()[match],
+        'home_team': synthetic['home_team'].to_numpy()[match],
+        'away_team': synthetic['away_team'].to_numpy()[match],
+        'team': team,
+        'scorer': scorer.to_numpy(),
+        'minute': pd.array(minutes[rng.integers(0, len(minutes), goals)], dtype='Int16'),
+        'own_goal': _bool_strings(flags < own_goal_rate),
+        'penalty': _bool_strings((flags >= own_goal_rate) & (flags < own_goal_rate + penalty_rate)),
+    }).to_csv(out_dir / 'goalscorers.csv', index=False)
+
+    # Shootouts: same share of drawn matches as the bundled data
+    draws = np.flatnonzero((source['home_score'] == source['away_score']).to_numpy())
+    share = len(shootouts) / max(int((results['home_score'] == results['away_score']).sum()), 1)
+    chosen = np.sort(rng.choice(draws, size=min(len(draws), int(round(len(draws) * share))),
+                                replace=False))
+    home_wins = rng.random(len(chosen)) < 0.5
+    home = synthetic['home_team'].to_numpy()[chosen]
+    away = synthetic['away_team'].to_numpy()[chosen]
+    pd.DataFrame({
+        'date': synthetic['date'].to_numpy()[chosen],
+        'home_team': home,
+        'away_team': away,
+        'winner': np.where(home_wins, home, away),
+        'first_shooter': '',
+    }).to_csv(out_dir / 'shootouts.csv', index=False)
+
+    return {'results': n, 'goalscorers': goals, 'shootouts': len(chosen)}
+
+
+# ============================================================================
+# Timed pipeline (runs in a fresh process per scale)
+# ============================================================================
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class StageTimer:
+    """Records wall time and the running peak RSS after each stage."""
+
+    def __init__(self):
+        self.stages = []
+
+    def run(self, name, func, *args, **kwargs):
+        start = time.perf_counter()
+        value = func(*args, **kwargs)
+        self.stages.append({'stage': name, 'seconds': round(time.perf_counter() - start, 6),
+                            'peak_rss_mb': peak_rss_mb()})
+        return value
+
+
+def time_checkpoint(timer, name, update, results, directory):
+    """Time a full rebuild of an aggregate against resuming its checkpoint.
+
+    update(results, checkpoint_path) is the aggregate's update_* function.
+    The checkpoint resumed from lacks the last 1% of the rows, as after an
+    append, and is written outside the timed stages.
+    """
+    done = len(results) - max(1, len(results) // 100)
+    update(results.iloc[:done], directory / f'{name}_resume.npz')
+    timer.run(f'{name}:rebuild', update, results, directory / f'{name}_rebuild.npz')
+    timer.run(f'{name}:resume', update, results, directory / f'{name}_resume.npz')
+
+
+def run_pipeline(data_dir, output_dir, chart_ids=None, render=True):
+    """Time CSV load, date parsing, typed load, validation, preprocessing,
+    checkpoint resumes and every chart.
+    """
+    import charts
+    from chart_stats import prepare_data
+    from data_loader import load_datasets
+    from head_to_head import update_head_to_head
+    from match_cube import update_cube
+    from validation import validate_datasets
+
+    data_dir = Path(data_dir)
+    names = ('results', 'goalscorers', 'shootouts')
+    timer = StageTimer()
+    raw = timer.run('read_csv', lambda: {name: pd.read_csv(data_dir / f'{name}.csv')
+                                         for name in names})
+    timer.run('parse_dates', lambda: {name: pd.to_datetime(frame['date'])
+                                      for name, frame in raw.items()})
+    del raw
+    frames = timer.run('load_datasets', load_datasets, data_dir, use_cache=False, verbose=False)
+    frames, _ = timer.run('validate', validate_datasets, *frames)
+    data = timer.run('prepare_data', prepare_data, *frames)
+    with tempfile.TemporaryDirectory() as checkpoints:
+        time_checkpoint(timer, 'cube', update_cube, data['results'], Path(checkpoints))
+        time_checkpoint(timer, 'h2h', lambda results, path: update_head_to_head(
+            results, data['shootouts'], path), data['results'], Path(checkpoints))
+
+    chart_ids = charts.parse_chart_ids(chart_ids)
+    tables = {chart_id: timer.run(f'compute:{chart_id}', charts.compute_chart, chart_id, data)
+              for chart_id in chart_ids}
+    if render:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        charts.renderer(chart_ids[0])  # import the plotting stack outside the timed stages
+        for chart_id, table in tables.items():
+            timer.run(f'render:{chart_id}', charts.render_chart, chart_id, table, output_dir)
+    return {
+        'rows': {name: len(data[name]) for name in names},
+        'stages': timer.stages,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+# ============================================================================
+# Driver
+# ============================================================================
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True, cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_benchmarks(scales, data_dir='data', work_dir=None, chart_ids=None, render=True,
+                   seed=0, keep=False):
+    """Generate and benchmark each scale in its own process; return the results document."""
+    work_dir = Path(work_dir or tempfile.mkdtemp(prefix='football_bench_'))
+    document = {
+        'commit': _git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'versions': {'numpy': np.__version__, 'pandas': pd.__version__},
+        'scales': {},
+    }
+    try:
+        for scale in scales:
+            scale_dir = work_dir / f'x{scale:g}'
+            print(f"Scale {scale:g}x: generating synthetic data in {scale_dir}...")
+            start = time.perf_counter()
+            rows = generate_datasets(data_dir, scale_dir / 'data', scale, seed)
+            print(f"  {rows['results']:,} matches, {rows['goalscorers']:,} goals, "
+                  f"{rows['shootouts']:,} shootouts ({time.perf_counter() - start:.1f}s)")
+
+            result_path = scale_dir / 'result.json'
+            command = [sys.executable, str(Path(__file__).resolve()), '--worker',
+                       str(scale_dir / 'data'), '--output', str(result_path)]
+            if chart_ids:
+                command += ['--only', chart_ids]
+            if not render:
+                command.append('--no-render')
+            subprocess.run(command, check=True)
+            with open(result_path, encoding='utf-8') as f:
+                result = json.load(f)
+            document['scales'][f'{scale:g}'] = result
+            print_stages(result)
+    finally:
+        if not keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return document
+
+
+def print_stages(result):
+    total = sum(stage['seconds'] for stage in result['stages'])
+    for stage in result['stages']:
+        print(f"    {stage['stage']:<16} {stage['seconds']:>9.3f}s  "
+              f"{stage['seconds'] / total * 100:5.1f}%  peak RSS {stage['peak_rss_mb']:,.1f} MiB")
+    print(f"    {'total':<16} {total:>9.3f}s")
+
+
+def compare(baseline_path, current_path):
+    """Print per-stage time ratios (current / baseline) for every common scale."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(current_path, encoding='utf-8') as f:
+        current = json.load(f)
+    print(f"Baseline {baseline['commit']} vs current {current['commit']}")
+    for scale, result in current['scales'].items():
+        if scale not in baseline['scales']:
+            continue
+        before = {s['stage']: s['seconds'] for s in baseline['scales'][scale]['stages']}
+        print(f"\nScale {scale}x (peak RSS {baseline['scales'][scale]['peak_rss_mb']:,.1f} -> "
+              f"{result['peak_rss_mb']:,.1f} MiB)")
+        for stage in result['stages']:
+            old = before.get(stage['stage'])
+            if old:
+                print(f"  {stage['stage']:<16} {old:>9.3f}s -> {stage['seconds']:>9.3f}s  "
+                      f"x{stage['seconds'] / old:.2f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[-1])
+    parser.add_argument('--scales', default=DEFAULT_SCALES,
+                        help=f'comma-separated multiples of the bundled data (default: {DEFAULT_SCALES})')
+    parser.add_argument('--data-dir', default='data', help='bundled CSVs to scale up')
+    parser.add_argument('--work-dir', help='where to write synthetic data (default: a temp dir)')
+    parser.add_argument('--keep', action='store_true', help='keep the synthetic data afterwards')
+    parser.add_argument('--only', metavar='IDS', help='comma-separated chart numbers to benchmark')
+    parser.add_argument('--no-render', action='store_true', help='skip the render stages')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', metavar='PATH',
+                        help='results JSON (default: benchmarks/<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='compare two results files instead of running')
+    parser.add_argument('--worker', metavar='DATA_DIR', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.worker:
+        result = run_pipeline(args.worker, Path(args.worker).parent / 'charts', args.only,
+                              render=not args.no_render)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        return
+
+    scales = [float(s) for s in args.scales.split(',') if s.strip()]
+    document = run_benchmarks(scales, args.data_dir, args.work_dir, args.only,
+                              render=not args.no_render, seed=args.seed, keep=args.keep)
+    output = Path(args.output or Path('benchmarks') / f"{document['commit']}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == '__main__':
+    main()
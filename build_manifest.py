@@ -0,0 +1,202 @@
+"""
+Football Match Analysis - Incremental Build Manifest
+Records what every chart was built from so unchanged charts can be reused
+"""
+
+import ast
+import functools
+import hashlib
+import inspect
+import json
+import os
+from importlib import metadata
+from pathlib import Path
+
+import pandas as pd
+
+import chart_stats
+from charts import DATE_RANGE_PARAMS
+from tournament_taxonomy import DEFAULT_TAXONOMY
+
+MANIFEST_NAME = '.build_manifest.json'
+
+
+def _sha256(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def column_fingerprint(frame, column):
+    """Content hash of one column (values and dtype, not the index)."""
+    series = frame[column]
+    hashed = pd.util.hash_pandas_object(series, index=False).to_numpy()
+    return _sha256(str(series.dtype), hashed.tobytes())
+
+
+PROJECT_DIR = Path(__file__).resolve().parent
+# Read as text: importing it would pull in matplotlib even when every chart is reused
+RENDER_SOURCE = PROJECT_DIR / 'chart_render.py'
+
+
+def _is_project_code(obj):
+    try:
+        return Path(inspect.getsourcefile(obj)).resolve().parent == PROJECT_DIR
+    except TypeError:
+        return False
+
+
+def code_fingerprint(func, _seen=None):
+    """Hash a function's source plus the project globals it references.
+
+    Helpers such as team_records() and constants such as INTENSITY_ORDER are
+    followed, and classes or modules from this project (e.g. elo) are hashed
+    whole, so editing them rebuilds exactly the charts that use them.
+    """
+    seen = set() if _seen is None else _seen
+    if func in seen:
+        return ''
+    seen.add(func)
+    parts = [inspect.getsource(func)]
+    module_globals = func.__globals__
+    for name in func.__code__.co_names:
+        value = module_globals.get(name)
+        if inspect.isfunction(value) and _is_project_code(value):
+            parts.append(code_fingerprint(value, seen))
+        elif (inspect.isclass(value) or inspect.ismodule(value)) and _is_project_code(value):
+            if value not in seen:
+                seen.add(value)
+                parts.append(inspect.getsource(value))
+        elif isinstance(value, (str, int, float, list, tuple, dict)):
+            parts.append(f'{name}={value!r}')
+    return _sha256(*parts)
+
+
+@functools.lru_cache(maxsize=None)
+def _parsed_module(path):
+    """(source, top-level definitions by name, shared setup statements) of a module file."""
+    source = Path(path).read_text(encoding='utf-8')
+    definitions, setup = {}, []
+    for node in ast.parse(source).body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            definitions[node.name] = node
+        elif isinstance(node, ast.Assign) and all(isinstance(t, ast.Name) for t in node.targets):
+            definitions.update((target.id, node) for target in node.targets)
+        elif not (isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant)):
+            # Imports and style calls such as sns.set_style() affect every function
+            setup.append(node)
+    return source, definitions, setup
+
+
+def source_fingerprint(path, name):
+    """Hash a function's source in a module file without importing the module.
+
+    Like code_fingerprint(), module-level functions and constants it uses
+    are followed; the module's imports and setup statements are included.
+    """
+    source, definitions, setup = _parsed_module(str(path))
+    parts = [ast.get_source_segment(source, node) for node in setup]
+    pending, seen = [name], set()
+    while pending:
+        current = pending.pop()
+        if current in seen or current not in definitions:
+            continue
+        seen.add(current)
+        node = definitions[current]
+        parts.append(ast.get_source_segment(source, node))
+        pending.extend(sub.id for sub in ast.walk(node) if isinstance(sub, ast.Name))
+    return _sha256(*parts)
+
+
+def _library_versions():
+    versions = {}
+    for package in ('pandas', 'numpy', 'matplotlib', 'seaborn'):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def file_fingerprint(path):
+    """Content hash of a config file (None when it does not exist)."""
+    try:
+        return _sha256(Path(path).read_bytes())
+    except OSError:
+        return None
+
+
+def chart_fingerprint(chart, data, params=None, _column_cache=None):
+    """Everything a chart's output depends on: input columns, parameters, code.
+
+    Charts that read tournament names also depend on the tournament taxonomy
+    config, so editing its rules rebuilds them. With a date range every
+    dataset is filtered on its date column, which then becomes an input too.
+    """
+    cache = {} if _column_cache is None else _column_cache
+    params = params or {}
+    ranged = any(params.get(name) is not None for name in DATE_RANGE_PARAMS)
+    inputs = {}
+    for dataset, columns in chart.inputs.items():
+        if ranged and 'date' not in columns:
+            columns = ['date', *columns]
+        for column in columns:
+            key = f'{dataset}.{column}'
+            if key not in cache:
+                cache[key] = column_fingerprint(data[dataset], column)
+            inputs[key] = cache[key]
+    if 'tournament' in chart.inputs.get('results', []):
+        inputs['taxonomy'] = file_fingerprint(data.get('taxonomy_path', DEFAULT_TAXONOMY))
+    return {
+        'inputs': inputs,
+        'params': dict(chart.params, **params),
+        'code': _sha256(code_fingerprint(chart.compute),
+                        source_fingerprint(RENDER_SOURCE, chart.render),
+                        code_fingerprint(chart_stats.prepare_data)),
+        'libraries': _library_versions(),
+    }
+
+
+def load_manifest(output_dir):
+    try:
+        with open(Path(output_dir) / MANIFEST_NAME, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(output_dir, manifest):
+    path = Path(output_dir) / MANIFEST_NAME
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def plan_build(charts, data, output_dir, force=False, params=None):
+    """Split charts into (stale, fresh) and return their new fingerprints.
+
+    A chart is fresh when its PNG exists and its recorded fingerprint
+    matches the current one; everything else must be rebuilt. params are
+    extra compute arguments shared by every chart (e.g. a date range).
+    """
+    manifest = load_manifest(output_dir)
+    column_cache = {}
+    fingerprints, stale, fresh = {}, [], []
+    for chart in charts:
+        fingerprint = chart_fingerprint(chart, data, params, _column_cache=column_cache)
+        fingerprints[chart.id] = fingerprint
+        output_exists = (Path(output_dir) / chart.filename).exists()
+        if not force and output_exists and manifest.get(chart.id) == fingerprint:
+            fresh.append(chart.id)
+        else:
+            stale.append(chart.id)
+    return stale, fresh, fingerprints
+
+
+def record_build(output_dir, fingerprints):
+    """Merge the fingerprints of freshly rendered charts into the manifest."""
+    manifest = load_manifest(output_dir)
+    manifest.update(fingerprints)
+    save_manifest(output_dir, manifest)
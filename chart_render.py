@@ -0,0 +1,501 @@
+"""
+Football Match Analysis - Chart Rendering
+Draws each chart from its precomputed statistics table
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import seaborn as sns
+import numpy as np
+import warnings
+warnings.filterwarnings('ignore')
+
+# Set style for professional-looking charts
+sns.set_style("whitegrid")
+plt.rcParams['figure.figsize'] = (12, 6)
+plt.rcParams['font.size'] = 10
+
+NO_MATCHES = 'No matches in the selected date range'
+
+
+def render_placeholder(title, path, message=NO_MATCHES):
+    """A titled image saying why there is nothing to plot, for empty tables."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.set_axis_off()
+    ax.set_title(title, fontsize=14, fontweight='bold', pad=20)
+    ax.text(0.5, 0.5, message, ha='center', va='center', fontsize=14, color='gray',
+            transform=ax.transAxes)
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+# ============================================================================
+# CHART 1: Market Growth - International Football Match Volume Over Time
+# ============================================================================
+def render_match_volume_trends(yearly_matches, path):
+    fig, ax = plt.subplots(figsize=(14, 6))
+    ax.bar(yearly_matches['year'], yearly_matches['matches'], color='#2E86AB', alpha=0.8, width=0.8)
+    ax.set_xlabel('Year', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Number of Matches', fontsize=12, fontweight='bold')
+    span = f"{yearly_matches['year'].min()}-{yearly_matches['year'].max()}"
+    ax.set_title(f'International Football Market Growth: Match Volume Trends ({span})',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.grid(axis='y', alpha=0.3)
+
+    # Add trend annotations
+    for decade in [1950, 1990, 2020]:
+        matches = yearly_matches[yearly_matches['year'] == decade]['matches'].values
+        if len(matches) > 0:
+            ax.axvline(decade, color='red', linestyle='--', alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+# ============================================================================
+# CHART 2: Strategic Value of Home Advantage
+# ============================================================================
+def render_home_advantage(home_stats, path):
+    title = 'Strategic Value of Home Advantage in International Football'
+    if home_stats['Matches'].sum() == 0:
+        return render_placeholder(title, path)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    colors = ['#06A77D', '#F4D35E', '#EE6352']
+    bars = ax.bar(home_stats['Outcome'], home_stats['Percentage'], color=colors, alpha=0.8, edgecolor='black')
+
+    # Add percentage labels on bars
+    for i, (bar, pct, count) in enumerate(zip(bars, home_stats['Percentage'], home_stats['Matches'])):
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+                f'{pct}%\n({count:,} matches)',
+                ha='center', va='bottom', fontsize=11, fontweight='bold')
+
+    ax.set_ylabel('Percentage of Matches (%)', fontsize=12, fontweight='bold')
+    ax.set_title(title, fontsize=14, fontweight='bold', pad=20)
+    ax.set_ylim(0, max(home_stats['Percentage']) * 1.2)
+    ax.grid(axis='y', alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+# ============================================================================
+# CHART 3: Tournament Type Performance - Competitive vs Friendly
+# ============================================================================
+def render_tournament_type_performance(tournament_stats, path):
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+
+    # Match distribution
+    ax1.barh(tournament_stats.index, tournament_stats['Total Matches'],
+             color=['#E63946', '#457B9D'], alpha=0.8, edgecolor='black')
+    ax1.set_xlabel('Number of Matches', fontsize=11, fontweight='bold')
+    ax1.set_title('Match Distribution by Type', fontsize=12, fontweight='bold')
+    for i, v in enumerate(tournament_stats['Total Matches']):
+        ax1.text(v, i, f' {v:,}', va='center', fontsize=10, fontweight='bold')
+    ax1.grid(axis='x', alpha=0.3)
+
+    # Goal scoring comparison
+    x = np.arange(len(tournament_stats.index))
+    width = 0.35
+    bars1 = ax2.bar(x - width/2, tournament_stats['Avg Home Goals'], width,
+                    label='Avg Home Goals', color='#06A77D', alpha=0.8, edgecolor='black')
+    bars2 = ax2.bar(x + width/2, tournament_stats['Avg Away Goals'], width,
+                    label='Avg Away Goals', color='#F77F00', alpha=0.8, edgecolor='black')
+
+    ax2.set_ylabel('Average Goals per Match', fontsize=11, fontweight='bold')
+    ax2.set_title('Goal Scoring Patterns by Match Type', fontsize=12, fontweight='bold')
+    ax2.set_xticks(x)
+    if len(x) > 3:
+        ax2.set_xticklabels(tournament_stats.index, rotation=30, ha='right')
+    else:
+        ax2.set_xticklabels(tournament_stats.index)
+    ax2.legend()
+    ax2.grid(axis='y', alpha=0.3)
+
+    # Add value labels
+    for bars in [bars1, bars2]:
+        for bar in bars:
+            height = bar.get_height()
+            ax2.text(bar.get_x() + bar.get_width()/2., height,
+                    f'{height:.2f}', ha='center', va='bottom', fontsize=9)
+
+    facet = tournament_stats.index.name.removeprefix('tournament_')
+    title = ('Competitive vs Friendly Match Performance Analysis' if facet == 'category'
+             else f'Match Performance Analysis by Tournament {facet.title()}')
+    plt.suptitle(title, fontsize=14, fontweight='bold', y=1.02)
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+# ============================================================================
+# CHART 4: Top 15 Teams by Win Rate - Market Leaders
+# ============================================================================
+def render_top_teams_win_rate(team_performance, path):
+    fig, ax = plt.subplots(figsize=(12, 8))
+    bars = ax.barh(range(len(team_performance)), team_performance['Win Rate (%)'],
+                   color='#2E86AB', alpha=0.8, edgecolor='black')
+
+    # Color top 3 differently
+    for i in range(min(3, len(bars))):
+        bars[i].set_color('#06A77D')
+        bars[i].set_alpha(0.9)
+
+    ax.set_yticks(range(len(team_performance)))
+    ax.set_yticklabels(team_performance['Team'])
+    ax.set_xlabel('Win Rate (%)', fontsize=12, fontweight='bold')
+    ax.set_title('Top 15 National Teams by Win Rate - Market Performance Leaders',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.invert_yaxis()
+    ax.grid(axis='x', alpha=0.3)
+
+    # Add value labels
+    for i, (bar, row) in enumerate(zip(bars, team_performance.iterrows())):
+        width = bar.get_width()
+        ax.text(width, bar.get_y() + bar.get_height()/2,
+                f" {row[1]['Win Rate (%)']}% ({row[1]['Total Matches']} matches)",
+                va='center', fontsize=9, fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+# ============================================================================
+# CHART 5: Goal Scoring Timing - Tactical Insights
+# ============================================================================
+PHASE_COLORS = {'First Half': '#2E86AB', 'Second Half': '#06A77D', 'Extra Time': '#6A4C93'}
+
+
+def render_goal_timing(goal_timing, path):
+    title = 'Goal Scoring by Minute - When Teams Strike Most'
+    if goal_timing['Goals'].sum() == 0:
+        return render_placeholder(title, path, 'No goals in the selected date range')
+    fig, ax = plt.subplots(figsize=(14, 6))
+    regular = goal_timing['Goals'] - goal_timing['Stoppage Goals']
+    ax.bar(goal_timing['Minute'], regular, width=0.85, alpha=0.8,
+           color=[PHASE_COLORS[p] for p in goal_timing['Phase']])
+    ax.bar(goal_timing['Minute'], goal_timing['Stoppage Goals'], bottom=regular, width=0.85,
+           color='#E63946', alpha=0.9)
+
+    ax.set_xlabel('Match Minute', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Number of Goals', fontsize=12, fontweight='bold')
+    ax.set_title(title, fontsize=14, fontweight='bold', pad=20)
+    ax.set_xlim(0, goal_timing['Minute'].max() + 1)
+    ax.set_xticks(range(0, int(goal_timing['Minute'].max()) + 1, 15))
+    ax.grid(axis='y', alpha=0.3)
+    for minute in (45.5, 90.5):
+        ax.axvline(minute, color='gray', linestyle='--', alpha=0.5)
+
+    # Label the estimated stoppage-time goals at the end of each half
+    total_goals = goal_timing['Goals'].sum()
+    for _, row in goal_timing[goal_timing['Stoppage Goals'] > 0].iterrows():
+        if row['Stoppage Goals'] / total_goals < 0.001:
+            continue
+        ax.text(row['Minute'], row['Goals'],
+                f"+{row['Stoppage Goals']:,} stoppage\n({row['Stoppage Goals'] / total_goals * 100:.1f}%)",
+                ha='center', va='bottom', fontsize=9, fontweight='bold')
+    ax.set_ylim(0, goal_timing['Goals'].max() * 1.2)
+
+    handles = [plt.Rectangle((0, 0), 1, 1, color=c, alpha=0.8) for c in PHASE_COLORS.values()]
+    handles.append(plt.Rectangle((0, 0), 1, 1, color='#E63946', alpha=0.9))
+    ax.legend(handles, list(PHASE_COLORS) + ['Stoppage Time (est.)'], loc='upper right')
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+# ============================================================================
+# CHART 6: Penalty Shootout Success Rates - High-Pressure Performance
+# ============================================================================
+def render_shootout_success(shootout_performance, path):
+    fig, ax = plt.subplots(figsize=(12, 8))
+    bars = ax.barh(range(len(shootout_performance)), shootout_performance['Win Rate (%)'],
+                   color='#E63946', alpha=0.8, edgecolor='black')
+
+    # Highlight top performers
+    for i in range(min(3, len(bars))):
+        bars[i].set_color('#06A77D')
+        bars[i].set_alpha(0.9)
+
+    ax.set_yticks(range(len(shootout_performance)))
+    ax.set_yticklabels(shootout_performance['Team'])
+    ax.set_xlabel('Shootout Win Rate (%)', fontsize=12, fontweight='bold')
+    ax.set_title('Top 15 Teams in Penalty Shootout Success - Clutch Performance Under Pressure',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.invert_yaxis()
+    ax.grid(axis='x', alpha=0.3)
+
+    # Add value labels
+    for i, (bar, row) in enumerate(zip(bars, shootout_performance.iterrows())):
+        width = bar.get_width()
+        ax.text(width, bar.get_y() + bar.get_height()/2,
+                f" {row[1]['Win Rate (%)']}% ({row[1]['Wins']}/{row[1]['Shootouts']})",
+                va='center', fontsize=9, fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+# ============================================================================
+# CHART 7: Goals Per Match Evolution - Game Dynamics Over Decades
+# ============================================================================
+def render_scoring_evolution(decade_goals, path):
+    title = 'Evolution of Goal Scoring Patterns Over Time - Strategic Game Changes'
+    if decade_goals.empty:
+        return render_placeholder(title, path)
+    fig, ax1 = plt.subplots(figsize=(14, 6))
+
+    color = '#2E86AB'
+    ax1.set_xlabel('Decade', fontsize=12, fontweight='bold')
+    ax1.set_ylabel('Average Goals per Match', fontsize=12, fontweight='bold', color=color)
+    line1 = ax1.plot(decade_goals.index, decade_goals['Avg Goals per Match'],
+                     color=color, marker='o', linewidth=3, markersize=8, label='Avg Goals')
+    ax1.tick_params(axis='y', labelcolor=color)
+    ax1.grid(True, alpha=0.3)
+
+    # Add trend line (a quadratic needs at least three decades)
+    if len(decade_goals) >= 3:
+        z = np.polyfit(decade_goals.index, decade_goals['Avg Goals per Match'], 2)
+        p = np.poly1d(z)
+        ax1.plot(decade_goals.index, p(decade_goals.index), "--",
+                 color='red', linewidth=2, alpha=0.7, label='Trend')
+
+    ax1.set_title(title, fontsize=14, fontweight='bold', pad=20)
+    ax1.legend(loc='upper left')
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+# ============================================================================
+# CHART 8: Most Active Tournament Types - Market Segmentation
+# ============================================================================
+def render_tournament_frequency(tournament_freq, path):
+    fig, ax = plt.subplots(figsize=(12, 8))
+    bars = ax.barh(range(len(tournament_freq)), tournament_freq.values,
+                   color='#6A4C93', alpha=0.8, edgecolor='black')
+
+    ax.set_yticks(range(len(tournament_freq)))
+    ax.set_yticklabels(tournament_freq.index)
+    ax.set_xlabel('Number of Matches', fontsize=12, fontweight='bold')
+    ax.set_title('Top 15 Most Frequent Tournaments - Market Segmentation Analysis',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.invert_yaxis()
+    ax.grid(axis='x', alpha=0.3)
+
+    # Add value labels
+    for bar, val in zip(bars, tournament_freq.values):
+        width = bar.get_width()
+        ax.text(width, bar.get_y() + bar.get_height()/2,
+                f' {val:,}', va='center', fontsize=10, fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+# ============================================================================
+# CHART 9: Neutral Venue Impact - Event Hosting Strategy
+# ============================================================================
+def render_neutral_venue_impact(neutral_comparison, path):
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+
+    # Match distribution
+    colors_venue = ['#2E86AB', '#E63946']
+    bars1 = ax1.bar(neutral_comparison.index, neutral_comparison['Total Matches'],
+                    color=colors_venue, alpha=0.8, edgecolor='black')
+    ax1.set_ylabel('Number of Matches', fontsize=11, fontweight='bold')
+    ax1.set_title('Match Distribution by Venue Type', fontsize=12, fontweight='bold')
+    ax1.grid(axis='y', alpha=0.3)
+
+    for bar, val in zip(bars1, neutral_comparison['Total Matches']):
+        height = bar.get_height()
+        ax1.text(bar.get_x() + bar.get_width()/2., height,
+                f'{val:,}', ha='center', va='bottom', fontsize=11, fontweight='bold')
+
+    # Goal scoring comparison
+    bars2 = ax2.bar(neutral_comparison.index, neutral_comparison['Avg Goals'],
+                    color=colors_venue, alpha=0.8, edgecolor='black')
+    ax2.set_ylabel('Average Goals per Match', fontsize=11, fontweight='bold')
+    ax2.set_title('Scoring Patterns by Venue Type', fontsize=12, fontweight='bold')
+    ax2.grid(axis='y', alpha=0.3)
+
+    for bar, val in zip(bars2, neutral_comparison['Avg Goals']):
+        height = bar.get_height()
+        ax2.text(bar.get_x() + bar.get_width()/2., height,
+                f'{val:.2f}', ha='center', va='bottom', fontsize=11, fontweight='bold')
+
+    plt.suptitle('Neutral Venue Impact on Match Dynamics - Event Hosting Insights',
+                 fontsize=14, fontweight='bold', y=1.02)
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+# ============================================================================
+# CHART 10: Penalty vs Open Play Goals - Scoring Method Analysis
+# ============================================================================
+def render_goal_scoring_methods(goal_methods, path):
+    title = 'Goal Scoring Methods Distribution - How Teams Score'
+    if goal_methods['Goals'].sum() == 0:
+        return render_placeholder(title, path, 'No goals in the selected date range')
+    fig, ax = plt.subplots(figsize=(10, 6))
+    colors_methods = ['#06A77D', '#F77F00', '#E63946']
+    bars = ax.bar(goal_methods['Method'], goal_methods['Percentage'],
+                  color=colors_methods, alpha=0.8, edgecolor='black')
+
+    ax.set_ylabel('Percentage of All Goals (%)', fontsize=12, fontweight='bold')
+    ax.set_title(title, fontsize=14, fontweight='bold', pad=20)
+    ax.grid(axis='y', alpha=0.3)
+
+    # Add percentage and count labels
+    for bar, pct, count in zip(bars, goal_methods['Percentage'], goal_methods['Goals']):
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+                f'{pct}%\n({count:,} goals)',
+                ha='center', va='bottom', fontsize=11, fontweight='bold')
+
+    ax.set_ylim(0, max(goal_methods['Percentage']) * 1.2)
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+# ============================================================================
+# CHART 11: Top Goal Scorers - Star Player Impact
+# ============================================================================
+def render_top_goal_scorers(top_scorers, path):
+    fig, ax = plt.subplots(figsize=(12, 8))
+    bars = ax.barh(range(len(top_scorers)), top_scorers.values,
+                   color='#F77F00', alpha=0.8, edgecolor='black')
+
+    # Highlight top 3
+    for i in range(min(3, len(bars))):
+        bars[i].set_color('#06A77D')
+        bars[i].set_alpha(0.9)
+
+    ax.set_yticks(range(len(top_scorers)))
+    ax.set_yticklabels(top_scorers.index)
+    ax.set_xlabel('International Goals Scored', fontsize=12, fontweight='bold')
+    ax.set_title('Top 20 All-Time International Goal Scorers - Star Player Performance',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.invert_yaxis()
+    ax.grid(axis='x', alpha=0.3)
+
+    # Add value labels
+    for bar, val in zip(bars, top_scorers.values):
+        width = bar.get_width()
+        ax.text(width, bar.get_y() + bar.get_height()/2,
+                f' {val}', va='center', fontsize=10, fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+# ============================================================================
+# CHART 12: Match Intensity Trends - Competitive Balance
+# ============================================================================
+def render_match_intensity(intensity_dist, path):
+    title = 'Match Competitiveness Distribution - Competitive Balance Indicator'
+    if intensity_dist.sum() == 0:
+        return render_placeholder(title, path)
+    fig, ax = plt.subplots(figsize=(12, 6))
+    colors_intensity = ['#06A77D', '#F4D35E', '#E63946']
+    bars = ax.bar(range(len(intensity_dist)), intensity_dist.values,
+                  color=colors_intensity, alpha=0.8, edgecolor='black')
+
+    ax.set_xticks(range(len(intensity_dist)))
+    ax.set_xticklabels([label.replace(' (', '\n(') for label in intensity_dist.index])
+    ax.set_ylabel('Number of Matches', fontsize=12, fontweight='bold')
+    ax.set_title(title, fontsize=14, fontweight='bold', pad=20)
+    ax.grid(axis='y', alpha=0.3)
+
+    # Add value labels and percentages
+    total = intensity_dist.sum()
+    for bar, val in zip(bars, intensity_dist.values):
+        height = bar.get_height()
+        pct = (val / total * 100)
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+                f'{val:,}\n({pct:.1f}%)',
+                ha='center', va='bottom', fontsize=11, fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+# ============================================================================
+# CHART 13: Top Teams by Elo Rating - Current Team Strength
+# ============================================================================
+def render_top_rated_teams(rated_teams, path):
+    fig, ax = plt.subplots(figsize=(12, 8))
+    bars = ax.barh(range(len(rated_teams)), rated_teams['Rating'],
+                   color='#457B9D', alpha=0.8, edgecolor='black')
+
+    # Highlight top 3
+    for i in range(min(3, len(bars))):
+        bars[i].set_color('#06A77D')
+        bars[i].set_alpha(0.9)
+
+    ax.set_yticks(range(len(rated_teams)))
+    ax.set_yticklabels(rated_teams['Team'])
+    ax.set_xlabel('Elo Rating', fontsize=12, fontweight='bold')
+    ax.set_title(f'Top {len(rated_teams)} National Teams by Elo Rating - Current Team Strength',
+                 fontsize=14, fontweight='bold', pad=20)
+    if len(rated_teams):
+        ax.set_xlim(rated_teams['Rating'].min() - 100, rated_teams['Rating'].max() + 60)
+    ax.invert_yaxis()
+    ax.grid(axis='x', alpha=0.3)
+
+    # Add value labels
+    for bar, val in zip(bars, rated_teams['Rating']):
+        width = bar.get_width()
+        ax.text(width, bar.get_y() + bar.get_height()/2,
+                f' {val:,}', va='center', fontsize=10, fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+# ============================================================================
+# CHART 14: Top Rivalries - Most-Played International Fixtures
+# ============================================================================
+def render_top_rivalries(rivalries, path):
+    fig, ax = plt.subplots(figsize=(12, 8))
+    y = range(len(rivalries))
+    a_wins = rivalries['Team A Wins']
+    draws = rivalries['Draws']
+    b_wins = rivalries['Team B Wins']
+    ax.barh(y, a_wins, color='#2E86AB', alpha=0.8, edgecolor='black', label='First-named team wins')
+    ax.barh(y, draws, left=a_wins, color='#F4D35E', alpha=0.8, edgecolor='black', label='Draws')
+    ax.barh(y, b_wins, left=a_wins + draws, color='#EE6352', alpha=0.8, edgecolor='black',
+            label='Second-named team wins')
+
+    ax.set_yticks(list(y))
+    ax.set_yticklabels([f'{a} vs {b}' for a, b in zip(rivalries['Team A'], rivalries['Team B'])])
+    ax.set_xlabel('Matches Played', fontsize=12, fontweight='bold')
+    ax.set_title(f'Top {len(rivalries)} Rivalries - Most-Played International Fixtures',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.invert_yaxis()
+    ax.grid(axis='x', alpha=0.3)
+    ax.legend(loc='lower right')
+
+    # Add W-D-L labels
+    for i, row in enumerate(rivalries.itertuples(index=False)):
+        ax.text(row.Matches, i, f" {row[3]}-{row.Draws}-{row[5]} ({row.Matches})",
+                va='center', fontsize=9, fontweight='bold')
+    ax.set_xlim(0, rivalries['Matches'].max() * 1.2 if len(rivalries) else 1)
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
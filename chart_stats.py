@@ -0,0 +1,526 @@
+"""
+Football Match Analysis - Chart Statistics
+Computes the table behind every chart from the loaded datasets (no plotting)
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from date_index import DateIndex, parse_date_range
+from elo import update_ratings
+from features import INTENSITY_ORDER, OUTCOMES, FeatureSet, decade_of, intensity_codes
+from goal_events import GoalTimeline, minute_histogram, minute_profile
+from head_to_head import update_head_to_head
+from match_cube import MatchCube, update_cube
+from scorer_index import ScorerIndex
+from tournament_taxonomy import DEFAULT_TAXONOMY, load_taxonomy
+
+
+# ============================================================================
+# Team-perspective fact tables (one row per team per match)
+# ============================================================================
+def build_team_matches(results, features=None):
+    """Stack home and away sides so every match appears once per team.
+
+    Rows are ordered home sides first, then away sides, so grouping with
+    sort=False keeps teams in order of first appearance. Results come from
+    the outcome feature of features, a FeatureSet over results.
+    """
+    if features is None:
+        features = FeatureSet(results)
+    outcome = features['outcome'].cat.codes.to_numpy()
+    home = pd.DataFrame({
+        'match': results.index,
+        'team': results['home_team'].values,
+        'opponent': results['away_team'].values,
+        'goals_for': results['home_score'].values,
+        'goals_against': results['away_score'].values,
+        'venue': np.where(results['neutral'], 'Neutral', 'Home'),
+    })
+    away = pd.DataFrame({
+        'match': results.index,
+        'team': results['away_team'].values,
+        'opponent': results['home_team'].values,
+        'goals_for': results['away_score'].values,
+        'goals_against': results['home_score'].values,
+        'venue': np.where(results['neutral'], 'Neutral', 'Away'),
+    })
+    team_matches = pd.concat([home, away], ignore_index=True)
+    # Outcome codes (home win, draw, away win) are W/D/L for the home side and
+    # L/D/W for the away side; unknown outcomes (-1) stay missing
+    codes = np.concatenate([outcome, np.where(outcome < 0, -1, 2 - outcome)])
+    team_matches['result'] = pd.Categorical.from_codes(codes, categories=['W', 'D', 'L'])
+    team_matches['venue'] = team_matches['venue'].astype('category')
+    return team_matches
+
+
+def team_records(team_matches, min_matches=0):
+    """Per-team win/draw/loss totals for teams with at least min_matches."""
+    result = team_matches['result']
+    records = pd.DataFrame({
+        'team': team_matches['team'],
+        'wins': result == 'W',
+        'draws': result == 'D',
+        'losses': result == 'L',
+        'goals_for': team_matches['goals_for'],
+        'goals_against': team_matches['goals_against'],
+    }).groupby('team', sort=False).agg(
+        matches=('wins', 'size'),
+        wins=('wins', 'sum'),
+        draws=('draws', 'sum'),
+        losses=('losses', 'sum'),
+        goals_for=('goals_for', 'sum'),
+        goals_against=('goals_against', 'sum'),
+    )
+    return records[records['matches'] >= min_matches]
+
+
+def build_team_shootouts(shootouts):
+    """Stack shootout participants so every shootout appears once per team."""
+    teams = pd.concat([shootouts['home_team'], shootouts['away_team']], ignore_index=True)
+    winners = pd.concat([shootouts['winner'], shootouts['winner']], ignore_index=True)
+    return pd.DataFrame({'team': teams, 'won': (teams == winners).values})
+
+
+def shootout_records(team_shootouts, min_shootouts=0):
+    """Per-team shootout totals for teams with at least min_shootouts."""
+    records = team_shootouts.groupby('team', sort=False).agg(
+        shootouts=('won', 'size'),
+        wins=('won', 'sum'),
+    )
+    return records[records['shootouts'] >= min_shootouts]
+
+
+# ============================================================================
+# Preprocessing
+# ============================================================================
+def prepare_data(results, goalscorers, shootouts):
+    """Datasets shared by all charts.
+
+    Nothing is derived here: derived columns (features()) and the team fact
+    tables (team_matches(), team_shootouts()) are built on first use, so a
+    run only pays for what its charts read.
+    """
+    return {
+        'results': results,
+        'goalscorers': goalscorers,
+        'shootouts': shootouts,
+    }
+
+
+def features(data):
+    """Lazily computed derived columns of data['results'] (see features.py)."""
+    if 'features' not in data:
+        data['features'] = FeatureSet(data['results'],
+                                      data.get('taxonomy_path', DEFAULT_TAXONOMY))
+    return data['features']
+
+
+def team_matches(data):
+    """Team-perspective match rows for data['results'], built on first use."""
+    if 'team_matches' not in data:
+        data['team_matches'] = build_team_matches(data['results'], features(data))
+    return data['team_matches']
+
+
+def team_shootouts(data):
+    """Team-perspective shootout rows for data['shootouts'], built on first use."""
+    if 'team_shootouts' not in data:
+        data['team_shootouts'] = build_team_shootouts(data['shootouts'])
+    return data['team_shootouts']
+
+
+def date_index(data):
+    """Date-sorted prefix-sum index over data['results'], built once per run."""
+    if 'date_index' not in data:
+        data['date_index'] = DateIndex.build(data['results'], features(data))
+    return data['date_index']
+
+
+def _dates_within(dates, start, end):
+    mask = np.ones(len(dates), dtype=bool)
+    if start is not None:
+        mask &= (dates >= start).to_numpy()
+    if end is not None:
+        mask &= (dates <= end).to_numpy()
+    return mask
+
+
+def date_window(data, start=None, end=None):
+    """data restricted to the matches, goals and shootouts from start to end inclusive.
+
+    data itself is returned when the range covers every match. The last
+    window is kept in data['window'] so the charts of one run share it.
+    """
+    start, end = parse_date_range(start, end)
+    if date_index(data).covers(start, end):
+        return data
+    cached = data.get('window')
+    if cached is not None and cached[0] == (start, end):
+        return cached[1]
+    matches = date_index(data).rows(start, end)
+    shootouts = _dates_within(data['shootouts']['date'], start, end)
+    window = {
+        'results': data['results'][matches],
+        'goalscorers': data['goalscorers'][_dates_within(data['goalscorers']['date'], start, end)],
+        'shootouts': data['shootouts'][shootouts],
+    }
+    # Both fact tables stack the home rows on top of the away rows
+    if 'team_matches' in data:
+        window['team_matches'] = data['team_matches'][np.tile(matches, 2)]
+    if 'team_shootouts' in data:
+        window['team_shootouts'] = data['team_shootouts'][np.tile(shootouts, 2)]
+    data['window'] = ((start, end), window)
+    return window
+
+
+def match_cube(data):
+    """Aggregate cube over data['results'], built once per run.
+
+    When data has a 'cube_checkpoint' path the cube resumes from it and only
+    rows appended since the last run are folded in; data['cube_source'], the
+    loader's fingerprint of the CSVs, lets an unchanged checkpoint skip
+    hashing the rows.
+    """
+    if 'cube' not in data:
+        data['cube'] = update_cube(data['results'], data.get('cube_checkpoint'),
+                                   features=features(data), source=data.get('cube_source'))
+    return data['cube']
+
+
+def _whole_years(start, end):
+    """(first, last) calendar years when start-end is made of whole years, else None."""
+    if start is not None and (start.month, start.day) != (1, 1):
+        return None
+    if end is not None and (end.month, end.day) != (12, 31):
+        return None
+    return (None if start is None else start.year, None if end is None else end.year)
+
+
+def range_cube(data, start=None, end=None):
+    """Match cube for the matches from start to end inclusive.
+
+    Whole calendar years are sliced from the shared cube; a range that
+    splits a year is aggregated from its rows (kept with the date window).
+    """
+    start, end = parse_date_range(start, end)
+    years = _whole_years(start, end)
+    if years is not None:
+        return match_cube(data).slice_years(*years)
+    window = date_window(data, start, end)
+    if 'cube' not in window:
+        window['cube'] = MatchCube().update(window['results'], features(window))
+    return window['cube']
+
+
+def scorer_index(data, start=None, end=None):
+    """Scorer index over the goals from start to end, built once per date range.
+
+    Goals are joined to tournaments through the full results frame, which
+    their match_id refers to.
+    """
+    window = date_window(data, start, end)
+    if 'scorer_index' not in window:
+        window['scorer_index'] = ScorerIndex.build(window['goalscorers'], data['results'])
+    return window['scorer_index']
+
+
+def game_states(data, start=None, end=None):
+    """Lead changes, comebacks and goals by game state for the goals from start to end.
+
+    Goals keep their match_id into the full results frame, so matches
+    outside the range simply have no timeline.
+    """
+    window = date_window(data, start, end)
+    return GoalTimeline.build(data['results'], window['goalscorers']).summary()
+
+
+def tournament_taxonomy(data):
+    """Taxonomy for classifying tournaments, from data['taxonomy_path'] when set."""
+    return load_taxonomy(data.get('taxonomy_path', DEFAULT_TAXONOMY))
+
+
+def elo_ratings(data):
+    """Elo engine for data['results'], computed once per run.
+
+    When data has an 'elo_checkpoint' path the ratings resume from it and
+    only matches appended since the last run are rated.
+    """
+    if 'elo' not in data:
+        data['elo'] = update_ratings(data['results'], data.get('elo_checkpoint'))
+    return data['elo']
+
+
+def rated_teams_table(history, as_of, top_n=15, active_years=4, since=None):
+    """Highest Elo ratings on as_of among teams that played in the previous active_years.
+
+    history is an elo.RatingHistory. since, when given, additionally
+    requires a match on or after that date.
+    """
+    as_of = pd.Timestamp(as_of)
+    snapshot = history.ratings_on(as_of)
+    cutoff = as_of - pd.DateOffset(years=active_years)
+    if since is not None:
+        cutoff = max(cutoff, pd.Timestamp(since))
+    active = snapshot[snapshot['last_match'] >= cutoff]
+    top = active.sort_values('rating', ascending=False, kind='stable').head(top_n)
+    return pd.DataFrame({
+        'Team': top.index,
+        'Rating': top['rating'].round(0).astype(int).values,
+        'Last Match': top['last_match'].values,
+    })
+
+
+def head_to_head(data):
+    """Head-to-head matrix for data['results'] and data['shootouts'], built once per run.
+
+    When data has a 'head_to_head_checkpoint' path, rows appended since the
+    last run are folded into the saved matrix instead of rebuilding it.
+    """
+    if 'head_to_head' not in data:
+        data['head_to_head'] = update_head_to_head(data['results'], data['shootouts'],
+                                                   data.get('head_to_head_checkpoint'))
+    return data['head_to_head']
+
+
+def rivalries_table(h2h, top_n=15):
+    """Most-played fixtures, each pair named in alphabetical order."""
+    pairs = h2h.pairs()
+    swap = (pairs['team_a'] > pairs['team_b']).to_numpy()
+    team_a = np.where(swap, pairs['team_b'], pairs['team_a'])
+    team_b = np.where(swap, pairs['team_a'], pairs['team_b'])
+    rivalries = pd.DataFrame({
+        'Team A': team_a,
+        'Team B': team_b,
+        'Matches': pairs['matches'].values,
+        'Team A Wins': np.where(swap, pairs['b_wins'], pairs['a_wins']),
+        'Draws': pairs['draws'].values,
+        'Team B Wins': np.where(swap, pairs['a_wins'], pairs['b_wins']),
+    })
+    rivalries = rivalries.sort_values(['Matches', 'Team A', 'Team B'],
+                                      ascending=[False, True, True]).head(top_n)
+    return rivalries.reset_index(drop=True)
+
+
+# ============================================================================
+# Chart tables from aggregates (shared with the streaming path)
+# ============================================================================
+def volume_table(yearly):
+    """Chart 1 table from per-year totals with a 'matches' column."""
+    return pd.DataFrame({'year': yearly.index, 'matches': yearly['matches'].values})
+
+
+def home_outcome_table(matches):
+    """Chart 2 table from non-neutral home win, draw and away win counts."""
+    home_stats = pd.DataFrame({
+        'Outcome': ['Home Win', 'Draw', 'Away Win'],
+        'Matches': matches
+    })
+    home_stats['Percentage'] = (home_stats['Matches'] / home_stats['Matches'].sum() * 100).round(1)
+    return home_stats
+
+
+def tournament_type_table(cube, taxonomy, facet='category'):
+    """Chart 3 table: the cube rolled up to one taxonomy facet (competitive vs friendly by default).
+
+    Each distinct tournament is classified once; rows follow the facet's
+    rule order and values without matches are left out.
+    """
+    tournaments = cube.rollup(['tournament'])
+    groups = taxonomy.categorize(tournaments.index.to_series(), facet)
+    sums = tournaments.groupby(groups, observed=True).sum()
+    tournament_stats = pd.DataFrame({
+        'Avg Home Goals': (sums['home_goals'] / sums['matches']).round(2),
+        'Avg Away Goals': (sums['away_goals'] / sums['matches']).round(2),
+        'Total Matches': sums['matches']
+    }, index=pd.Index(sums.index.astype(str), name=f'tournament_{facet}'))
+    tournament_stats['Avg Total Goals'] = (tournament_stats['Avg Home Goals'] +
+                                           tournament_stats['Avg Away Goals']).round(2)
+    return tournament_stats
+
+
+def decade_table(decades, min_matches=100):
+    """Chart 7 table from per-decade 'goals' and 'matches' totals."""
+    decade_goals = pd.DataFrame({
+        'Avg Goals per Match': (decades['goals'] / decades['matches']).round(2),
+        'Total Matches': decades['matches']
+    }).rename_axis('decade')
+    return decade_goals[decade_goals['Total Matches'] >= min_matches]
+
+
+def cube_decades(cube):
+    """Per-decade match and goal totals rolled up from the cube's years."""
+    yearly = cube.rollup(['year'])
+    decades = yearly.groupby(decade_of(yearly.index)).sum()
+    return decades.assign(goals=decades['home_goals'] + decades['away_goals'])
+
+
+def tournament_frequency_table(cube, top_n=15):
+    """Chart 8 table: match counts of the most frequent tournaments."""
+    counts = cube.rollup(['tournament'])['matches'].sort_index().rename('count')
+    # value_counts() ranks ties stably, so keep alphabetical order for equal counts
+    return counts.sort_values(ascending=False, kind='stable').head(top_n)
+
+
+def venue_table(matches, goals):
+    """Chart 9 table from [home/away, neutral] match and goal totals."""
+    matches, goals = pd.Series(matches), pd.Series(goals)
+    neutral_comparison = pd.DataFrame({
+        'Avg Goals': (goals / matches).round(2).values,
+        'Total Matches': matches.values
+    }, index=['Home/Away', 'Neutral Venue'])
+    return neutral_comparison[neutral_comparison['Total Matches'] > 0]
+
+
+def cube_venues(cube):
+    """([home/away, neutral] matches, goals) rolled up from the cube."""
+    venues = cube.rollup(['neutral']).reindex([False, True], fill_value=0)
+    return venues['matches'].values, (venues['home_goals'] + venues['away_goals']).values
+
+
+def intensity_table(cube):
+    """Chart 12 table: matches per goal-difference band."""
+    margins = cube.rollup(['margin'])['matches']
+    bands = np.asarray(INTENSITY_ORDER)[intensity_codes(margins.index)]
+    counts = margins.groupby(bands).sum().reindex(INTENSITY_ORDER)
+    return counts.rename('count').rename_axis('match_intensity')
+
+
+def table_records(table):
+    """JSON-ready list of row dicts for a chart table (Series or DataFrame)."""
+    if isinstance(table, pd.Series):
+        table = table.rename(table.name or 'value').rename_axis(table.index.name or 'label')
+        table = table.reset_index()
+    elif not isinstance(table.index, pd.RangeIndex):
+        table = table.rename_axis(table.index.name or 'label').reset_index()
+    return json.loads(table.to_json(orient='records', date_format='iso'))
+
+
+# ============================================================================
+# Per-chart statistics
+# ============================================================================
+def match_volume_trends(data, start=None, end=None):
+    """Chart 1: matches played per year."""
+    start, end = parse_date_range(start, end)
+    if _whole_years(start, end) is None:
+        return volume_table(date_index(data).by_year(start, end))
+    return volume_table(range_cube(data, start, end).rollup(['year']))
+
+
+def home_advantage(data, start=None, end=None):
+    """Chart 2: outcome split for matches not played at a neutral venue."""
+    start, end = parse_date_range(start, end)
+    if _whole_years(start, end) is None:
+        totals = date_index(data).totals(start, end)
+        return home_outcome_table([totals['venue_home_wins'], totals['venue_draws'],
+                                   totals['venue_away_wins']])
+    outcomes = range_cube(data, start, end).rollup(['outcome'], neutral=False)
+    return home_outcome_table(outcomes['matches'].reindex(OUTCOMES, fill_value=0).values)
+
+
+def tournament_type_performance(data, facet='category', start=None, end=None):
+    """Chart 3: match counts and average goals per tournament type (see tournament_taxonomy.json)."""
+    return tournament_type_table(range_cube(data, start, end), tournament_taxonomy(data), facet)
+
+
+def top_teams_win_rate(data, min_matches=50, top_n=15, start=None, end=None):
+    """Chart 4: best win rates among teams with at least min_matches."""
+    records = team_records(team_matches(date_window(data, start, end)), min_matches=min_matches)
+    team_stats = pd.DataFrame({
+        'Team': records.index,
+        'Total Matches': records['matches'].values,
+        'Wins': records['wins'].values,
+        'Win Rate (%)': (records['wins'] / records['matches'] * 100).round(1).values
+    })
+    team_performance = team_stats.sort_values('Win Rate (%)', ascending=False).head(top_n)
+    return team_performance.reset_index(drop=True)
+
+
+def goal_timing(data, start=None, end=None):
+    """Chart 5: goals per match minute, with estimated stoppage-time goals."""
+    return minute_profile(minute_histogram(date_window(data, start, end)['goalscorers']['minute']))
+
+
+def shootout_success(data, min_shootouts=5, top_n=15, start=None, end=None):
+    """Chart 6: best shootout win rates among teams with at least min_shootouts."""
+    records = shootout_records(team_shootouts(date_window(data, start, end)),
+                               min_shootouts=min_shootouts)
+    shootout_stats = pd.DataFrame({
+        'Team': records.index,
+        'Shootouts': records['shootouts'].values,
+        'Wins': records['wins'].values,
+        'Win Rate (%)': (records['wins'] / records['shootouts'] * 100).round(1).values
+    })
+    shootout_performance = shootout_stats.sort_values('Win Rate (%)', ascending=False).head(top_n)
+    return shootout_performance.reset_index(drop=True)
+
+
+def scoring_evolution(data, min_matches=100, start=None, end=None):
+    """Chart 7: average goals per match by decade, sparse decades dropped."""
+    start, end = parse_date_range(start, end)
+    if _whole_years(start, end) is None:
+        return decade_table(date_index(data).by_year(start, end, step=10), min_matches)
+    return decade_table(cube_decades(range_cube(data, start, end)), min_matches)
+
+
+def tournament_frequency(data, top_n=15, start=None, end=None):
+    """Chart 8: most frequent tournaments."""
+    return tournament_frequency_table(range_cube(data, start, end), top_n)
+
+
+def neutral_venue_impact(data, start=None, end=None):
+    """Chart 9: match counts and average goals, home/away vs neutral venue."""
+    start, end = parse_date_range(start, end)
+    if _whole_years(start, end) is None:
+        totals = date_index(data).totals(start, end)
+        return venue_table([totals['matches'] - totals['neutral_matches'], totals['neutral_matches']],
+                           [totals['goals'] - totals['neutral_goals'], totals['neutral_goals']])
+    return venue_table(*cube_venues(range_cube(data, start, end)))
+
+
+def goal_scoring_methods(data, start=None, end=None):
+    """Chart 10: open play vs penalty vs own goal split."""
+    goalscorers = date_window(data, start, end)['goalscorers']
+    goal_methods = pd.DataFrame({
+        'Method': ['Open Play', 'Penalty Kick', 'Own Goal'],
+        'Goals': [
+            len(goalscorers[(goalscorers['penalty'] == False) & (goalscorers['own_goal'] == False)]),
+            len(goalscorers[goalscorers['penalty'] == True]),
+            len(goalscorers[goalscorers['own_goal'] == True])
+        ]
+    })
+    goal_methods['Percentage'] = (goal_methods['Goals'] / goal_methods['Goals'].sum() * 100).round(1)
+    return goal_methods
+
+
+def top_goal_scorers(data, top_n=20, start=None, end=None):
+    """Chart 11: all-time leading scorers, own goals excluded."""
+    leaders = scorer_index(data, start, end).leaderboard(top_n=top_n)
+    return pd.Series(leaders['goals'].values, index=pd.Index(leaders['scorer'].values, name='scorer'),
+                     name='count')
+
+
+def match_intensity(data, start=None, end=None):
+    """Chart 12: matches by final goal difference band."""
+    return intensity_table(range_cube(data, start, end))
+
+
+def top_rated_teams(data, top_n=15, active_years=4, start=None, end=None):
+    """Chart 13: strongest active teams by Elo rating at the end of the date range.
+
+    Ratings always come from the full match history; start only narrows the
+    teams shown to those that played on or after it.
+    """
+    start, end = parse_date_range(start, end)
+    history = elo_ratings(data).history()
+    as_of = data['results']['date'].max()
+    if end is not None:
+        as_of = min(as_of, end)
+    return rated_teams_table(history, as_of, top_n, active_years, since=start)
+
+
+def top_rivalries(data, top_n=15, start=None, end=None):
+    """Chart 14: most-played fixtures with their win/draw split."""
+    return rivalries_table(head_to_head(date_window(data, start, end)), top_n)
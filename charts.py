@@ -0,0 +1,210 @@
+"""
+Football Match Analysis - Chart Registry
+Maps every chart to its statistics function, renderer and output file
+"""
+
+import importlib
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import chart_stats
+import tracing
+
+Chart = namedtuple('Chart', ['id', 'filename', 'title', 'summary', 'compute', 'render',
+                             'inputs', 'params'])
+
+CHARTS = {}
+
+# Accepted by every chart's compute function on top of its own params
+DATE_RANGE_PARAMS = ('start', 'end')
+
+
+def register(chart_id, filename, title, summary, compute, render, inputs, **params):
+    """Add a chart to the registry.
+
+    render names a function in chart_render, which is only imported when a
+    chart is actually drawn. inputs maps each dataset to the source columns
+    the chart reads (used by the incremental build manifest); params are the
+    compute defaults.
+    """
+    CHARTS[chart_id] = Chart(chart_id, filename, title, summary, compute, render, inputs, params)
+
+
+register('01', '01_match_volume_trends.png', 'Match Volume Trends',
+         'Match Volume Trends - Market growth analysis',
+         chart_stats.match_volume_trends, 'render_match_volume_trends',
+         {'results': ['date']})
+register('02', '02_home_advantage_value.png', 'Home Advantage Analysis',
+         'Home Advantage Value - Strategic venue insights',
+         chart_stats.home_advantage, 'render_home_advantage',
+         {'results': ['home_score', 'away_score', 'neutral']})
+register('03', '03_tournament_type_performance.png', 'Tournament Performance Analysis',
+         'Tournament Performance - Competitive vs friendly analysis',
+         chart_stats.tournament_type_performance, 'render_tournament_type_performance',
+         {'results': ['date', 'home_score', 'away_score', 'tournament']},
+         facet='category')
+register('04', '04_top_teams_win_rate.png', 'Top Performing Teams',
+         'Top Teams Win Rate - Market leaders identification',
+         chart_stats.top_teams_win_rate, 'render_top_teams_win_rate',
+         {'results': ['home_team', 'away_team', 'home_score', 'away_score']},
+         min_matches=50, top_n=15)
+register('05', '05_goal_timing_patterns.png', 'Goal Timing Analysis',
+         'Goal Timing Patterns - Goals per minute with stoppage-time estimates',
+         chart_stats.goal_timing, 'render_goal_timing',
+         {'goalscorers': ['minute']})
+register('06', '06_shootout_success_rates.png', 'Shootout Performance',
+         'Shootout Success Rates - High-pressure performance',
+         chart_stats.shootout_success, 'render_shootout_success',
+         {'shootouts': ['home_team', 'away_team', 'winner']},
+         min_shootouts=5, top_n=15)
+register('07', '07_scoring_evolution.png', 'Scoring Trends Evolution',
+         'Scoring Evolution - Game dynamics over time',
+         chart_stats.scoring_evolution, 'render_scoring_evolution',
+         {'results': ['date', 'home_score', 'away_score']},
+         min_matches=100)
+register('08', '08_tournament_frequency.png', 'Tournament Frequency Analysis',
+         'Tournament Frequency - Market segmentation',
+         chart_stats.tournament_frequency, 'render_tournament_frequency',
+         {'results': ['tournament']},
+         top_n=15)
+register('09', '09_neutral_venue_impact.png', 'Neutral Venue Impact',
+         'Neutral Venue Impact - Event hosting strategy',
+         chart_stats.neutral_venue_impact, 'render_neutral_venue_impact',
+         {'results': ['date', 'home_score', 'away_score', 'neutral']})
+register('10', '10_goal_scoring_methods.png', 'Goal Scoring Methods',
+         'Goal Scoring Methods - Scoring approach analysis',
+         chart_stats.goal_scoring_methods, 'render_goal_scoring_methods',
+         {'goalscorers': ['own_goal', 'penalty']})
+register('11', '11_top_goal_scorers.png', 'Top Scorers Analysis',
+         'Top Goal Scorers - Star player impact',
+         chart_stats.top_goal_scorers, 'render_top_goal_scorers',
+         {'goalscorers': ['scorer', 'own_goal']},
+         top_n=20)
+register('12', '12_match_intensity_distribution.png', 'Match Intensity Analysis',
+         'Match Intensity Distribution - Competitive balance',
+         chart_stats.match_intensity, 'render_match_intensity',
+         {'results': ['home_score', 'away_score']})
+register('13', '13_top_teams_elo_rating.png', 'Elo Team Ratings',
+         'Top Teams by Elo Rating - Current team strength',
+         chart_stats.top_rated_teams, 'render_top_rated_teams',
+         {'results': ['date', 'home_team', 'away_team', 'home_score', 'away_score', 'tournament',
+                      'neutral']},
+         top_n=15, active_years=4)
+register('14', '14_top_rivalries.png', 'Top Rivalries',
+         'Top Rivalries - Most-played fixtures and their head-to-head records',
+         chart_stats.top_rivalries, 'render_top_rivalries',
+         {'results': ['home_team', 'away_team', 'home_score', 'away_score', 'neutral'],
+          'shootouts': ['home_team', 'away_team', 'winner']},
+         top_n=15)
+
+
+def parse_chart_ids(selector):
+    """Turn '4,06' into ['04', '06']; None selects every chart."""
+    if not selector:
+        return list(CHARTS)
+    chart_ids = []
+    for token in selector.split(','):
+        token = token.strip()
+        if not token:
+            continue
+        chart_id = f'{int(token):02d}' if token.isdigit() else token
+        if chart_id not in CHARTS:
+            raise ValueError(f"Unknown chart '{token}' (available: {', '.join(CHARTS)})")
+        chart_ids.append(chart_id)
+    return chart_ids
+
+
+def compute_chart(chart_id, data, **params):
+    """Statistics table behind one chart."""
+    chart = CHARTS[chart_id]
+    with tracing.span(f'compute:{chart_id}', 'compute'):
+        return chart.compute(data, **dict(chart.params, **params))
+
+
+# Seconds spent importing matplotlib/seaborn, None until the first render
+PLOTTING_IMPORT_SECONDS = None
+
+
+def renderer(chart_id):
+    """Resolve a chart's render function, importing the plotting stack on first use."""
+    global PLOTTING_IMPORT_SECONDS
+    if PLOTTING_IMPORT_SECONDS is None:
+        start = time.perf_counter()
+        importlib.import_module('chart_render')
+        PLOTTING_IMPORT_SECONDS = time.perf_counter() - start
+    return getattr(importlib.import_module('chart_render'), CHARTS[chart_id].render)
+
+
+def render_chart(chart_id, stats, output_dir='charts'):
+    """Render one chart from its statistics table and return the file path."""
+    path = Path(output_dir) / CHARTS[chart_id].filename
+    render = renderer(chart_id)
+    with tracing.span(f'render:{chart_id}', 'render'):
+        render(stats, path)
+    return path
+
+
+def _render_in_worker(chart_id, stats, output_dir, trace_origin):
+    """Pool entry point: render one chart and return its path and trace spans."""
+    if trace_origin is not None:
+        tracing.enable(trace_origin)
+    path = render_chart(chart_id, stats, output_dir)
+    return path, tracing.drain_events()
+
+
+def compute_tables(chart_ids, data, start=None, end=None):
+    """Statistics table for every selected chart, keyed by chart id.
+
+    start and end restrict every chart to the matches in that inclusive date
+    range.
+    """
+    return {chart_id: compute_chart(chart_id, data, start=start, end=end)
+            for chart_id in chart_ids}
+
+
+def chart_statistics(tables):
+    """JSON-ready document with the table behind every chart in tables."""
+    document = {}
+    for chart_id, table in tables.items():
+        chart = CHARTS[chart_id]
+        document[chart_id] = {
+            'title': chart.title,
+            'filename': chart.filename,
+            'params': chart.params,
+            'data': chart_stats.table_records(table),
+        }
+    return document
+
+
+def render_tables(tables, output_dir='charts', jobs=1):
+    """Render precomputed chart tables sequentially or in a process pool.
+
+    Workers only receive the small per-chart tables and never touch the
+    source datasets.
+    """
+    Path(output_dir).mkdir(exist_ok=True)
+    if not tables:
+        return []
+    for chart_id in tables:
+        print(f"Generating Chart {int(chart_id)}: {CHARTS[chart_id].title}...")
+
+    if jobs <= 1:
+        return [render_chart(chart_id, table, output_dir) for chart_id, table in tables.items()]
+
+    trace_origin = tracing.origin()
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tables))) as pool:
+        futures = [pool.submit(_render_in_worker, chart_id, table, output_dir, trace_origin)
+                   for chart_id, table in tables.items()]
+        paths = []
+        for future in futures:
+            path, events = future.result()
+            tracing.add_events(events)
+            paths.append(path)
+        return paths
+
+
+def render_charts(chart_ids, data, output_dir='charts', jobs=1, start=None, end=None):
+    """Compute every selected chart once in this process, then render them."""
+    return render_tables(compute_tables(chart_ids, data, start, end), output_dir, jobs)
@@ -0,0 +1,351 @@
+"""
+Football Match Analysis - Dataset Loader
+Loads the data/*.csv inputs through a typed binary columnar cache
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import tracing
+from match_index import INDEX_FILE_NAME, link_matches
+from team_names import build_alias_index, canonicalize_teams
+
+# Bump whenever the schema or on-disk layout changes so old caches are rebuilt
+CACHE_VERSION = 2
+CACHE_DIR_NAME = '.cache'
+
+# Column kinds per dataset:
+#   team     - categorical sharing one category set across all team columns
+#   category - categorical with its own category set
+#   string   - stored as codes on disk, decoded back to plain strings on load
+#   int      - smallest signed integer dtype that fits (nullable if any NaN)
+#   bool     - TRUE/FALSE flags (nullable if any value is missing or not a flag)
+#   date     - datetime64
+# Values that do not parse as their kind load as missing, for validation.py
+# to report, instead of failing the whole load.
+SCHEMAS = {
+    'results': {
+        'date': 'date',
+        'home_team': 'team',
+        'away_team': 'team',
+        'home_score': 'int',
+        'away_score': 'int',
+        'tournament': 'category',
+        'city': 'category',
+        'country': 'category',
+        'neutral': 'bool',
+    },
+    'goalscorers': {
+        'date': 'date',
+        'home_team': 'team',
+        'away_team': 'team',
+        'team': 'team',
+        'scorer': 'string',
+        'minute': 'int',
+        'own_goal': 'bool',
+        'penalty': 'bool',
+    },
+    'shootouts': {
+        'date': 'date',
+        'home_team': 'team',
+        'away_team': 'team',
+        'winner': 'team',
+        'first_shooter': 'team',
+    },
+    'former_names': {
+        'current': 'team',
+        'former': 'team',
+        'start_date': 'date',
+        'end_date': 'date',
+    },
+}
+
+
+# Spellings read as a bool column's True/False; anything else loads as missing
+FLAG_VALUES = {True: True, False: False, 'TRUE': True, 'FALSE': False,
+               'True': True, 'False': False, 'true': True, 'false': False}
+
+
+def _smallest_int_dtype(values):
+    """Smallest signed integer dtype able to hold every finite value."""
+    finite = values[~np.isnan(values)] if values.dtype.kind == 'f' else values
+    if len(finite) == 0:
+        return np.dtype(np.int8)
+    lo, hi = finite.min(), finite.max()
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _code_dtype(n_categories):
+    """Smallest integer dtype for categorical codes (with -1 for missing)."""
+    return _smallest_int_dtype(np.array([-1, n_categories]))
+
+
+def _file_signature(path):
+    stat = path.stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_dir_for(csv_path):
+    """Cache directory for a CSV, e.g. data/.cache/results/."""
+    csv_path = Path(csv_path)
+    return csv_path.parent / CACHE_DIR_NAME / csv_path.stem
+
+
+# ============================================================================
+# Cold path: parse the CSV and convert to tight dtypes
+# ============================================================================
+def parse_csv(csv_path, schema):
+    """Parse a CSV into a frame with the dtypes described by schema."""
+    raw = pd.read_csv(csv_path)
+    frame = pd.DataFrame(index=raw.index)
+
+    team_columns = [c for c, kind in schema.items() if kind == 'team' and c in raw]
+    team_dtype = None
+    if team_columns:
+        teams = pd.unique(pd.concat([raw[c] for c in team_columns], ignore_index=True).dropna())
+        team_dtype = pd.CategoricalDtype(sorted(teams))
+
+    for column in raw.columns:
+        kind = schema.get(column)
+        values = raw[column]
+        if kind == 'date':
+            frame[column] = pd.to_datetime(values, errors='coerce')
+        elif kind == 'team':
+            frame[column] = values.astype(team_dtype)
+        elif kind == 'category':
+            frame[column] = values.astype('category')
+        elif kind == 'int':
+            if not pd.api.types.is_numeric_dtype(values.dtype):
+                values = pd.to_numeric(values, errors='coerce')
+            if pd.api.types.is_float_dtype(values.dtype):
+                values = values.where(values % 1 == 0)
+            dtype = _smallest_int_dtype(values.to_numpy(dtype=float))
+            if values.isna().any():
+                frame[column] = values.astype(f'Int{dtype.itemsize * 8}')
+            else:
+                frame[column] = values.astype(dtype)
+        elif kind == 'bool':
+            if pd.api.types.is_bool_dtype(values.dtype):
+                frame[column] = values.astype(bool)
+            else:
+                frame[column] = values.map(FLAG_VALUES).astype('boolean')
+        else:
+            frame[column] = values
+    return frame
+
+
+# ============================================================================
+# Cache write / read
+# ============================================================================
+def write_cache(frame, schema, cache_dir, source_meta):
+    """Persist frame as one .npy file per column plus a meta.json manifest."""
+    if cache_dir.exists():
+        shutil.rmtree(cache_dir)
+    cache_dir.mkdir(parents=True)
+
+    columns = {}
+    for column in frame.columns:
+        kind = schema.get(column, 'raw')
+        series = frame[column]
+        entry = {'kind': kind}
+        if kind in ('team', 'category', 'string'):
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes, categories = series.cat.codes.to_numpy(), series.cat.categories
+            else:
+                codes, categories = pd.factorize(series, use_na_sentinel=True)
+            data = codes.astype(_code_dtype(len(categories)))
+            entry['categories'] = [str(c) for c in categories]
+        elif kind in ('int', 'bool') and isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+            data = series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0)
+            np.save(cache_dir / f'{column}.mask.npy', series.isna().to_numpy())
+            entry['nullable'] = True
+        elif kind == 'raw':
+            # Unknown extra column: keep it as strings
+            codes, categories = pd.factorize(series.astype(str), use_na_sentinel=True)
+            data = codes.astype(_code_dtype(len(categories)))
+            entry['kind'] = 'string'
+            entry['categories'] = [str(c) for c in categories]
+        else:
+            data = series.to_numpy()
+        np.save(cache_dir / f'{column}.npy', data, allow_pickle=False)
+        columns[column] = entry
+
+    meta = dict(source_meta, version=CACHE_VERSION, rows=len(frame), columns=columns)
+    _write_meta(cache_dir, meta)
+    return meta
+
+
+def _write_meta(cache_dir, meta):
+    tmp = cache_dir / 'meta.json.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp, cache_dir / 'meta.json')
+
+
+def read_meta(cache_dir):
+    try:
+        with open(cache_dir / 'meta.json', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_cache(cache_dir, meta):
+    """Rebuild a frame from memory-mapped .npy columns."""
+    data = {}
+    team_dtype = None
+    for column, entry in meta['columns'].items():
+        values = np.load(cache_dir / f'{column}.npy', mmap_mode='r', allow_pickle=False)
+        kind = entry['kind']
+        if kind in ('team', 'category'):
+            if kind == 'team':
+                if team_dtype is None:
+                    team_dtype = pd.CategoricalDtype(entry['categories'])
+                dtype = team_dtype
+            else:
+                dtype = pd.CategoricalDtype(entry['categories'])
+            data[column] = pd.Categorical.from_codes(np.asarray(values), dtype=dtype)
+        elif kind == 'string':
+            decoded = pd.Categorical.from_codes(np.asarray(values), entry['categories'])
+            # Let pandas infer the same string dtype read_csv would produce
+            data[column] = pd.Series(np.asarray(decoded, dtype=object))
+        elif entry.get('nullable'):
+            mask = np.load(cache_dir / f'{column}.mask.npy', allow_pickle=False)
+            array = pd.arrays.BooleanArray if kind == 'bool' else pd.arrays.IntegerArray
+            data[column] = array(np.array(values), mask)
+        else:
+            data[column] = values
+    return pd.DataFrame(data)
+
+
+# ============================================================================
+# Public entry points
+# ============================================================================
+def load_csv(csv_path, schema=None, use_cache=True, verbose=True):
+    """Load one CSV, using (and refreshing) its columnar cache.
+
+    The cache is reused when the source size and mtime match. When they do
+    not, the source is hashed and the cache is kept if the content is
+    unchanged; otherwise the CSV is parsed again and the cache rewritten.
+    """
+    csv_path = Path(csv_path)
+    with tracing.span(f'load:{csv_path.name}', 'load'):
+        return _load_csv(csv_path, schema, use_cache, verbose)
+
+
+def _load_csv(csv_path, schema, use_cache, verbose):
+    schema = SCHEMAS.get(csv_path.stem, {}) if schema is None else schema
+
+    if not use_cache:
+        start = time.perf_counter()
+        frame = parse_csv(csv_path, schema)
+        if verbose:
+            print(f"  {csv_path.name}: parsed in {time.perf_counter() - start:.3f}s (cache disabled)")
+        return frame
+
+    cache_dir = cache_dir_for(csv_path)
+    signature = _file_signature(csv_path)
+    meta = read_meta(cache_dir)
+    valid = meta is not None and meta.get('version') == CACHE_VERSION
+    if valid and (meta['size'], meta['mtime_ns']) != (signature['size'], signature['mtime_ns']):
+        valid = meta['size'] == signature['size'] and meta['sha256'] == _file_hash(csv_path)
+        if valid:
+            meta.update(signature)
+            _write_meta(cache_dir, meta)
+
+    if valid:
+        start = time.perf_counter()
+        frame = read_cache(cache_dir, meta)
+        elapsed = time.perf_counter() - start
+        if verbose:
+            speedup = meta['parse_seconds'] / elapsed if elapsed > 0 else float('inf')
+            print(f"  {csv_path.name}: warm load {elapsed:.3f}s "
+                  f"(cold parse {meta['parse_seconds']:.3f}s, {speedup:.1f}x faster)")
+        return frame
+
+    start = time.perf_counter()
+    frame = parse_csv(csv_path, schema)
+    elapsed = time.perf_counter() - start
+    source_meta = dict(signature, sha256=_file_hash(csv_path), parse_seconds=elapsed)
+    write_cache(frame, schema, cache_dir, source_meta)
+    if verbose:
+        print(f"  {csv_path.name}: cold parse {elapsed:.3f}s (cache written to {cache_dir})")
+    return frame
+
+
+def load_alias_index(data_dir='data', use_cache=True, verbose=True):
+    """Alias intervals from former_names.csv, or None when the file is absent."""
+    path = Path(data_dir) / 'former_names.csv'
+    if not path.exists():
+        return None
+    return build_alias_index(load_csv(path, use_cache=use_cache, verbose=verbose))
+
+
+def source_fingerprint(data_dir='data', names=('results', 'goalscorers', 'shootouts')):
+    """sha256 of each CSV as recorded by its typed cache (None where there is no cache).
+
+    load_csv re-checks the hash whenever a file's size or mtime changes, so
+    after a cached load this identifies the file contents without reading them.
+    """
+    data_dir = Path(data_dir)
+    return {name: (read_meta(cache_dir_for(data_dir / f'{name}.csv')) or {}).get('sha256')
+            for name in names}
+
+
+def load_datasets(data_dir='data', use_cache=True, verbose=True, canonicalize=True, link=True):
+    """Load results, goalscorers and shootouts with typed columns.
+
+    With canonicalize, team columns are rewritten to each team's current
+    name for the match date using former_names.csv. With link, every frame
+    gets an integer match_id column (row number in results, -1 when a goal
+    or shootout row has no matching result); the join is persisted in
+    data/.cache/match_index.npz.
+    """
+    data_dir = Path(data_dir)
+    names = ('results', 'goalscorers', 'shootouts')
+    frames = tuple(
+        load_csv(data_dir / f'{name}.csv', use_cache=use_cache, verbose=verbose)
+        for name in names
+    )
+    alias_index = load_alias_index(data_dir, use_cache, verbose) if canonicalize else None
+    if alias_index is not None:
+        with tracing.span('canonicalize_teams', 'load'):
+            for frame in frames:
+                canonicalize_teams(frame, alias_index)
+    if link:
+        index_path, fingerprint = None, None
+        if use_cache:
+            sources = list(names) + (['former_names'] if alias_index is not None else [])
+            fingerprint = source_fingerprint(data_dir, sources)
+            index_path = data_dir / CACHE_DIR_NAME / INDEX_FILE_NAME
+        with tracing.span('link_matches', 'load'):
+            link_matches(*frames, index_path=index_path, fingerprint=fingerprint, verbose=verbose)
+    return frames
+
+
+if __name__ == '__main__':
+    # Report cold parse vs warm cache load for each dataset
+    for name in SCHEMAS:
+        path = Path('data') / f'{name}.csv'
+        shutil.rmtree(cache_dir_for(path), ignore_errors=True)
+        load_csv(path)
+        load_csv(path)
@@ -0,0 +1,155 @@
+"""
+Football Match Analysis - Date Range Index
+Date-sorted match index with prefix sums, so any date range is two binary
+searches plus a subtraction
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from features import FeatureSet
+
+# Running totals kept per match; every range query is cum[hi] - cum[lo]
+FIELDS = [
+    'matches', 'goals', 'home_wins', 'draws', 'away_wins',
+    'neutral_matches', 'neutral_goals',
+    'venue_home_wins', 'venue_draws', 'venue_away_wins',
+]
+FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+# Year-only and year-month spellings, and the period each one names
+PARTIAL_DATES = ((re.compile(r'\d{4}'), 'Y'), (re.compile(r'\d{4}-\d{1,2}'), 'M'))
+
+
+def parse_date_range(start=None, end=None):
+    """Normalize an inclusive (start, end) pair; empty values leave that side open.
+
+    Accepts anything pandas parses ('2000', '2018-06-14', a Timestamp) and
+    raises ValueError for unparseable or inverted ranges. A year ('2009') or
+    month ('2009-06') names the whole period, so as an end it means the
+    period's last day.
+    """
+    bounds = []
+    for name, value in (('start', start), ('end', end)):
+        if value is None or value == '':
+            bounds.append(None)
+            continue
+        try:
+            bound = pd.Timestamp(value).normalize()
+            if name == 'end' and isinstance(value, str):
+                for pattern, freq in PARTIAL_DATES:
+                    if pattern.fullmatch(value.strip()):
+                        bound = pd.Period(bound, freq=freq).end_time.normalize()
+            bounds.append(bound)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid {name} date: {value!r}")
+    if bounds[0] is not None and bounds[1] is not None and bounds[0] > bounds[1]:
+        raise ValueError(f"Date range starts after it ends: {start} > {end}")
+    return tuple(bounds)
+
+
+def _day_numbers(dates):
+    return np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+
+
+def _year_starts(first_year, last_year, step=1):
+    years = np.arange(first_year, last_year + 1, step)
+    return (years - 1970).astype('datetime64[Y]').astype('datetime64[D]').astype(np.int64), years
+
+
+class DateIndex:
+    """Matches sorted by date with cumulative totals of FIELDS.
+
+    order maps sorted positions back to rows of the source frame, days holds
+    the sorted dates as day numbers and cum has one more row than there are
+    matches (row 0 is all zeros), so the totals for sorted positions
+    [lo, hi) are cum[hi] - cum[lo].
+    """
+
+    def __init__(self, order, days, cum):
+        self.order = order
+        self.days = days
+        self.cum = cum
+
+    @classmethod
+    def build(cls, results, features=None):
+        """Index results; outcomes and goals come from features (a FeatureSet over results)."""
+        if features is None:
+            features = FeatureSet(results)
+        order = np.argsort(results['date'].to_numpy(), kind='stable')
+        goals = features['total_goals'].to_numpy(np.int64)[order]
+        home_wins = features['home_win'].to_numpy()[order]
+        draws = features['draw'].to_numpy()[order]
+        away_wins = features['away_win'].to_numpy()[order]
+        neutral = results['neutral'].to_numpy(bool)[order]
+        venue = ~neutral
+        columns = {
+            'matches': np.ones(len(order), dtype=np.int64),
+            'goals': goals,
+            'home_wins': home_wins,
+            'draws': draws,
+            'away_wins': away_wins,
+            'neutral_matches': neutral,
+            'neutral_goals': np.where(neutral, goals, 0),
+            'venue_home_wins': venue & home_wins,
+            'venue_draws': venue & draws,
+            'venue_away_wins': venue & away_wins,
+        }
+        values = np.column_stack([columns[name] for name in FIELDS]).astype(np.int64)
+        cum = np.zeros((len(order) + 1, len(FIELDS)), dtype=np.int64)
+        np.cumsum(values, axis=0, out=cum[1:])
+        return cls(order, _day_numbers(results['date'].to_numpy()[order]), cum)
+
+    def __len__(self):
+        return len(self.order)
+
+    @property
+    def first_date(self):
+        return pd.Timestamp(self.days[0], unit='D') if len(self) else None
+
+    @property
+    def last_date(self):
+        return pd.Timestamp(self.days[-1], unit='D') if len(self) else None
+
+    def bounds(self, start=None, end=None):
+        """Sorted positions [lo, hi) of the matches played from start to end inclusive."""
+        lo = 0 if start is None else int(np.searchsorted(self.days, _day_numbers(start)))
+        hi = len(self) if end is None else int(np.searchsorted(self.days, _day_numbers(end),
+                                                             side='right'))
+        return lo, max(lo, hi)
+
+    def covers(self, start=None, end=None):
+        """Whether the range includes every match."""
+        return self.bounds(start, end) == (0, len(self))
+
+    def rows(self, start=None, end=None):
+        """Boolean mask over the source frame's rows for the matches in the range."""
+        lo, hi = self.bounds(start, end)
+        mask = np.zeros(len(self), dtype=bool)
+        mask[self.order[lo:hi]] = True
+        return mask
+
+    def totals(self, start=None, end=None):
+        """FIELDS totals over the range as a name -> int dict."""
+        lo, hi = self.bounds(start, end)
+        return dict(zip(FIELDS, (self.cum[hi] - self.cum[lo]).tolist()))
+
+    def by_year(self, start=None, end=None, step=1):
+        """FIELDS totals per calendar year (or per step-year bucket) within the range.
+
+        Buckets are aligned to multiples of step (step=10 gives decades) and
+        the ones without matches are dropped, like a groupby would.
+        """
+        lo, hi = self.bounds(start, end)
+        if lo == hi:
+            return pd.DataFrame(columns=FIELDS, dtype=np.int64)
+        first = pd.Timestamp(self.days[lo], unit='D').year // step * step
+        last = pd.Timestamp(self.days[hi - 1], unit='D').year
+        edges, years = _year_starts(first, last, step)
+        positions = np.clip(np.searchsorted(self.days, edges), lo, hi)
+        positions = np.append(positions, hi)
+        positions[0] = lo
+        sums = self.cum[positions[1:]] - self.cum[positions[:-1]]
+        table = pd.DataFrame(sums, index=years, columns=FIELDS)
+        return table[table['matches'] > 0]
@@ -0,0 +1,281 @@
+"""
+Football Match Analysis - Elo Team Ratings
+Single chronological pass over integer-coded match arrays with checkpointed
+incremental updates and a compact (team x date) rating history
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from aggregation import digest, intern_codes, row_hashes
+
+INITIAL_RATING = 1500.0
+HOME_ADVANTAGE = 100.0
+
+# K-factor by tournament weight (World Football Elo convention)
+K_WORLD_CUP = 60
+K_CONTINENTAL_FINALS = 50
+K_QUALIFIERS = 40
+K_OTHER_TOURNAMENT = 30
+K_FRIENDLY = 20
+CONTINENTAL_FINALS = ['UEFA Euro', 'Copa América', 'African Cup of Nations', 'AFC Asian Cup',
+                      'Gold Cup', 'CONCACAF Championship', 'Oceania Nations Cup',
+                      'Confederations Cup', 'UEFA Nations League', 'CONCACAF Nations League']
+
+RATING_COLUMNS = ['date', 'home_team', 'away_team', 'home_score', 'away_score', 'tournament',
+                  'neutral']
+
+
+def tournament_k(tournament):
+    """K-factor for one tournament name."""
+    name = str(tournament)
+    if 'qualification' in name:
+        return K_QUALIFIERS
+    if name == 'FIFA World Cup':
+        return K_WORLD_CUP
+    if name in CONTINENTAL_FINALS:
+        return K_CONTINENTAL_FINALS
+    if name == 'Friendly':
+        return K_FRIENDLY
+    return K_OTHER_TOURNAMENT
+
+
+def _k_factors(tournaments):
+    """Per-row K-factors, evaluating the rule once per distinct tournament."""
+    codes, uniques = pd.factorize(tournaments)
+    weights = np.array([tournament_k(t) for t in uniques], dtype=np.float64)
+    return weights[codes]
+
+
+def _goal_multiplier(goal_difference):
+    """1 for a one-goal margin, 1.5 for two, (11 + N) / 8 for three or more."""
+    margin = np.abs(goal_difference).astype(np.float64)
+    return np.where(margin <= 1, 1.0, np.where(margin == 2, 1.5, (11.0 + margin) / 8.0))
+
+
+def _day_numbers(dates):
+    return pd.to_datetime(dates).to_numpy().astype('datetime64[D]').astype(np.int32)
+
+
+def _day_number(date):
+    return int(np.datetime64(pd.Timestamp(date), 'D').astype(np.int64))
+
+
+class RatingHistory:
+    """Post-match ratings stored per team in date order (CSR layout).
+
+    offsets[i]:offsets[i + 1] slices the days and ratings of team i. Every
+    event also gets a composite (team, day) key, so "rating of X on date D"
+    is a single binary search and a whole-league snapshot is one vectorized
+    searchsorted. A history that only holds each team's latest event sets
+    valid_from to the last match day and refuses earlier dates.
+    """
+
+    def __init__(self, teams, event_teams, event_days, event_ratings, valid_from=None):
+        self.teams = list(teams)
+        self.valid_from = valid_from
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+        order = np.lexsort((np.arange(len(event_teams)), event_teams))
+        counts = np.bincount(event_teams, minlength=len(self.teams))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.event_teams = event_teams[order].astype(np.int64)
+        self.days = event_days[order]
+        self.ratings = event_ratings[order]
+        self.keys = self._keys(self.event_teams, self.days)
+
+    @staticmethod
+    def _keys(teams, days):
+        return (np.asarray(teams, dtype=np.int64) << 32) + (np.asarray(days, dtype=np.int64) + (1 << 31))
+
+    def _lookup(self, codes, day):
+        if self.valid_from is not None and day < self.valid_from:
+            raise ValueError('This rating history only covers dates from its last match day on')
+        pos = np.searchsorted(self.keys, self._keys(codes, np.full(len(codes), day)), side='right') - 1
+        found = (pos >= 0) & (self.event_teams[np.maximum(pos, 0)] == codes)
+        return pos, found
+
+    def rating(self, team, date):
+        """Rating of team after its last match on or before date."""
+        i = self.team_index.get(team)
+        if i is None:
+            raise KeyError(f"Unknown team '{team}'")
+        pos, found = self._lookup(np.array([i]), _day_number(date))
+        return float(self.ratings[pos[0]]) if found[0] else INITIAL_RATING
+
+    def ratings_on(self, date):
+        """Every team's rating on date, with the day of its latest match (NaT if none)."""
+        pos, found = self._lookup(np.arange(len(self.teams)), _day_number(date))
+        safe = np.maximum(pos, 0)
+        ratings = np.where(found, self.ratings[safe], INITIAL_RATING)
+        last_match = np.where(found, self.days[safe].astype('datetime64[D]'), np.datetime64('NaT'))
+        return pd.DataFrame({'rating': ratings, 'last_match': last_match},
+                            index=pd.Index(self.teams, name='team'))
+
+
+class EloEngine:
+    """Running Elo state: one float64 rating per integer team code."""
+
+    def __init__(self, initial_rating=INITIAL_RATING, home_advantage=HOME_ADVANTAGE):
+        self.initial_rating = initial_rating
+        self.home_advantage = home_advantage
+        self.teams = []
+        self.team_index = {}
+        self.ratings = np.empty(0, dtype=np.float64)
+        self.matches = 0
+        self.last_day = None
+        self._event_teams = []
+        self._event_days = []
+        self._event_ratings = []
+
+    def params(self):
+        return {'initial_rating': self.initial_rating, 'home_advantage': self.home_advantage,
+                'k': [K_WORLD_CUP, K_CONTINENTAL_FINALS, K_QUALIFIERS, K_OTHER_TOURNAMENT,
+                      K_FRIENDLY, CONTINENTAL_FINALS]}
+
+    def team_codes(self, names):
+        """Integer codes for team names, registering unseen teams."""
+        codes, new = intern_codes(self.teams, names)
+        if len(new):
+            first = len(self.teams) - len(new)
+            self.team_index.update((team, first + i) for i, team in enumerate(new))
+            self.ratings = np.concatenate([self.ratings, np.full(len(new), self.initial_rating)])
+        return codes
+
+    def update(self, matches):
+        """Rate matches (already in chronological order) and record the history."""
+        if len(matches) == 0:
+            return self
+        home = self.team_codes(matches['home_team'])
+        away = self.team_codes(matches['away_team'])
+        days = _day_numbers(matches['date'])
+        goal_difference = (matches['home_score'].to_numpy(dtype=np.float64) -
+                           matches['away_score'].to_numpy(dtype=np.float64))
+        result = np.sign(goal_difference) * 0.5 + 0.5
+        weight = _k_factors(matches['tournament']) * _goal_multiplier(goal_difference)
+        advantage = np.where(matches['neutral'].to_numpy(dtype=bool), 0.0, self.home_advantage)
+
+        # The only sequential part: each match reads ratings written by earlier ones.
+        # Plain Python lists keep the per-match cost to a few scalar operations.
+        ratings = self.ratings.tolist()
+        home_list, away_list = home.tolist(), away.tolist()
+        home_after = [0.0] * len(home_list)
+        away_after = [0.0] * len(home_list)
+        for n, (h, a, w, adv, res) in enumerate(zip(home_list, away_list, weight.tolist(),
+                                                    advantage.tolist(), result.tolist())):
+            if res != res:  # missing score: ratings unchanged
+                home_after[n], away_after[n] = ratings[h], ratings[a]
+                continue
+            expected = 1.0 / (10.0 ** ((ratings[a] - ratings[h] - adv) / 400.0) + 1.0)
+            change = w * (res - expected)
+            ratings[h] += change
+            ratings[a] -= change
+            home_after[n], away_after[n] = ratings[h], ratings[a]
+        self.ratings = np.asarray(ratings, dtype=np.float64)
+
+        # One event per side, interleaved so events stay in match order
+        self._record(np.column_stack([home, away]).ravel().astype(np.int32), np.repeat(days, 2),
+                     np.column_stack([home_after, away_after]).ravel().astype(np.float32))
+        self.matches += len(matches)
+        self.last_day = int(days[-1])
+        return self
+
+    def _record(self, teams, days, ratings):
+        """Keep the post-match rating events of one update for history()."""
+        self._event_teams.append(teams)
+        self._event_days.append(days)
+        self._event_ratings.append(ratings)
+
+    def _events(self):
+        if len(self._event_teams) > 1:
+            self._event_teams = [np.concatenate(self._event_teams)]
+            self._event_days = [np.concatenate(self._event_days)]
+            self._event_ratings = [np.concatenate(self._event_ratings)]
+        if not self._event_teams:
+            return (np.empty(0, np.int32), np.empty(0, np.int32), np.empty(0, np.float32))
+        return self._event_teams[0], self._event_days[0], self._event_ratings[0]
+
+    def history(self):
+        """Compact (team x date) rating history for point-in-time lookups."""
+        return RatingHistory(self.teams, *self._events())
+
+    def current(self):
+        """Latest rating per team, highest first."""
+        return pd.Series(self.ratings, index=pd.Index(self.teams, name='team'),
+                         name='rating').sort_values(ascending=False, kind='stable')
+
+    # ------------------------------------------------------------------
+    # Checkpoints
+    # ------------------------------------------------------------------
+    def _history_arrays(self):
+        teams, days, ratings = self._events()
+        return {'event_teams': teams, 'event_days': days, 'event_ratings': ratings}
+
+    def _restore_history(self, saved):
+        self._event_teams = [saved['event_teams']]
+        self._event_days = [saved['event_days']]
+        self._event_ratings = [saved['event_ratings']]
+
+    def save(self, path, prefix_hash):
+        meta = {'params': self.params(), 'matches': self.matches, 'last_day': self.last_day,
+                'prefix_hash': prefix_hash}
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp.npz')
+        np.savez(tmp, teams=np.array(self.teams, dtype=str), ratings=self.ratings,
+                 meta=np.array(json.dumps(meta, ensure_ascii=False)), **self._history_arrays())
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        """Restore an engine and its metadata, or (None, None) if unreadable."""
+        try:
+            with np.load(path, allow_pickle=False) as saved:
+                meta = json.loads(str(saved['meta']))
+                engine = cls(meta['params']['initial_rating'], meta['params']['home_advantage'])
+                engine.teams = saved['teams'].tolist()
+                engine.team_index = {team: i for i, team in enumerate(engine.teams)}
+                engine.ratings = saved['ratings']
+                engine._restore_history(saved)
+        except (OSError, KeyError, ValueError):
+            return None, None
+        engine.matches = meta['matches']
+        engine.last_day = meta['last_day']
+        return engine, meta
+
+
+def chronological(results):
+    """Results in date order; ties keep file order so appends stay at the end."""
+    order = np.argsort(results['date'].to_numpy(), kind='stable')
+    return results.iloc[order]
+
+
+def update_ratings(results, checkpoint_path=None, verbose=False):
+    """Elo ratings for results, resuming from a checkpoint when possible.
+
+    The checkpoint is reused when its parameters match and the first N
+    chronological rows are unchanged; only the rows after N are rated.
+    Anything else (edited history, back-dated inserts) triggers a full pass.
+    """
+    matches = chronological(results)
+    engine, meta = None, None
+    if checkpoint_path and Path(checkpoint_path).exists():
+        engine, meta = EloEngine.load(checkpoint_path)
+    hashes = row_hashes(matches, RATING_COLUMNS) if checkpoint_path else None
+    if engine is not None:
+        done = meta['matches']
+        if (meta['params'] != json.loads(json.dumps(EloEngine().params())) or done > len(matches)
+                or digest(hashes[:done]) != meta['prefix_hash']):
+            engine = None
+    if engine is None:
+        engine, done = EloEngine(), 0
+
+    engine.update(matches.iloc[done:])
+    if verbose:
+        print(f"  Elo ratings: {len(matches) - done} new match(es) rated, "
+              f"{done} reused from checkpoint")
+    if checkpoint_path and len(matches) > done:
+        engine.save(checkpoint_path, digest(hashes))
+    return engine
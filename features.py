@@ -0,0 +1,202 @@
+"""
+Football Match Analysis - Feature Layer
+Derived match columns declared once and computed on first access with compact dtypes
+"""
+
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import tracing
+from tournament_taxonomy import DEFAULT_TAXONOMY, load_taxonomy
+
+OUTCOMES = ['Home Win', 'Draw', 'Away Win']
+INTENSITY_ORDER = ['Highly Competitive (0-1 goal diff)', 'Moderate (2-3 goal diff)',
+                   'Decisive (4+ goal diff)']
+# Smallest goal difference of each band after the first
+INTENSITY_EDGES = [2, 4]
+
+Feature = namedtuple('Feature', ['name', 'description', 'compute'])
+
+FEATURES = {}
+
+
+def feature(name, description):
+    """Declare a derived column.
+
+    The decorated compute(features) returns one value per row of
+    features.frame. It may read other features as features[name]; they
+    are computed first when needed.
+    """
+    def decorator(compute):
+        FEATURES[name] = Feature(name, description, compute)
+        return compute
+    return decorator
+
+
+def compact_ints(values):
+    """Integer values in the narrowest signed dtype that holds them; other dtypes unchanged."""
+    values = np.asarray(values)
+    if values.dtype.kind not in 'iu' or len(values) == 0:
+        return values
+    low, high = int(values.min()), int(values.max())
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    return values.astype(np.int64)
+
+
+def decade_of(years):
+    """First year of the decade of each year, e.g. 1990 for 1994."""
+    return years // 10 * 10
+
+
+def intensity_codes(goal_difference):
+    """Index into INTENSITY_ORDER for each absolute goal difference (-1 when unknown)."""
+    goal_difference = np.asarray(goal_difference, dtype=np.float64)
+    codes = np.digitize(goal_difference, INTENSITY_EDGES).astype(np.int8)
+    codes[np.isnan(goal_difference)] = -1
+    return codes
+
+
+# ============================================================================
+# Derived columns of results
+# ============================================================================
+@feature('year', 'calendar year of the match')
+def _year(features):
+    dates = features.frame['date']
+    # Chunks read by the streaming path still hold the dates as text
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates)
+    return compact_ints(dates.dt.year.to_numpy())
+
+
+@feature('decade', 'first year of the match decade, e.g. 1990')
+def _decade(features):
+    return decade_of(features['year'].to_numpy())
+
+
+@feature('outcome', 'Home Win, Draw or Away Win')
+def _outcome(features):
+    home = features.frame['home_score'].to_numpy(dtype=np.float64)
+    away = features.frame['away_score'].to_numpy(dtype=np.float64)
+    codes = np.sign(away - home) + 1
+    codes[np.isnan(codes)] = -1
+    return pd.Categorical.from_codes(codes.astype(np.int8), categories=OUTCOMES)
+
+
+@feature('home_win', 'home side scored more')
+def _home_win(features):
+    return features['outcome'].cat.codes.to_numpy() == 0
+
+
+@feature('draw', 'level score')
+def _draw(features):
+    return features['outcome'].cat.codes.to_numpy() == 1
+
+
+@feature('away_win', 'away side scored more')
+def _away_win(features):
+    return features['outcome'].cat.codes.to_numpy() == 2
+
+
+@feature('total_goals', 'goals by both sides')
+def _total_goals(features):
+    return compact_ints(features.frame['home_score'].to_numpy() +
+                        features.frame['away_score'].to_numpy())
+
+
+@feature('goal_difference', 'absolute difference between the scores')
+def _goal_difference(features):
+    return compact_ints(np.abs(features.frame['home_score'].to_numpy() -
+                               features.frame['away_score'].to_numpy()))
+
+
+@feature('tournament_category', 'competitive vs friendly, from the taxonomy category facet')
+def _tournament_category(features):
+    return load_taxonomy(features.taxonomy_path).categorize(features.frame['tournament'],
+                                                            'category')
+
+
+@feature('match_intensity', 'goal difference band (see INTENSITY_ORDER)')
+def _match_intensity(features):
+    return pd.Categorical.from_codes(intensity_codes(features['goal_difference']),
+                                     categories=INTENSITY_ORDER)
+
+
+# ============================================================================
+# Lazy feature access
+# ============================================================================
+class FeatureSet:
+    """Derived columns of a results frame, each computed on first access and kept.
+
+    The frame itself is never modified: features['decade'] is a Series
+    aligned with it. Integer features use the narrowest integer dtype that
+    fits and labels are categoricals over int8 codes.
+    """
+
+    def __init__(self, frame, taxonomy_path=DEFAULT_TAXONOMY):
+        self.frame = frame
+        self.taxonomy_path = taxonomy_path
+        self._values = {}
+        self._seconds = {}
+
+    def __getitem__(self, name):
+        values = self._values.get(name)
+        if values is not None:
+            return values
+        if name not in FEATURES:
+            raise KeyError(f"Unknown feature '{name}' (available: {', '.join(FEATURES)})")
+        with tracing.span(f'feature:{name}', 'preprocess'):
+            start = time.perf_counter()
+            values = pd.Series(FEATURES[name].compute(self), index=self.frame.index, name=name)
+            # Includes the time of any feature computed on the way
+            self._seconds[name] = time.perf_counter() - start
+        self._values[name] = values
+        return values
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def computed(self):
+        return list(self._values)
+
+    def to_frame(self, names):
+        """The given features side by side, aligned with the frame."""
+        return pd.DataFrame({name: self[name] for name in names})
+
+    def memory_summary(self):
+        """One row per computed feature: dtype, bytes held and seconds taken to compute."""
+        summary = pd.DataFrame({
+            'dtype': [str(values.dtype) for values in self._values.values()],
+            'bytes': [int(values.memory_usage(index=False, deep=True))
+                      for values in self._values.values()],
+            'seconds': [round(self._seconds[name], 6) for name in self._values],
+        }, index=pd.Index(self.computed, name='feature'))
+        return summary
+
+
+if __name__ == '__main__':
+    from data_loader import load_datasets
+
+    results, _, _ = load_datasets(verbose=False)
+    features = FeatureSet(results)
+    start = time.perf_counter()
+    for name in FEATURES:
+        features[name]
+    elapsed = time.perf_counter() - start
+    summary = features.memory_summary()
+    # What the same values take as int64 numbers and Python string objects
+    summary['as object/int64'] = [
+        int(features[name].astype(object if dtype == 'category' else
+                                  'bool' if dtype == 'bool' else np.int64)
+            .memory_usage(index=False, deep=True))
+        for name, dtype in summary['dtype'].items()]
+    print(f"{len(results):,} matches, {len(FEATURES)} features in {elapsed * 1000:.1f} ms")
+    print(summary.to_string())
+    print(f"Total: {summary['bytes'].sum() / 2**20:.2f} MB "
+          f"(vs {summary['as object/int64'].sum() / 2**20:.2f} MB)")
@@ -0,0 +1,226 @@
+"""
+Football Match Analysis - Goal Timelines
+CSR-packed per-match goal events with vectorized game-state analytics
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+HOME, AWAY = 1, -1
+UNKNOWN_MINUTE = -1
+
+# Minutes that absorb stoppage time in goalscorers.csv (45+2 is recorded
+# as 45), and the ordinary minutes used as their per-minute baseline.
+STOPPAGE_MINUTES = [45, 90, 105, 120]
+STOPPAGE_BASELINE = 5
+PHASE_LABELS = ['First Half', 'Second Half', 'Extra Time']
+PHASE_ENDS = [45, 90]
+
+
+# ============================================================================
+# Minute histograms (Chart 5)
+# ============================================================================
+def minute_histogram(minutes, max_minute=120):
+    """Goals per match minute 1..max(max_minute, latest minute); unknown minutes dropped."""
+    minutes = pd.to_numeric(pd.Series(minutes), errors='coerce').dropna().to_numpy(dtype=np.int64)
+    minutes = minutes[minutes > 0]
+    last = max(max_minute, int(minutes.max()) if len(minutes) else 0)
+    counts = np.bincount(minutes, minlength=last + 1)[1:]
+    return pd.Series(counts, index=pd.RangeIndex(1, last + 1, name='minute'), name='goals')
+
+
+def minute_profile(histogram):
+    """Per-minute goals with the estimated stoppage-time share of each half's last minute.
+
+    The stoppage estimate for minute m is the excess of m over the mean of
+    the STOPPAGE_BASELINE minutes before it.
+    """
+    goals = histogram.to_numpy(dtype=np.int64)
+    minutes = histogram.index.to_numpy()
+    stoppage = np.zeros(len(goals), dtype=np.int64)
+    for minute in STOPPAGE_MINUTES:
+        pos = minute - 1
+        if pos < len(goals) and pos >= STOPPAGE_BASELINE:
+            baseline = goals[pos - STOPPAGE_BASELINE:pos].mean()
+            stoppage[pos] = max(int(round(goals[pos] - baseline)), 0)
+    phase = np.select([minutes <= PHASE_ENDS[0], minutes <= PHASE_ENDS[1]], PHASE_LABELS[:2],
+                      default=PHASE_LABELS[2])
+    return pd.DataFrame({
+        'Minute': minutes,
+        'Goals': goals,
+        'Stoppage Goals': stoppage,
+        'Phase': phase,
+    })
+
+
+# ============================================================================
+# Goal timelines
+# ============================================================================
+def _segment_ids(offsets):
+    """Match ID of every event of a CSR layout."""
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+class GoalTimeline:
+    """Every match's goals as CSR arrays in minute order.
+
+    offsets[m]:offsets[m + 1] slices the events of match ID m (see
+    match_index). Per event: minute (UNKNOWN_MINUTE if missing), side
+    (HOME or AWAY, the team credited with the goal), penalty and own_goal.
+    complete[m] marks matches whose events all have minutes and add up to
+    the final score; game-state questions are only answered for those.
+    """
+
+    def __init__(self, offsets, minute, side, penalty, own_goal, home_score, away_score):
+        self.offsets = offsets
+        self.minute = minute
+        self.side = side
+        self.penalty = penalty
+        self.own_goal = own_goal
+        self.home_score = home_score
+        self.away_score = away_score
+        self.match = _segment_ids(offsets)
+
+        home_goals = np.bincount(self.match, weights=side == HOME, minlength=self.matches)
+        away_goals = np.bincount(self.match, weights=side == AWAY, minlength=self.matches)
+        unknown = np.bincount(self.match, weights=minute == UNKNOWN_MINUTE, minlength=self.matches)
+        self.complete = ((self.goal_counts > 0) & (unknown == 0) &
+                         (home_goals == home_score) & (away_goals == away_score))
+
+        # Running goal difference (home minus away) after each event
+        running = np.cumsum(side, dtype=np.int64)
+        before_match = np.concatenate([[0], running])[offsets[:-1]]
+        self.diff_after = running - before_match[self.match]
+        self.diff_before = self.diff_after - side
+
+    @classmethod
+    def build(cls, results, goalscorers):
+        """Pack goalscorer rows linked to results by match_id (see data_loader.load_datasets)."""
+        match = goalscorers['match_id'].to_numpy(dtype=np.int64)
+        minute = goalscorers['minute'].to_numpy(dtype=np.float64, na_value=np.nan)
+        minute = np.where(np.isnan(minute), UNKNOWN_MINUTE, minute).astype(np.int16)
+        is_home = (goalscorers['team'].astype(object) == goalscorers['home_team'].astype(object))
+        is_away = (goalscorers['team'].astype(object) == goalscorers['away_team'].astype(object))
+        linked = (match >= 0) & (is_home | is_away).to_numpy()
+
+        # Unknown minutes sort last; equal minutes keep file order
+        sort_minute = np.where(minute == UNKNOWN_MINUTE, np.iinfo(np.int16).max, minute)
+        rows = np.flatnonzero(linked)
+        rows = rows[np.lexsort((rows, sort_minute[rows], match[rows]))]
+
+        n_matches = len(results)
+        offsets = np.zeros(n_matches + 1, dtype=np.int64)
+        np.cumsum(np.bincount(match[rows], minlength=n_matches), out=offsets[1:])
+        return cls(
+            offsets,
+            minute[rows],
+            np.where(is_home.to_numpy()[rows], HOME, AWAY).astype(np.int8),
+            goalscorers['penalty'].to_numpy(dtype=bool)[rows],
+            goalscorers['own_goal'].to_numpy(dtype=bool)[rows],
+            pd.to_numeric(results['home_score']).to_numpy(dtype=np.float64, na_value=np.nan),
+            pd.to_numeric(results['away_score']).to_numpy(dtype=np.float64, na_value=np.nan),
+        )
+
+    @property
+    def matches(self):
+        return len(self.offsets) - 1
+
+    @property
+    def goal_counts(self):
+        return np.diff(self.offsets)
+
+    def events(self, match_id):
+        """One match's goals as a small frame, in minute order."""
+        start, stop = self.offsets[match_id], self.offsets[match_id + 1]
+        return pd.DataFrame({
+            'minute': self.minute[start:stop],
+            'side': np.where(self.side[start:stop] == HOME, 'home', 'away'),
+            'penalty': self.penalty[start:stop],
+            'own_goal': self.own_goal[start:stop],
+            'home': np.cumsum(self.side[start:stop] == HOME),
+            'away': np.cumsum(self.side[start:stop] == AWAY),
+        })
+
+    # ------------------------------------------------------------------
+    # Game-state analytics (all matches at once)
+    # ------------------------------------------------------------------
+    def score_at(self, minute):
+        """(home, away) goals per match after minute (NaN where the timeline is incomplete)."""
+        scored = self.minute <= minute
+        home = np.bincount(self.match, weights=scored & (self.side == HOME), minlength=self.matches)
+        away = np.bincount(self.match, weights=scored & (self.side == AWAY), minlength=self.matches)
+        home[~self.complete] = np.nan
+        away[~self.complete] = np.nan
+        return home, away
+
+    def goal_states(self):
+        """State of the scoring team just before each goal: 1 leading, 0 level, -1 trailing."""
+        return np.sign(self.diff_before * self.side).astype(np.int8)
+
+    def goals_by_state(self):
+        """Goals in complete timelines scored while leading, level and trailing."""
+        states = self.goal_states()[self.complete[self.match]]
+        counts = np.bincount(states + 1, minlength=3)
+        return pd.Series(counts[::-1], index=pd.Index(['Leading', 'Level', 'Trailing'],
+                                                      name='state'), name='goals')
+
+    def lead_changes(self):
+        """Per match, how often the lead passed from one team to the other."""
+        leader = np.sign(self.diff_after)
+        n = len(leader)
+        # Latest event (strictly earlier, same match) at which somebody led
+        led_at = np.where(leader != 0, np.arange(n), -1)
+        previous = np.concatenate([[-1], np.maximum.accumulate(led_at)[:-1]]) if n else led_at
+        same_match = previous >= self.offsets[:-1][self.match]
+        change = (leader != 0) & same_match & (leader[np.maximum(previous, 0)] == -leader)
+        counts = np.bincount(self.match[change], minlength=self.matches)
+        return np.where(self.complete, counts, -1)
+
+    def comebacks(self):
+        """Deficit overcome by the eventual winner (0 if never behind, -1 if no winner or incomplete)."""
+        final = np.sign(self.home_score - self.away_score)
+        final = np.nan_to_num(final).astype(np.int64)
+        winner_diff = self.diff_after * final[self.match]
+        has_goals = self.goal_counts > 0
+        worst = np.zeros(self.matches, dtype=np.int64)
+        starts = self.offsets[:-1][has_goals]
+        if len(starts):
+            worst[has_goals] = np.minimum.reduceat(winner_diff, starts)
+        deficit = np.maximum(-worst, 0)
+        return np.where(self.complete & (final != 0), deficit, -1)
+
+    def summary(self):
+        """Headline game-state numbers over all complete timelines."""
+        complete = int(self.complete.sum())
+        changes = self.lead_changes()
+        deficits = self.comebacks()
+        decided = deficits >= 0
+        return {
+            'matches_with_timelines': complete,
+            'goals': int(self.goal_counts[self.complete].sum()),
+            'goals_by_state': self.goals_by_state().to_dict(),
+            'matches_with_lead_change': int((changes > 0).sum()),
+            'lead_changes': int(changes[changes > 0].sum()),
+            'decided_matches': int(decided.sum()),
+            'comebacks': int((deficits > 0).sum()),
+            'comebacks_from_two_down': int((deficits >= 2).sum()),
+        }
+
+
+if __name__ == '__main__':
+    # Build the timelines for the bundled data and time the game-state queries
+    from data_loader import load_datasets
+    results, goalscorers, _ = load_datasets(verbose=False)
+    start = time.perf_counter()
+    timeline = GoalTimeline.build(results, goalscorers)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    summary = timeline.summary()
+    home, away = timeline.score_at(60)
+    queried = time.perf_counter() - start
+    print(f"Packed {len(timeline.minute):,} goals from {timeline.matches:,} matches in {built * 1000:.1f} ms; "
+          f"game-state queries in {queried * 1000:.1f} ms")
+    for key, value in summary.items():
+        print(f"  {key}: {value}")
@@ -0,0 +1,256 @@
+"""
+Football Match Analysis - Head-to-Head Matrix
+Sparse per-pair records over integer team codes with O(1) lookups
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from aggregation import digest, intern_codes, reduce_by_key, row_hashes
+
+# Bump whenever FIELDS or the saved arrays change
+H2H_VERSION = 1
+
+# Every pair is stored once, from the perspective of its lower-coded team
+# ("a"). Fields come in a/b twins so flipping the perspective is a column
+# permutation; venue splits count a's home games, b's home games and
+# neutral games.
+FIELDS = [
+    'matches', 'draws', 'a_wins', 'b_wins', 'a_goals', 'b_goals',
+    'a_home_matches', 'b_home_matches', 'a_home_wins', 'b_home_wins',
+    'a_home_draws', 'b_home_draws',
+    'neutral_matches', 'neutral_draws', 'neutral_a_wins', 'neutral_b_wins',
+    'shootouts', 'a_shootout_wins', 'b_shootout_wins',
+]
+FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+
+def _other_side(name):
+    return name.replace('a_', '\0').replace('b_', 'a_').replace('\0', 'b_')
+
+
+SWAP = np.array([FIELD_INDEX[_other_side(name)] for name in FIELDS])
+MATCH_COLUMNS = ['date', 'home_team', 'away_team', 'home_score', 'away_score', 'neutral']
+SHOOTOUT_COLUMNS = ['date', 'home_team', 'away_team', 'winner']
+
+
+def _pair_keys(home, away):
+    """Unordered pair key (lower code in the high bits) and whether home is team a."""
+    home_is_a = home <= away
+    lo = np.where(home_is_a, home, away).astype(np.int64)
+    hi = np.where(home_is_a, away, home).astype(np.int64)
+    return (lo << 32) | hi, home_is_a
+
+
+class HeadToHead:
+    """Per-pair records for every pair of teams that has met.
+
+    keys (sorted int64 pair keys) and counts (one int32 row of FIELDS per
+    key) hold the data; slot maps a pair key to its row, so looking up any
+    pair is a dict access no matter how many teams or matches there are.
+    """
+
+    def __init__(self):
+        self.teams = []
+        self.team_index = {}
+        self.keys = np.empty(0, dtype=np.int64)
+        self.counts = np.empty((0, len(FIELDS)), dtype=np.int32)
+        self.slot = {}
+        self.matches = 0
+        self.shootouts = 0
+
+    def team_codes(self, names):
+        """Integer codes for team names, registering unseen teams."""
+        codes, new = intern_codes(self.teams, names)
+        first = len(self.teams) - len(new)
+        self.team_index.update((team, first + i) for i, team in enumerate(new))
+        return codes
+
+    # ------------------------------------------------------------------
+    # Building and incremental updates
+    # ------------------------------------------------------------------
+    def update(self, chunk):
+        """Fold a chunk of results rows, or of shootouts rows (has 'winner'), into the matrix."""
+        if len(chunk) == 0:
+            return self
+        if 'winner' in chunk.columns:
+            keys, values = self._shootout_deltas(chunk)
+            self.shootouts += len(chunk)
+        else:
+            keys, values = self._match_deltas(chunk)
+            self.matches += len(chunk)
+        self._merge(*reduce_by_key(keys, values))
+        return self
+
+    def _match_deltas(self, matches):
+        home = self.team_codes(matches['home_team'])
+        away = self.team_codes(matches['away_team'])
+        home_score = pd.to_numeric(matches['home_score']).to_numpy(dtype=np.float64, na_value=np.nan)
+        away_score = pd.to_numeric(matches['away_score']).to_numpy(dtype=np.float64, na_value=np.nan)
+        played = ~(np.isnan(home_score) | np.isnan(away_score))
+        home, away = home[played], away[played]
+        home_score, away_score = home_score[played], away_score[played]
+        neutral = matches['neutral'].to_numpy(dtype=bool)[played]
+
+        keys, home_is_a = _pair_keys(home, away)
+        a_goals = np.where(home_is_a, home_score, away_score)
+        b_goals = np.where(home_is_a, away_score, home_score)
+        a_win, draw, b_win = a_goals > b_goals, a_goals == b_goals, a_goals < b_goals
+        a_home = ~neutral & home_is_a
+        b_home = ~neutral & ~home_is_a
+
+        values = np.zeros((len(keys), len(FIELDS)), dtype=np.int32)
+        columns = {
+            'matches': 1, 'draws': draw, 'a_wins': a_win, 'b_wins': b_win,
+            'a_goals': a_goals, 'b_goals': b_goals,
+            'a_home_matches': a_home, 'b_home_matches': b_home,
+            'a_home_wins': a_home & a_win, 'b_home_wins': b_home & b_win,
+            'a_home_draws': a_home & draw, 'b_home_draws': b_home & draw,
+            'neutral_matches': neutral, 'neutral_draws': neutral & draw,
+            'neutral_a_wins': neutral & a_win, 'neutral_b_wins': neutral & b_win,
+        }
+        for name, column in columns.items():
+            values[:, FIELD_INDEX[name]] = column
+        return keys, values
+
+    def _shootout_deltas(self, shootouts):
+        home = self.team_codes(shootouts['home_team'])
+        away = self.team_codes(shootouts['away_team'])
+        keys, home_is_a = _pair_keys(home, away)
+        winner = shootouts['winner'].astype(object).to_numpy()
+        home_won = winner == shootouts['home_team'].astype(object).to_numpy()
+        away_won = winner == shootouts['away_team'].astype(object).to_numpy()
+        values = np.zeros((len(keys), len(FIELDS)), dtype=np.int32)
+        values[:, FIELD_INDEX['shootouts']] = 1
+        values[:, FIELD_INDEX['a_shootout_wins']] = np.where(home_is_a, home_won, away_won)
+        values[:, FIELD_INDEX['b_shootout_wins']] = np.where(home_is_a, away_won, home_won)
+        return keys, values
+
+    def _merge(self, keys, values):
+        """Add per-pair deltas: existing pairs in place, new pairs appended and re-sorted."""
+        pos = np.searchsorted(self.keys, keys)
+        known = np.zeros(len(keys), dtype=bool)
+        if len(self.keys):
+            known = (pos < len(self.keys)) & (self.keys[np.minimum(pos, len(self.keys) - 1)] == keys)
+        self.counts[pos[known]] += values[known]
+        if (~known).any():
+            all_keys = np.concatenate([self.keys, keys[~known]])
+            all_counts = np.concatenate([self.counts, values[~known]])
+            order = np.argsort(all_keys, kind='stable')
+            self.keys, self.counts = all_keys[order], all_counts[order]
+            self.slot = {key: i for i, key in enumerate(self.keys.tolist())}
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    def record(self, team, opponent):
+        """Head-to-head record of team against opponent (all zeros if they never met)."""
+        a, b = self.team_index.get(team), self.team_index.get(opponent)
+        if a is None or b is None or a == b:
+            row = None
+        else:
+            lo, hi = min(a, b), max(a, b)
+            row = self.slot.get((lo << 32) | hi)
+        values = self.counts[row] if row is not None else np.zeros(len(FIELDS), dtype=np.int32)
+        if row is not None and a > b:
+            values = values[SWAP]
+        return _team_view(team, opponent, dict(zip(FIELDS, values.tolist())))
+
+    def pairs(self, min_matches=1):
+        """Every pair that has met at least min_matches times, one row per pair."""
+        keep = self.counts[:, FIELD_INDEX['matches']] >= min_matches
+        names = np.array(self.teams, dtype=object)
+        frame = pd.DataFrame(self.counts[keep], columns=FIELDS)
+        frame.insert(0, 'team_a', names[self.keys[keep] >> 32])
+        frame.insert(1, 'team_b', names[self.keys[keep] & 0xFFFFFFFF])
+        return frame
+
+    # ------------------------------------------------------------------
+    # Checkpoints
+    # ------------------------------------------------------------------
+    def save(self, path, fingerprint):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp.npz')
+        meta = {'version': H2H_VERSION, 'matches': self.matches, 'shootouts': self.shootouts,
+                'fingerprint': fingerprint}
+        np.savez(tmp, teams=np.array(self.teams, dtype=str), keys=self.keys, counts=self.counts,
+                 meta=np.array(json.dumps(meta)))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        """Restore a matrix and its metadata, or (None, None) if unreadable or outdated."""
+        try:
+            with np.load(path, allow_pickle=False) as saved:
+                meta = json.loads(str(saved['meta']))
+                if meta.get('version') != H2H_VERSION:
+                    return None, None
+                h2h = cls()
+                h2h.teams = saved['teams'].tolist()
+                h2h.keys = saved['keys']
+                h2h.counts = saved['counts']
+        except (OSError, KeyError, ValueError):
+            return None, None
+        h2h.team_index = {team: i for i, team in enumerate(h2h.teams)}
+        h2h.slot = {key: i for i, key in enumerate(h2h.keys.tolist())}
+        h2h.matches, h2h.shootouts = meta['matches'], meta['shootouts']
+        return h2h, meta
+
+
+def _team_view(team, opponent, stats):
+    """Turn an a/b record (team is a) into named team/opponent fields."""
+    def split(matches, wins, draws, losses):
+        return {'matches': matches, 'wins': wins, 'draws': draws, 'losses': losses}
+
+    home, away = stats['a_home_matches'], stats['b_home_matches']
+    return {
+        'team': team, 'opponent': opponent,
+        'matches': stats['matches'], 'wins': stats['a_wins'], 'draws': stats['draws'],
+        'losses': stats['b_wins'], 'goals_for': stats['a_goals'], 'goals_against': stats['b_goals'],
+        'home': split(home, stats['a_home_wins'], stats['a_home_draws'],
+                      home - stats['a_home_wins'] - stats['a_home_draws']),
+        'away': split(away, away - stats['b_home_wins'] - stats['b_home_draws'],
+                      stats['b_home_draws'], stats['b_home_wins']),
+        'neutral': split(stats['neutral_matches'], stats['neutral_a_wins'],
+                         stats['neutral_draws'], stats['neutral_b_wins']),
+        'shootouts': stats['shootouts'], 'shootout_wins': stats['a_shootout_wins'],
+        'shootout_losses': stats['b_shootout_wins'],
+    }
+
+
+def update_head_to_head(results, shootouts, checkpoint_path=None, verbose=False):
+    """Head-to-head matrix for results and shootouts, resuming from a checkpoint when possible.
+
+    Rows appended to either file since the checkpoint are folded in; if any
+    earlier row changed, the matrix is rebuilt from scratch.
+    """
+    h2h, meta = None, None
+    if checkpoint_path and Path(checkpoint_path).exists():
+        h2h, meta = HeadToHead.load(checkpoint_path)
+    if checkpoint_path:
+        match_hashes = row_hashes(results, MATCH_COLUMNS)
+        shootout_hashes = row_hashes(shootouts, SHOOTOUT_COLUMNS)
+    if h2h is not None:
+        done_matches, done_shootouts = meta['matches'], meta['shootouts']
+        fingerprint = meta['fingerprint']
+        if (done_matches > len(results) or done_shootouts > len(shootouts) or
+                digest(match_hashes[:done_matches]) != fingerprint['results'] or
+                digest(shootout_hashes[:done_shootouts]) != fingerprint['shootouts']):
+            h2h = None
+    if h2h is None:
+        h2h, done_matches, done_shootouts = HeadToHead(), 0, 0
+
+    h2h.update(results.iloc[done_matches:])
+    h2h.update(shootouts.iloc[done_shootouts:])
+    new_rows = (len(results) - done_matches) + (len(shootouts) - done_shootouts)
+    if verbose:
+        print(f"  Head-to-head: {new_rows} new row(s) folded in, "
+              f"{done_matches + done_shootouts} reused from checkpoint")
+    if checkpoint_path and new_rows:
+        h2h.save(checkpoint_path, {'results': digest(match_hashes),
+                                   'shootouts': digest(shootout_hashes)})
+    return h2h
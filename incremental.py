@@ -0,0 +1,312 @@
+"""
+Football Match Analysis - Incremental Ingestion
+Folds rows appended to the CSVs into persisted streaming aggregates
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from data_loader import load_alias_index
+from head_to_head import HeadToHead
+from streaming import (DEFAULT_CHUNKSIZE, GoalscorersAccumulator, ResultsAccumulator,
+                       ShootoutsAccumulator, StreamingElo)
+from team_names import canonicalize_teams
+from validation import ValidationReport, validate_chunk
+
+# Bump whenever the layout of state.json changes
+STATE_VERSION = 3
+READ_BLOCK = 1 << 20
+
+DATASETS = ('results', 'goalscorers', 'shootouts')
+# Aggregates that depend on each other's files are rebuilt together
+GROUPS = {
+    'matches': {'files': ('results', 'shootouts'),
+                'aggregates': ('results', 'shootouts', 'elo', 'head_to_head')},
+    'goals': {'files': ('goalscorers',), 'aggregates': ('goalscorers',)},
+}
+AGGREGATE_TYPES = {
+    'results': ResultsAccumulator,
+    'goalscorers': GoalscorersAccumulator,
+    'shootouts': ShootoutsAccumulator,
+    'elo': StreamingElo,
+    'head_to_head': HeadToHead,
+}
+# Which aggregates see the chunks of each file, in streaming.accumulate_datasets order
+CONSUMERS = {
+    'results': ('results', 'elo', 'head_to_head'),
+    'goalscorers': ('goalscorers',),
+    'shootouts': ('shootouts', 'head_to_head'),
+}
+
+
+def state_dir(data_dir='data'):
+    return Path(data_dir) / '.cache' / 'incremental'
+
+
+def _file_sha256(path):
+    path = Path(path)
+    return hashlib.sha256(path.read_bytes()).hexdigest() if path.exists() else None
+
+
+def _hash_prefix(f, length):
+    """sha256 over the first length bytes of an open file, left positioned after them."""
+    hasher = hashlib.sha256()
+    remaining = length
+    while remaining > 0:
+        block = f.read(min(READ_BLOCK, remaining))
+        if not block:
+            break
+        hasher.update(block)
+        remaining -= len(block)
+    return hasher, remaining == 0
+
+
+# ============================================================================
+# Byte-offset cursors
+# ============================================================================
+class FileCursor:
+    """How far into a CSV the aggregates have read.
+
+    offset is the byte position just after the last consumed line, rows
+    the number of data rows before it and sha256 the hash of every byte
+    before it, so a file that was edited rather than appended to no longer
+    matches its cursor. size and mtime_ns are the file's stat when it was
+    read: a file whose stat is unchanged is not read again at all.
+    """
+
+    def __init__(self, offset=0, rows=0, sha256=None, header=None, size=0, mtime_ns=None):
+        self.offset = offset
+        self.rows = rows
+        self.sha256 = sha256 or hashlib.sha256().hexdigest()
+        self.header = header
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self._prefix = None
+
+    @classmethod
+    def from_dict(cls, saved):
+        return cls(saved['offset'], saved['rows'], saved['sha256'], saved['header'],
+                   saved['size'], saved['mtime_ns'])
+
+    def to_dict(self):
+        return {'offset': self.offset, 'rows': self.rows, 'sha256': self.sha256,
+                'header': self.header, 'size': self.size, 'mtime_ns': self.mtime_ns}
+
+    def matches(self, path):
+        """True when the file still starts with exactly the bytes this cursor consumed.
+
+        An untouched file (same size and mtime) is accepted from its stat;
+        any other file has its whole consumed prefix hashed again.
+        """
+        stat = os.stat(path)
+        if stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns:
+            return True
+        with open(path, 'rb') as f:
+            hasher, complete = _hash_prefix(f, self.offset)
+        if not complete or hasher.hexdigest() != self.sha256:
+            return False
+        # read_tail carries on from here instead of hashing the prefix again
+        self._prefix = hasher
+        return True
+
+    def read_tail(self, path):
+        """CSV text of the complete lines after the cursor, and the advanced cursor.
+
+        A trailing line without its newline may still be being written and
+        is left for the next refresh. The returned text always starts with
+        the header so it parses on its own.
+        """
+        with open(path, 'rb') as f:
+            # Only bytes present at the stat are read, so a concurrent append waits
+            stat = os.fstat(f.fileno())
+            f.seek(self.offset)
+            tail = f.read(max(0, stat.st_size - self.offset))
+            tail = tail[:tail.rfind(b'\n') + 1]
+            sha256 = self.sha256
+            if tail:
+                if self._prefix is not None:
+                    hasher = self._prefix.copy()
+                else:
+                    f.seek(0)
+                    hasher, _ = _hash_prefix(f, self.offset)
+                hasher.update(tail)
+                sha256 = hasher.hexdigest()
+        header = self.header
+        if header is None:
+            header = tail[:tail.find(b'\n') + 1].decode('utf-8')
+            body = tail[len(header.encode('utf-8')):]
+        else:
+            body = tail
+        advanced = FileCursor(self.offset + len(tail), self.rows, sha256, header, stat.st_size,
+                              stat.st_mtime_ns)
+        return header.encode('utf-8') + body if body else b'', advanced
+
+
+# ============================================================================
+# Refresh
+# ============================================================================
+def _load_state(directory):
+    try:
+        with open(directory / 'state.json', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get('version') == STATE_VERSION else None
+
+
+def _write_state(directory, state):
+    path = directory / 'state.json'
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    tmp.replace(path)
+
+
+def _load_aggregate(directory, name, generation):
+    aggregate, meta = AGGREGATE_TYPES[name].load(directory / f'{name}.npz')
+    if aggregate is None:
+        return None
+    if name == 'elo':
+        fresh = json.loads(json.dumps(StreamingElo().params()))
+        if meta['params'] != fresh or meta['prefix_hash'] != generation:
+            return None
+    elif meta['fingerprint'] != generation:
+        return None
+    return aggregate
+
+
+def _generation(cursors, aliases):
+    """Token naming one consistent set of saved aggregates and the bytes they consumed.
+
+    File stats are left out, so touching a file without appending a complete
+    line does not invalidate the aggregates.
+    """
+    consumed = {name: [cursor.offset, cursor.rows, cursor.sha256]
+                for name, cursor in cursors.items()}
+    key = json.dumps({'files': consumed, 'aliases': aliases}, sort_keys=True)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def refresh(data_dir='data', chunksize=DEFAULT_CHUNKSIZE, report=None, rebuild=False):
+    """Bring the persisted aggregates up to date with the CSVs in data_dir.
+
+    Only bytes appended since the last refresh are parsed, and only the
+    aggregates of groups with new rows are saved again. A file that no
+    longer matches its cursor (edited, truncated or replaced), a changed
+    former_names.csv or a missing or stale checkpoint triggers a full
+    re-read of the affected group of files instead; rebuild forces one
+    for every group. Returns the accumulators, in the shape of
+    streaming.accumulate_datasets, and per-file changes {name: {'rows': new rows, 'rebuilt': reason or None}}.
+    report, if given, validates the new rows.
+    """
+    data_dir = Path(data_dir)
+    directory = state_dir(data_dir)
+    state = None if rebuild else _load_state(directory)
+    aliases = _file_sha256(data_dir / 'former_names.csv')
+    reasons = {}
+    if state is None:
+        reasons = dict.fromkeys(GROUPS, 'rebuild requested' if rebuild else 'no checkpoint')
+    elif state['aliases'] != aliases:
+        reasons = dict.fromkeys(GROUPS, 'former_names.csv changed')
+
+    cursors, aggregates = {}, {}
+    for group, members in GROUPS.items():
+        if group not in reasons:
+            for name in members['files']:
+                saved = state['files'].get(name)
+                if saved is None:
+                    reasons[group] = f'no checkpoint for {name}.csv'
+                    break
+                cursors[name] = FileCursor.from_dict(saved)
+                if not cursors[name].matches(data_dir / f'{name}.csv'):
+                    reasons[group] = f'{name}.csv rewritten'
+                    break
+        if group not in reasons:
+            for name in members['aggregates']:
+                aggregates[name] = _load_aggregate(directory, name, state['generations'][group])
+                if aggregates[name] is None:
+                    reasons[group] = f'{name} checkpoint missing or stale'
+                    break
+        if group in reasons:
+            cursors.update((name, FileCursor()) for name in members['files'])
+            aggregates.update((name, AGGREGATE_TYPES[name]()) for name in members['aggregates'])
+
+    alias_index = load_alias_index(data_dir, verbose=False)
+    changes, advanced = {}, set()
+    for name in DATASETS:
+        path = data_dir / f'{name}.csv'
+        text, cursor = cursors[name].read_tail(path)
+        if text:
+            for chunk in pd.read_csv(io.BytesIO(text), chunksize=chunksize):
+                # Row labels continue from the rows already consumed, as in a full read
+                chunk.index += cursor.rows
+                cursor.rows += len(chunk)
+                if report is not None:
+                    chunk = validate_chunk(name, chunk, report)
+                if alias_index is not None:
+                    canonicalize_teams(chunk, alias_index)
+                for consumer in CONSUMERS[name]:
+                    aggregates[consumer].update(chunk)
+        group = next(g for g, members in GROUPS.items() if name in members['files'])
+        changes[name] = {'rows': cursor.rows - cursors[name].rows, 'rebuilt': reasons.get(group)}
+        if cursor.offset != cursors[name].offset:
+            advanced.add(name)
+        cursors[name] = cursor
+
+    changed = [group for group, members in GROUPS.items()
+               if group in reasons or advanced.intersection(members['files'])]
+    generations = {group: _generation({name: cursors[name] for name in members['files']}, aliases)
+                   for group, members in GROUPS.items()}
+    files = {name: cursor.to_dict() for name, cursor in cursors.items()}
+    if changed or files != state['files']:
+        # Aggregates first, state last: a crash in between leaves aggregates
+        # whose generation no longer matches, which forces a rebuild
+        for group in changed:
+            for name in GROUPS[group]['aggregates']:
+                aggregates[name].save(directory / f'{name}.npz', generations[group])
+        _write_state(directory, {
+            'version': STATE_VERSION,
+            'generations': generations,
+            'aliases': aliases,
+            'files': files,
+        })
+    return aggregates, changes
+
+
+def describe_changes(changes):
+    """One line per file: rows folded in and why it was rebuilt, if it was."""
+    lines = []
+    for name, change in changes.items():
+        line = f"  {name}.csv: +{change['rows']:,} row(s)"
+        if change['rebuilt']:
+            line += f" (full rebuild: {change['rebuilt']})"
+        lines.append(line)
+    return lines
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[-1])
+    parser.add_argument('--data-dir', default='data', help='directory holding the CSV datasets')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, metavar='ROWS',
+                        help=f'rows per parsed chunk (default: {DEFAULT_CHUNKSIZE:,})')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='ignore the checkpoint and re-read every file')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    report = ValidationReport()
+    start = time.perf_counter()
+    aggregates, changes = refresh(args.data_dir, args.chunksize, report, args.rebuild)
+    elapsed = time.perf_counter() - start
+    print('\n'.join(describe_changes(changes)))
+    print(f"Refreshed in {elapsed * 1000:.1f} ms: {aggregates['results'].rows:,} matches, "
+          f"{aggregates['goalscorers'].rows:,} goals, {aggregates['shootouts'].rows:,} shootouts")
@@ -0,0 +1,119 @@
+"""
+Football Match Analysis - Server Load Test
+Fires concurrent requests at server.py and reports latency percentiles
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import defaultdict
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import numpy as np
+
+# A mix of cached and parameterised aggregate queries plus chart renders
+DEFAULT_PATHS = [
+    '/charts/01.json',
+    '/charts/01.json?start=2000&end=2010-12-31',
+    '/charts/02.json?start=2018-06-14',
+    '/charts/04.json',
+    '/charts/04.json?min_matches=100',
+    '/charts/04.json?min_matches=200&top_n=10',
+    '/charts/06.json?min_shootouts=3',
+    '/charts/06.json?min_shootouts=10&top_n=5',
+    '/charts/11.json?top_n=50',
+    '/charts/09.json?end=1990',
+    '/charts/13.json?top_n=25',
+    '/charts/04.png',
+    '/charts/06.png?min_shootouts=10',
+]
+
+
+def percentile_ms(latencies, q):
+    return float(np.percentile(latencies, q) * 1000) if len(latencies) else float('nan')
+
+
+def run_load(base_url, paths, concurrency=8, requests=500, timeout=60):
+    """Send requests round-robin over paths from concurrency threads; return per-path latencies."""
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    counter = iter(range(requests))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                n = next(counter, None)
+            if n is None:
+                return
+            path = paths[n % len(paths)]
+            start = time.perf_counter()
+            try:
+                with urlopen(base_url + path, timeout=timeout) as response:
+                    response.read()
+            except (HTTPError, OSError):
+                with lock:
+                    errors[path] += 1
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies[path].append(elapsed)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - start
+
+
+def summarize(latencies, errors, elapsed):
+    everything = [t for values in latencies.values() for t in values]
+    return {
+        'requests': len(everything),
+        'errors': sum(errors.values()),
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(everything) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(percentile_ms(everything, 50), 2),
+        'p99_ms': round(percentile_ms(everything, 99), 2),
+        'paths': {
+            path: {'requests': len(values), 'errors': errors.get(path, 0),
+                   'p50_ms': round(percentile_ms(values, 50), 2),
+                   'p99_ms': round(percentile_ms(values, 99), 2)}
+            for path, values in sorted(latencies.items())
+        },
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[-1])
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='server base URL')
+    parser.add_argument('--concurrency', '-c', type=int, default=8)
+    parser.add_argument('--requests', '-n', type=int, default=500)
+    parser.add_argument('--path', action='append', dest='paths', metavar='PATH',
+                        help='request path (repeatable; default: a built-in mix)')
+    parser.add_argument('--json', metavar='PATH', help='also write the summary to PATH')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = args.paths or DEFAULT_PATHS
+    latencies, errors, elapsed = run_load(args.url.rstrip('/'), paths, args.concurrency,
+                                          args.requests)
+    summary = summarize(latencies, errors, elapsed)
+    print(f"{summary['requests']} requests ({summary['errors']} errors) in {summary['seconds']}s "
+          f"with {args.concurrency} threads: {summary['requests_per_second']} req/s, "
+          f"p50 {summary['p50_ms']} ms, p99 {summary['p99_ms']} ms")
+    for path, stats in summary['paths'].items():
+        print(f"  {path:<45} p50 {stats['p50_ms']:>8.2f} ms  p99 {stats['p99_ms']:>8.2f} ms")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+"""
+Football Match Analysis - Match Aggregate Cube
+Match counts and goal sums at year x tournament x venue x country x outcome x
+margin grain, with roll-ups, year slices and checkpointed incremental updates
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from aggregation import digest, intern_codes, reduce_by_key, row_hashes
+from features import OUTCOMES, FeatureSet
+
+# Bump whenever DIMENSIONS, BITS or MEASURES change
+CUBE_VERSION = 1
+
+# Every cell is one int64 key packing the dimension codes, most significant
+# first, so sorted keys are grouped by year and a year range is one slice
+DIMENSIONS = ['year', 'tournament', 'neutral', 'country', 'outcome', 'margin']
+BITS = {'year': 12, 'tournament': 16, 'neutral': 1, 'country': 16, 'outcome': 2, 'margin': 4}
+SHIFT = {name: sum(BITS[other] for other in DIMENSIONS[i + 1:]) for i, name in enumerate(DIMENSIONS)}
+MEASURES = ['matches', 'home_goals', 'away_goals']
+NAMED_DIMENSIONS = ['tournament', 'country']
+# Absolute goal differences of MAX_MARGIN or more share the top margin cell
+MAX_MARGIN = 10
+CUBE_COLUMNS = ['date', 'tournament', 'neutral', 'country', 'home_score', 'away_score']
+
+
+class MatchCube:
+    """Materialized aggregate of results at the finest grain of DIMENSIONS.
+
+    keys (sorted int64 cell keys) and values (one int64 row of MEASURES per
+    key) hold the data. Tournament and country are coded by first appearance
+    in names; year, neutral, outcome (index into OUTCOMES) and margin are
+    stored as themselves.
+    """
+
+    def __init__(self):
+        self.names = {dimension: [] for dimension in NAMED_DIMENSIONS}
+        self.keys = np.empty(0, dtype=np.int64)
+        self.values = np.empty((0, len(MEASURES)), dtype=np.int64)
+        self.rows = 0
+
+    def codes(self, dimension, names):
+        """Integer codes for tournament or country names, registering unseen ones."""
+        known = self.names[dimension]
+        codes, new = intern_codes(known, names)
+        if len(known) >= 1 << BITS[dimension]:
+            del known[len(known) - len(new):]
+            raise ValueError(f"Too many distinct {dimension} values for the cube key")
+        return codes
+
+    # ------------------------------------------------------------------
+    # Building and incremental updates
+    # ------------------------------------------------------------------
+    def update(self, chunk, features=None):
+        """Fold a chunk of results rows into the cube.
+
+        Year, outcome and margin come from features, a FeatureSet over
+        chunk, built here when not given.
+        """
+        if len(chunk) == 0:
+            return self
+        if features is None:
+            features = FeatureSet(chunk)
+        home = chunk['home_score'].to_numpy(np.int64)
+        away = chunk['away_score'].to_numpy(np.int64)
+        codes = {
+            'year': features['year'].to_numpy(np.int64),
+            'tournament': self.codes('tournament', chunk['tournament']),
+            'neutral': chunk['neutral'].to_numpy(bool),
+            'country': self.codes('country', chunk['country']),
+            'outcome': features['outcome'].cat.codes.to_numpy(np.int64),
+            'margin': np.minimum(features['goal_difference'].to_numpy(np.int64), MAX_MARGIN),
+        }
+        keys = np.zeros(len(chunk), dtype=np.int64)
+        for dimension in DIMENSIONS:
+            keys |= codes[dimension].astype(np.int64) << SHIFT[dimension]
+        values = np.column_stack([np.ones(len(chunk), dtype=np.int64), home, away])
+        self._merge(*reduce_by_key(keys, values))
+        self.rows += len(chunk)
+        return self
+
+    def merge(self, other):
+        """Fold in a cube built from other rows, re-coding its tournaments and countries."""
+        keys = other.keys.copy()
+        for dimension in NAMED_DIMENSIONS:
+            mask = ((1 << BITS[dimension]) - 1) << SHIFT[dimension]
+            recode = self.codes(dimension, other.names[dimension]).astype(np.int64)
+            keys = (keys & ~mask) | (recode[other.decode(dimension)] << SHIFT[dimension])
+        self._merge(*reduce_by_key(keys, other.values))
+        self.rows += other.rows
+        return self
+
+    def _merge(self, keys, values):
+        """Add per-cell deltas: existing cells in place, new cells inserted in key order."""
+        pos = np.searchsorted(self.keys, keys)
+        known = np.zeros(len(keys), dtype=bool)
+        if len(self.keys):
+            known = (pos < len(self.keys)) & (self.keys[np.minimum(pos, len(self.keys) - 1)] == keys)
+        self.values[pos[known]] += values[known]
+        if (~known).any():
+            self.keys = np.insert(self.keys, pos[~known], keys[~known])
+            self.values = np.insert(self.values, pos[~known], values[~known], axis=0)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def __len__(self):
+        return len(self.keys)
+
+    def decode(self, dimension, keys=None):
+        """Codes of one dimension for every cell (or for the given keys)."""
+        keys = self.keys if keys is None else keys
+        return (keys >> SHIFT[dimension]) & ((1 << BITS[dimension]) - 1)
+
+    def labels(self, dimension, codes):
+        """Dimension values for codes: names, booleans, outcome labels or integers."""
+        if dimension in NAMED_DIMENSIONS:
+            return np.array(self.names[dimension], dtype=object)[codes]
+        if dimension == 'neutral':
+            return codes.astype(bool)
+        if dimension == 'outcome':
+            return np.array(OUTCOMES, dtype=object)[codes]
+        return codes
+
+    def encode(self, dimension, value):
+        """Code of a single dimension value (-1 when the cube has never seen it)."""
+        if dimension in NAMED_DIMENSIONS:
+            known = self.names[dimension]
+            return known.index(value) if value in known else -1
+        if dimension == 'outcome':
+            return OUTCOMES.index(value)
+        return int(value)
+
+    def slice_years(self, first=None, last=None):
+        """Cube of the cells from year first to year last inclusive (sharing names)."""
+        if first is None and last is None:
+            return self
+        lo = 0 if first is None else np.searchsorted(self.keys, first << SHIFT['year'])
+        hi = len(self) if last is None else np.searchsorted(self.keys, (last + 1) << SHIFT['year'])
+        cube = MatchCube()
+        cube.names = self.names
+        cube.keys, cube.values = self.keys[lo:hi], self.values[lo:hi]
+        cube.rows = int(cube.values[:, 0].sum())
+        return cube
+
+    def rollup(self, dimensions=(), **where):
+        """Sum MEASURES over every dimension not listed, after filtering on where.
+
+        where maps dimensions to a single value, e.g. rollup(['outcome'],
+        neutral=False). The result has one row per combination present,
+        indexed by the listed dimensions in code order (years ascending,
+        tournaments and countries in order of first appearance); with no
+        dimensions it is a single row of totals.
+        """
+        keys, values = self.keys, self.values
+        for dimension, value in where.items():
+            keep = self.decode(dimension, keys) == self.encode(dimension, value)
+            keys, values = keys[keep], values[keep]
+        dimensions = list(dimensions)
+        if not dimensions:
+            return pd.DataFrame([values.sum(axis=0)], columns=MEASURES)
+        group = np.zeros(len(keys), dtype=np.int64)
+        for dimension in dimensions:
+            group = (group << BITS[dimension]) | self.decode(dimension, keys)
+        group, sums = reduce_by_key(group, values)
+        index = []
+        for dimension in reversed(dimensions):
+            index.append(pd.Index(self.labels(dimension, group & ((1 << BITS[dimension]) - 1)),
+                                  name=dimension))
+            group = group >> BITS[dimension]
+        index = index[0] if len(index) == 1 else pd.MultiIndex.from_arrays(index[::-1])
+        return pd.DataFrame(sums, index=index, columns=MEASURES)
+
+    def cells(self):
+        """Every cell at the finest grain, one row each."""
+        return self.rollup(DIMENSIONS).reset_index()
+
+    # ------------------------------------------------------------------
+    # Checkpoints
+    # ------------------------------------------------------------------
+    def save(self, path, fingerprint, source=None):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp.npz')
+        meta = {'version': CUBE_VERSION, 'rows': self.rows, 'fingerprint': fingerprint,
+                'source': source}
+        np.savez(tmp, keys=self.keys, values=self.values, meta=np.array(json.dumps(meta)),
+                 **{dimension: np.array(self.names[dimension], dtype=str)
+                    for dimension in NAMED_DIMENSIONS})
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        """Restore a cube and its metadata, or (None, None) if unreadable or outdated."""
+        try:
+            with np.load(path, allow_pickle=False) as saved:
+                meta = json.loads(str(saved['meta']))
+                if meta.get('version') != CUBE_VERSION:
+                    return None, None
+                cube = cls()
+                cube.names = {dimension: saved[dimension].tolist()
+                              for dimension in NAMED_DIMENSIONS}
+                cube.keys = saved['keys']
+                cube.values = saved['values']
+        except (OSError, KeyError, ValueError):
+            return None, None
+        cube.rows = meta['rows']
+        return cube, meta
+
+
+def update_cube(results, checkpoint_path=None, verbose=False, features=None, source=None):
+    """Match cube for results, resuming from a checkpoint when possible.
+
+    Rows appended since the checkpoint are folded in; if any earlier row
+    changed, the cube is rebuilt from scratch. Rows are hashed once and
+    the checkpoint's prefix is checked against the leading hashes.
+    features, a FeatureSet over results, is used when every row is folded in.
+
+    source identifies the files results was loaded from (see
+    data_loader.source_fingerprint). A checkpoint saved from the same
+    source and row count is reused without hashing any rows.
+    """
+    cube, meta = None, None
+    if checkpoint_path and Path(checkpoint_path).exists():
+        cube, meta = MatchCube.load(checkpoint_path)
+    if (cube is not None and source is not None and None not in source.values()
+            and meta.get('source') == source and meta['rows'] == len(results)):
+        if verbose:
+            print(f"  Match cube: {len(results)} row(s) reused from checkpoint "
+                  f"({len(cube)} cells, source unchanged)")
+        return cube
+    hashes = row_hashes(results, CUBE_COLUMNS) if checkpoint_path else None
+    if cube is not None:
+        done = meta['rows']
+        if done > len(results) or digest(hashes[:done]) != meta['fingerprint']:
+            cube = None
+    if cube is None:
+        cube, done = MatchCube(), 0
+
+    cube.update(results.iloc[done:], features if done == 0 else None)
+    if verbose:
+        print(f"  Match cube: {len(results) - done} new row(s) folded in, "
+              f"{done} reused from checkpoint ({len(cube)} cells)")
+    if checkpoint_path and (len(results) > done or (meta or {}).get('source') != source):
+        cube.save(checkpoint_path, digest(hashes), source)
+    return cube
+
+
+if __name__ == '__main__':
+    import time
+
+    from data_loader import load_datasets
+
+    results, _, _ = load_datasets(verbose=False)
+    start = time.perf_counter()
+    cube = MatchCube().update(results)
+    print(f"{len(results)} matches -> {len(cube)} cells in {time.perf_counter() - start:.3f}s")
+    start = time.perf_counter()
+    by_venue = cube.rollup(['neutral', 'outcome'])
+    print(f"Roll-up to neutral x outcome in {(time.perf_counter() - start) * 1000:.2f} ms")
+    print(by_venue)
@@ -0,0 +1,177 @@
+"""
+Football Match Analysis - Match ID Index
+Resolves goalscorer and shootout rows to dense integer match IDs of results
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Bump whenever the key layout or the saved arrays change
+INDEX_VERSION = 1
+INDEX_FILE_NAME = 'match_index.npz'
+
+# Packed match key: offset day number in the high bits, then home and away
+# team codes in TEAM_BITS bits each. Rows with an unknown team or no date
+# get MISSING_KEY and never match.
+TEAM_BITS = 16
+DAY_OFFSET = 1 << 20
+MISSING_KEY = -1
+
+
+def _team_codes(values, teams):
+    """Position of each team name in teams (-1 if absent), via the categories when categorical."""
+    values = pd.Series(values)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        lookup = teams.get_indexer(values.cat.categories)
+        codes = values.cat.codes.to_numpy()
+        return np.where(codes >= 0, lookup[codes], -1).astype(np.int64)
+    return teams.get_indexer(values.astype(object)).astype(np.int64)
+
+
+def match_keys(frame, teams):
+    """One int64 key per (date, home_team, away_team) row, teams coded by position in teams."""
+    if len(teams) >= 1 << TEAM_BITS:
+        raise ValueError(f"Too many teams for a packed match key ({len(teams)})")
+    home = _team_codes(frame['home_team'], teams)
+    away = _team_codes(frame['away_team'], teams)
+    dates = pd.to_datetime(frame['date']).to_numpy()
+    days = dates.astype('datetime64[D]').astype(np.int64)
+    keys = ((days + DAY_OFFSET) << (2 * TEAM_BITS)) | (home << TEAM_BITS) | away
+    keys[(home < 0) | (away < 0) | np.isnat(dates)] = MISSING_KEY
+    return keys
+
+
+class MatchIndex:
+    """Dense match IDs for results rows and the rows of the files that refer to them.
+
+    Match ID i is row i of results. goal_match and shootout_match hold the
+    match ID of every goalscorers / shootouts row, or -1 when the row names
+    a (date, home_team, away_team) that is not in results.
+    """
+
+    def __init__(self, result_keys, goal_match, shootout_match):
+        self.result_keys = result_keys
+        self.goal_match = goal_match
+        self.shootout_match = shootout_match
+
+    @classmethod
+    def build(cls, results, goalscorers, shootouts):
+        """Join both files to results through a hash index over packed keys."""
+        teams = pd.Index(pd.unique(np.concatenate([
+            np.asarray(results['home_team'], dtype=object),
+            np.asarray(results['away_team'], dtype=object),
+        ])))
+        result_keys = match_keys(results, teams)
+        # A repeated fixture keeps its first row as the target; the hash
+        # index needs unique keys, so later copies map to the first one.
+        unique_keys, first = np.unique(result_keys, return_index=True)
+        table = pd.Index(unique_keys)
+
+        def resolve(frame):
+            keys = match_keys(frame, teams)
+            pos = table.get_indexer(keys)
+            match = np.where(pos >= 0, first[np.maximum(pos, 0)], -1)
+            match[keys == MISSING_KEY] = -1
+            return match.astype(np.int32)
+
+        return cls(result_keys, resolve(goalscorers), resolve(shootouts))
+
+    @property
+    def matches(self):
+        return len(self.result_keys)
+
+    def goal_counts(self):
+        """Goalscorer rows per match ID."""
+        linked = self.goal_match[self.goal_match >= 0]
+        return np.bincount(linked, minlength=self.matches)
+
+    def report(self, results):
+        """Integrity summary of the join.
+
+        Goal-count mismatches only cover matches that have goal rows at
+        all; goalscorers.csv does not cover every result.
+        """
+        keys = self.result_keys[self.result_keys != MISSING_KEY]
+        counts = self.goal_counts()
+        scored = (pd.to_numeric(results['home_score']).to_numpy(dtype=float) +
+                  pd.to_numeric(results['away_score']).to_numpy(dtype=float))
+        mismatched = np.flatnonzero((counts > 0) & (counts != scored))
+        return {
+            'matches': self.matches,
+            'duplicate_matches': int(len(keys) - len(np.unique(keys))),
+            'goal_rows': int(len(self.goal_match)),
+            'unmatched_goal_rows': np.flatnonzero(self.goal_match < 0).tolist(),
+            'shootout_rows': int(len(self.shootout_match)),
+            'unmatched_shootout_rows': np.flatnonzero(self.shootout_match < 0).tolist(),
+            'goal_count_mismatches': [
+                {'match_id': int(m), 'goal_rows': int(counts[m]), 'score_total': int(scored[m])}
+                for m in mismatched
+            ],
+        }
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def save(self, path, fingerprint):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp.npz')
+        meta = {'version': INDEX_VERSION, 'fingerprint': fingerprint}
+        np.savez(tmp, result_keys=self.result_keys, goal_match=self.goal_match,
+                 shootout_match=self.shootout_match, meta=np.array(json.dumps(meta)))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """Saved index, or None if missing, outdated or built from other inputs."""
+        try:
+            with np.load(path, allow_pickle=False) as saved:
+                meta = json.loads(str(saved['meta']))
+                if meta != {'version': INDEX_VERSION, 'fingerprint': fingerprint}:
+                    return None
+                return cls(saved['result_keys'], saved['goal_match'], saved['shootout_match'])
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def link_matches(results, goalscorers, shootouts, index_path=None, fingerprint=None,
+                 verbose=True):
+    """Add a match_id column to all three frames, in place.
+
+    The index is read from index_path when its fingerprint (the source
+    file hashes) matches, and rebuilt and saved otherwise.
+    """
+    index = None
+    if index_path is not None and fingerprint is not None:
+        index = MatchIndex.load(index_path, fingerprint)
+    reused = (index is not None and index.matches == len(results) and
+              len(index.goal_match) == len(goalscorers) and
+              len(index.shootout_match) == len(shootouts))
+    if not reused:
+        index = MatchIndex.build(results, goalscorers, shootouts)
+        if index_path is not None and fingerprint is not None:
+            index.save(index_path, fingerprint)
+
+    results['match_id'] = np.arange(len(results), dtype=np.int32)
+    goalscorers['match_id'] = index.goal_match
+    shootouts['match_id'] = index.shootout_match
+
+    if verbose:
+        report = index.report(results)
+        print(f"  match index ({'reused' if reused else 'built'}): "
+              f"{len(report['unmatched_goal_rows'])} unmatched goal row(s), "
+              f"{len(report['unmatched_shootout_rows'])} unmatched shootout row(s), "
+              f"{len(report['goal_count_mismatches'])} match(es) whose goal rows "
+              f"differ from the score")
+    return index
+
+
+if __name__ == '__main__':
+    # Print the full join report for the bundled data
+    from data_loader import load_datasets
+    results, goalscorers, shootouts = load_datasets(link=False, verbose=False)
+    report = MatchIndex.build(results, goalscorers, shootouts).report(results)
+    print(json.dumps(report, indent=2))
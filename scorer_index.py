@@ -0,0 +1,316 @@
+"""
+Football Match Analysis - Scorer Index
+Player career index with interned scorer IDs and grouped top-k leaderboards
+"""
+
+import argparse
+import difflib
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import decade_of
+
+GROUPINGS = ('team', 'decade', 'year', 'tournament')
+# (group, scorer) pairs are counted with a dense bincount while the key space
+# has at most this many cells per goal; sparser key spaces are sorted instead
+DENSE_CELLS_PER_GOAL = 4
+# Groups at least this large are cut with argpartition before the final sort
+PARTITION_MIN = 256
+
+
+def _days(dates):
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates)
+    return dates.to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+def _team_days(teams, days):
+    """Sortable int64 keys of (team, day): team in the high half, offset day in the low half."""
+    return teams.astype(np.int64) << 32 | (days.astype(np.int64) + (1 << 31))
+
+
+def _search(haystack, needles, side):
+    """searchsorted with the needles visited in order, which keeps lookups cache-friendly."""
+    order = np.argsort(needles)
+    positions = np.empty(len(needles), dtype=np.int64)
+    positions[order] = np.searchsorted(haystack, needles[order], side=side)
+    return positions
+
+
+def _names(*columns):
+    """Sorted distinct non-missing values of the given columns."""
+    names = set()
+    for column in columns:
+        names.update(pd.Series(column).dropna().unique().tolist())
+    return pd.Index(sorted(names))
+
+
+def count_pairs(groups, members, n_members):
+    """(group, member, count) for every pair that occurs, ordered by group then member."""
+    keys = groups.astype(np.int64) * n_members + members
+    cells = (int(groups.max()) + 1) * n_members if len(keys) else 0
+    if cells <= DENSE_CELLS_PER_GOAL * len(keys):
+        counts = np.bincount(keys, minlength=cells)
+        keys = np.flatnonzero(counts)
+        counts = counts[keys]
+    else:
+        keys, counts = np.unique(keys, return_counts=True)
+    return keys // n_members, keys % n_members, counts
+
+
+def grouped_top_k(groups, scores, k):
+    """Positions of the k highest scores of every group, groups ascending, best first.
+
+    groups must be sorted and scores distinct within a group. Groups of at
+    least PARTITION_MIN entries are first cut to their top k with
+    argpartition; the rest go through one vectorized sort, so a full sort
+    never sees more than the small groups and the survivors.
+    """
+    if len(groups) == 0:
+        return np.empty(0, dtype=np.int64)
+    starts = np.flatnonzero(np.concatenate([[True], groups[1:] != groups[:-1]]))
+    sizes = np.diff(np.append(starts, len(groups)))
+    if k == 1:
+        # The group maximum is the only winner, found without any sort
+        return np.flatnonzero(scores == np.repeat(np.maximum.reduceat(scores, starts), sizes))
+    keep = np.ones(len(groups), dtype=bool)
+    large = (sizes > k) & (sizes >= PARTITION_MIN)
+    for start, size in zip(starts[large].tolist(), sizes[large].tolist()):
+        segment = scores[start:start + size]
+        keep[start + np.argpartition(segment, size - k - 1)[:size - k]] = False
+    candidates = np.flatnonzero(keep)
+    candidates = candidates[np.lexsort((-scores[candidates], groups[candidates]))]
+    ordered = groups[candidates]
+    rank = np.arange(len(candidates)) - np.searchsorted(ordered, ordered)
+    return candidates[rank < k]
+
+
+class ScorerIndex:
+    """Goal events keyed by interned integer IDs, with per-scorer career aggregates.
+
+    Scorer IDs follow first appearance in goalscorers, so equal tallies rank
+    in file order as value_counts() does. Team and tournament IDs index
+    sorted names; -1 marks a missing scorer or team and a goal without a
+    linked result. Every goal is one row of compact arrays, so queries are
+    integer bincounts and partial selections instead of string filtering.
+    """
+
+    def __init__(self, scorers, teams, tournaments, player, team, tournament, match, day,
+                 penalty, own_goal, match_days):
+        self.scorers = scorers
+        self.teams = teams
+        self.tournaments = tournaments
+        self.player = player
+        self.team = team
+        self.tournament = tournament
+        self.match = match
+        self.day = day
+        self.penalty = penalty
+        self.own_goal = own_goal
+        # Sorted (team, day) keys of every result, for team matches within a career span
+        self.match_days = match_days
+        self._periods = {}
+        self._careers = None
+
+    @classmethod
+    def build(cls, goalscorers, results):
+        """Index goalscorers, joined through match_id to the full results frame it refers to."""
+        player, scorers = pd.factorize(goalscorers['scorer'])
+        teams = _names(goalscorers['team'], results['home_team'], results['away_team'])
+        tournament_codes, tournaments = pd.factorize(results['tournament'], sort=True)
+        match = (goalscorers['match_id'].to_numpy(np.int64) if 'match_id' in goalscorers
+                 else np.full(len(goalscorers), -1, dtype=np.int64))
+        tournament = np.where(match >= 0, tournament_codes[np.maximum(match, 0)], -1)
+
+        result_days = _days(results['date'])
+        sides = np.concatenate([teams.get_indexer(results['home_team']),
+                                teams.get_indexer(results['away_team'])])
+        match_days = np.sort(_team_days(sides, np.tile(result_days, 2)))
+        return cls(
+            scorers=pd.Index(scorers, name='scorer'),
+            teams=pd.Index(teams, name='team'),
+            tournaments=pd.Index(tournaments, name='tournament'),
+            player=player.astype(np.int32),
+            team=teams.get_indexer(goalscorers['team']).astype(np.int32),
+            tournament=tournament.astype(np.int32),
+            match=match.astype(np.int32),
+            day=_days(goalscorers['date']).astype(np.int32),
+            penalty=goalscorers['penalty'].to_numpy(bool),
+            own_goal=goalscorers['own_goal'].to_numpy(bool),
+            match_days=match_days,
+        )
+
+    def __len__(self):
+        return len(self.player)
+
+    def player_id(self, name):
+        """Integer ID of a scorer, with the closest spelling suggested for unknown names."""
+        position = self.scorers.get_indexer([name])[0]
+        if position < 0:
+            close = difflib.get_close_matches(name, self.scorers.tolist(), n=1)
+            raise ValueError(f"No goals by '{name}'" +
+                             (f" (did you mean '{close[0]}'?)" if close else ''))
+        return position
+
+    # ------------------------------------------------------------------
+    # Leaderboards
+    # ------------------------------------------------------------------
+    def _groups(self, by):
+        """Group code of every goal and the group labels for a grouping, computed once."""
+        if by == 'team':
+            return self.team, self.teams
+        if by == 'tournament':
+            return self.tournament, self.tournaments
+        if by not in self._periods:
+            years = self.day.astype('datetime64[D]').astype('datetime64[Y]').astype(np.int64) + 1970
+            values = decade_of(years) if by == 'decade' else years
+            codes, labels = pd.factorize(values, sort=True)
+            self._periods[by] = codes.astype(np.int32), pd.Index(labels, name=by)
+        return self._periods[by]
+
+    @staticmethod
+    def _group_code(by, labels, value):
+        if by in ('decade', 'year'):
+            value = int(str(value).rstrip('s'))
+        position = labels.get_indexer([value])[0]
+        if position < 0:
+            close = difflib.get_close_matches(str(value), labels.astype(str).tolist(), n=1)
+            raise ValueError(f"No goals for {by} '{value}'" +
+                             (f" (did you mean '{close[0]}'?)" if close else ''))
+        return position
+
+    def leaderboard(self, by=None, top_n=10, penalties=True, group=None):
+        """Leading scorers overall, or per team, decade, year or tournament.
+
+        Own goals never count and penalties=False leaves out penalty kicks
+        too. group restricts a grouped leaderboard to one team, decade, year
+        or tournament. Returns the grouping column (when grouped), rank,
+        scorer and goals, groups in label order.
+        """
+        if by is not None and by not in GROUPINGS:
+            raise ValueError(f"Unknown grouping '{by}' (available: {', '.join(GROUPINGS)})")
+        mask = (self.player >= 0) & ~self.own_goal
+        if not penalties:
+            mask &= ~self.penalty
+        if by is None:
+            groups = np.zeros(len(self), dtype=np.int64)
+        else:
+            groups, labels = self._groups(by)
+            mask &= groups >= 0
+            if group is not None:
+                mask &= groups == self._group_code(by, labels, group)
+        n = len(self.scorers)
+        group_ids, player_ids, goals = count_pairs(groups[mask], self.player[mask], n)
+        # Distinct scores: more goals first, then the scorer that appeared first
+        top = grouped_top_k(group_ids, goals * n + (n - 1 - player_ids), top_n)
+        group_ids, player_ids, goals = group_ids[top], player_ids[top], goals[top]
+        rank = np.arange(len(top)) - np.searchsorted(group_ids, group_ids) + 1
+        board = pd.DataFrame({'rank': rank, 'scorer': self.scorers[player_ids],
+                              'goals': goals})
+        if by is not None:
+            board.insert(0, by, labels[group_ids])
+        return board
+
+    # ------------------------------------------------------------------
+    # Careers
+    # ------------------------------------------------------------------
+    def careers(self):
+        """One row per scorer: tallies, career span and goals per match, computed once.
+
+        goals excludes own goals. first_goal and last_goal bound the
+        scorer's goals (own goals excluded), team is the side they scored
+        most for and team_matches counts that side's matches within the
+        span. Lineups are not in the data, so goals_per_match divides by
+        team_matches, an upper bound on appearances.
+        """
+        if self._careers is not None:
+            return self._careers
+        n = len(self.scorers)
+        known = self.player >= 0
+        scored = known & ~self.own_goal
+        player = self.player[scored]
+        goals = np.bincount(player, minlength=n)
+        penalties = np.bincount(self.player[scored & self.penalty], minlength=n)
+        own_goals = np.bincount(self.player[known & self.own_goal], minlength=n)
+        # Sorted (scorer, day) keys: each scorer's run starts at the first goal, ends at the last
+        first = np.zeros(n, dtype=np.int64)
+        last = np.zeros(n, dtype=np.int64)
+        keys = np.sort(_team_days(player, self.day[scored]))
+        if len(keys):
+            owner, days = keys >> 32, (keys & 0xFFFFFFFF) - (1 << 31)
+            starts = np.flatnonzero(np.concatenate([[True], owner[1:] != owner[:-1]]))
+            first[owner[starts]] = days[starts]
+            last[owner[starts]] = days[np.append(starts[1:], len(keys)) - 1]
+        linked = scored & (self.match >= 0)
+        scoring_matches = np.bincount(
+            count_pairs(self.player[linked], self.match[linked], int(self.match.max(initial=0)) + 1)[0],
+            minlength=n)
+
+        # Main team: most goals, alphabetical on ties
+        with_team = scored & (self.team >= 0)
+        players, teams, counts = count_pairs(self.player[with_team], self.team[with_team],
+                                             len(self.teams))
+        best = grouped_top_k(players, counts * len(self.teams) + (len(self.teams) - 1 - teams), 1)
+        main_team = np.full(n, -1, dtype=np.int64)
+        main_team[players[best]] = teams[best]
+
+        span = (main_team >= 0) & (goals > 0)
+        team_matches = np.zeros(n, dtype=np.int64)
+        team_matches[span] = (
+            _search(self.match_days, _team_days(main_team[span], last[span]), 'right') -
+            _search(self.match_days, _team_days(main_team[span], first[span]), 'left'))
+
+        dates = np.full(n, np.datetime64('NaT'), dtype='datetime64[D]')
+        self._careers = pd.DataFrame({
+            'team': np.where(main_team >= 0, np.asarray(self.teams, dtype=object)[main_team], None),
+            'goals': goals,
+            'penalties': penalties,
+            'own_goals': own_goals,
+            'first_goal': np.where(goals > 0, first.astype('datetime64[D]'), dates),
+            'last_goal': np.where(goals > 0, last.astype('datetime64[D]'), dates),
+            'scoring_matches': scoring_matches,
+            'team_matches': team_matches,
+            'goals_per_match': np.round(goals / np.where(team_matches > 0, team_matches, np.nan), 3),
+        }, index=self.scorers)
+        return self._careers
+
+    def career(self, name):
+        """Career row of one scorer (see careers())."""
+        return self.careers().iloc[self.player_id(name)]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[-1])
+    parser.add_argument('--data-dir', default='data', help='directory holding the CSV datasets')
+    parser.add_argument('--by', choices=GROUPINGS,
+                        help='leaderboard per team, decade, year or tournament (default: overall)')
+    parser.add_argument('--group', metavar='VALUE',
+                        help='only this team, decade, year or tournament (needs --by)')
+    parser.add_argument('--top', type=int, default=10, metavar='N', help='scorers per leaderboard')
+    parser.add_argument('--no-penalties', action='store_true', help='leave out penalty goals')
+    parser.add_argument('--player', metavar='NAME', help='print the career of one scorer')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    from data_loader import load_datasets
+
+    args = parse_args()
+    results, goalscorers, _ = load_datasets(args.data_dir, verbose=False)
+    start = time.perf_counter()
+    index = ScorerIndex.build(goalscorers, results)
+    built = time.perf_counter() - start
+    try:
+        start = time.perf_counter()
+        board = index.leaderboard(args.by, args.top, not args.no_penalties, args.group)
+        queried = time.perf_counter() - start
+        career = index.career(args.player) if args.player else None
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    print(f"{len(index):,} goals by {len(index.scorers):,} scorers: index built in "
+          f"{built * 1000:.1f} ms, leaderboard in {queried * 1000:.1f} ms")
+    print(board.to_string(index=False))
+    if career is not None:
+        print(f"\n{args.player}\n{career.to_string()}")
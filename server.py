@@ -0,0 +1,270 @@
+"""
+Football Match Analysis - Analytics Server
+Serves chart aggregates as JSON and rendered charts as PNG from in-memory data
+"""
+
+import argparse
+import io
+import json
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import charts
+from chart_stats import (date_index, elo_ratings, head_to_head, match_cube, prepare_data,
+                         scorer_index, table_records, team_matches, team_shootouts)
+from charts import CHARTS, DATE_RANGE_PARAMS
+from data_loader import load_datasets, source_fingerprint
+from date_index import parse_date_range
+from tournament_taxonomy import DEFAULT_TAXONOMY
+from validation import validate_datasets
+
+DEFAULT_CACHE_MB = 64
+JSON_CACHE_MB = 16
+
+
+class ByteLRU:
+    """Thread-safe LRU of bytes values bounded by their total size."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._items), 'bytes': self.size, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+class AnalyticsService:
+    """Datasets loaded once, plus cached per-parameter chart tables and images."""
+
+    def __init__(self, data_dir='data', cache_bytes=DEFAULT_CACHE_MB << 20,
+                 taxonomy_path=DEFAULT_TAXONOMY):
+        frames = load_datasets(data_dir)
+        # Same data-quality gate as generate_charts: rejected rows are never served
+        frames, self.validation = validate_datasets(*frames)
+        print('\n'.join(self.validation.summary()))
+        self.data = prepare_data(*frames)
+        self.data['elo_checkpoint'] = Path(data_dir) / '.cache' / 'elo.npz'
+        self.data['head_to_head_checkpoint'] = Path(data_dir) / '.cache' / 'head_to_head.npz'
+        self.data['cube_checkpoint'] = Path(data_dir) / '.cache' / 'match_cube.npz'
+        self.data['cube_source'] = source_fingerprint(data_dir, ('results', 'former_names'))
+        self.data['taxonomy_path'] = taxonomy_path
+        # Fill every lazily memoized full-range input now; table() keeps the
+        # per-range ones out of self.data
+        date_index(self.data)
+        team_matches(self.data)
+        team_shootouts(self.data)
+        match_cube(self.data)
+        scorer_index(self.data)
+        elo_ratings(self.data)
+        head_to_head(self.data)
+        self.json_cache = ByteLRU(JSON_CACHE_MB << 20)
+        self.image_cache = ByteLRU(cache_bytes)
+        # pyplot keeps global figure state, so renders run one at a time
+        self._render_lock = threading.Lock()
+
+    def chart_params(self, chart_id, query):
+        """Chart parameters from a query string, validated against the chart's defaults.
+
+        Every chart also takes start and end dates, normalized to ISO dates
+        so equivalent spellings share a cache entry.
+        """
+        if chart_id not in CHARTS:
+            raise KeyError(chart_id)
+        defaults = CHARTS[chart_id].params
+        params = dict(defaults)
+        start, end = parse_date_range(*(query.get(name, [None])[-1] for name in DATE_RANGE_PARAMS))
+        for name, value in zip(DATE_RANGE_PARAMS, (start, end)):
+            if value is not None:
+                params[name] = value.date().isoformat()
+        for name, values in query.items():
+            if name in DATE_RANGE_PARAMS:
+                continue
+            if name not in defaults:
+                allowed = ', '.join(list(defaults) + list(DATE_RANGE_PARAMS))
+                raise ValueError(f"Unknown parameter '{name}' for chart {chart_id} (allowed: {allowed})")
+            try:
+                params[name] = type(defaults[name])(values[-1])
+            except ValueError:
+                raise ValueError(f"Invalid value for '{name}': {values[-1]!r}")
+            if isinstance(params[name], (int, float)) and params[name] < 0:
+                raise ValueError(f"'{name}' must not be negative")
+        return params
+
+    @staticmethod
+    def cache_key(chart_id, params):
+        return (chart_id,) + tuple(sorted(params.items()))
+
+    def table(self, chart_id, params):
+        # A date range memoizes its window, and the cube, scorer index and
+        # features built over it, into the dict it is given: a shallow copy
+        # per request keeps request threads from writing to self.data
+        return charts.compute_chart(chart_id, dict(self.data), **params)
+
+    def chart_json(self, chart_id, params):
+        key = self.cache_key(chart_id, params)
+        body = self.json_cache.get(key)
+        if body is None:
+            document = {
+                'chart': chart_id,
+                'title': CHARTS[chart_id].title,
+                'params': params,
+                'data': table_records(self.table(chart_id, params)),
+            }
+            body = json.dumps(document, ensure_ascii=False).encode('utf-8')
+            self.json_cache.put(key, body)
+        return body
+
+    def chart_png(self, chart_id, params):
+        key = self.cache_key(chart_id, params)
+        body = self.image_cache.get(key)
+        if body is not None:
+            return body
+        table = self.table(chart_id, params)
+        render = charts.renderer(chart_id)
+        with self._render_lock:
+            # Another thread may have rendered the same key while we waited
+            body = self.image_cache.get(key)
+            if body is None:
+                buffer = io.BytesIO()
+                render(table, buffer)
+                body = buffer.getvalue()
+                self.image_cache.put(key, body)
+        return body
+
+    def index(self):
+        dates = date_index(self.data)
+        return json.dumps({
+            'dates': {'first': dates.first_date.date().isoformat(),
+                      'last': dates.last_date.date().isoformat()},
+            'charts': [{'id': chart.id, 'title': chart.title, 'summary': chart.summary,
+                        'params': chart.params} for chart in CHARTS.values()],
+            'caches': {'json': self.json_cache.stats(), 'png': self.image_cache.stats()},
+            'validation': self.validation.to_dict(),
+        }, ensure_ascii=False).encode('utf-8')
+
+
+class AnalyticsHandler(BaseHTTPRequestHandler):
+    """GET /charts, /charts/<id>.json?param=value and /charts/<id>.png?param=value."""
+
+    service = None
+    quiet = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        try:
+            if parts in ([], ['charts']):
+                return self.send_body(HTTPStatus.OK, 'application/json', self.service.index())
+            if len(parts) == 2 and parts[0] == 'charts' and '.' in parts[1]:
+                chart_id, kind = parts[1].rsplit('.', 1)
+                chart_id = f'{int(chart_id):02d}' if chart_id.isdigit() else chart_id
+                params = self.service.chart_params(chart_id, parse_qs(url.query))
+                if kind == 'json':
+                    body = self.service.chart_json(chart_id, params)
+                    return self.send_body(HTTPStatus.OK, 'application/json', body)
+                if kind == 'png':
+                    body = self.service.chart_png(chart_id, params)
+                    return self.send_body(HTTPStatus.OK, 'image/png', body)
+            self.send_error_json(HTTPStatus.NOT_FOUND, f'No route for {url.path}')
+        except KeyError as exc:
+            self.send_error_json(HTTPStatus.NOT_FOUND, f'Unknown chart {exc}')
+        except ValueError as exc:
+            self.send_error_json(HTTPStatus.BAD_REQUEST, str(exc))
+        except Exception as exc:
+            # Answer instead of dropping the connection; the traceback goes to stderr
+            traceback.print_exc()
+            self.send_error_json(HTTPStatus.INTERNAL_SERVER_ERROR,
+                                 f'{type(exc).__name__}: {exc}')
+
+    def send_body(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message):
+        self.send_body(status, 'application/json', json.dumps({'error': message}).encode('utf-8'))
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(service, host='127.0.0.1', port=8000, quiet=True):
+    handler = type('Handler', (AnalyticsHandler,), {'service': service, 'quiet': quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[-1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--data-dir', default='data', help='directory holding the CSV datasets')
+    parser.add_argument('--cache-mb', type=int, default=DEFAULT_CACHE_MB,
+                        help=f'size limit of the rendered-chart cache (default: {DEFAULT_CACHE_MB} MB)')
+    parser.add_argument('--taxonomy', default=DEFAULT_TAXONOMY, metavar='PATH',
+                        help='tournament taxonomy config (default: tournament_taxonomy.json)')
+    parser.add_argument('--log', action='store_true', help='log every request')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    print("Loading datasets...")
+    try:
+        service = AnalyticsService(args.data_dir, cache_bytes=args.cache_mb << 20,
+                                   taxonomy_path=args.taxonomy)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    server = make_server(service, args.host, args.port, quiet=not args.log)
+    print(f"Ready in {time.perf_counter() - start:.1f}s: serving {len(CHARTS)} charts on "
+          f"http://{args.host}:{server.server_port}/charts")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
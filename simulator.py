@@ -0,0 +1,377 @@
+"""
+Football Match Analysis - Tournament Simulator
+Monte Carlo group and knockout brackets from fitted Poisson team strengths,
+simulated as batched NumPy arrays across a process pool
+"""
+
+import argparse
+import difflib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+# Match weights halve every HALF_LIFE_YEARS; older than WINDOW_YEARS is ignored
+HALF_LIFE_YEARS = 4.0
+WINDOW_YEARS = 16
+# Pseudo-matches at the average rate added to every team, so a handful of
+# results against weak opposition cannot produce an extreme strength
+PRIOR_MATCHES = 4.0
+# Pseudo shootouts won and lost added to every team's shootout record
+SHOOTOUT_PRIOR = 3.0
+# Extra time as a share of a 90-minute goal rate
+EXTRA_TIME = 1 / 3
+DEFAULT_SIMS = 200_000
+# Tournaments per shard; results depend on seed and shard size, not on --jobs
+SHARD_SIMS = 25_000
+
+
+def _round_name(teams):
+    return {2: 'Final', 4: 'Semi-finals', 8: 'Quarter-finals'}.get(teams, f'Round of {teams}')
+
+
+class PoissonModel:
+    """Multiplicative Poisson goal model fitted from results.
+
+    Team i is expected to score attack[i] * defence[j] goals against team j
+    on neutral ground, times home when i plays in its own country and j does
+    not. defence is normalized to a mean of 1, so attack is a goal rate
+    against average opposition. shootout[i] is the shrunk share of penalty
+    shootouts i has won.
+    """
+
+    def __init__(self, teams, attack, defence, home, shootout, matches=0, venue_matches=0):
+        self.teams = list(teams)
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+        self.attack = attack
+        self.defence = defence
+        self.home = home
+        self.shootout = shootout
+        self.matches = matches
+        self.venue_matches = venue_matches
+
+    @classmethod
+    def fit(cls, results, shootouts=None, as_of=None, half_life_years=HALF_LIFE_YEARS,
+            window_years=WINDOW_YEARS, iterations=500, tolerance=1e-10):
+        """Fit strengths by weighted iterative scaling (the Poisson MLE fixed point).
+
+        Each pass sets every attack to goals scored over goals expected per
+        unit of attack, then every defence likewise, then the home effect
+        from the non-neutral matches only; all three are closed-form
+        weighted sums (one bincount per side).
+        """
+        end = results['date'].max() if as_of is None else pd.Timestamp(as_of)
+        dates = results['date']
+        matches = results[(dates <= end) & (dates > end - pd.DateOffset(years=window_years))]
+        if matches.empty:
+            raise ValueError(f"No matches in the {window_years} years up to {end.date()}")
+
+        n = len(matches)
+        codes, teams = pd.factorize(pd.concat([matches['home_team'].astype(str),
+                                               matches['away_team'].astype(str)],
+                                              ignore_index=True))
+        home, away = codes[:n], codes[n:]
+        size = len(teams)
+        age = (end - matches['date']).dt.days.to_numpy() / 365.25
+        weight = 0.5 ** (age / half_life_years)
+        home_goals = matches['home_score'].to_numpy(np.float64)
+        away_goals = matches['away_score'].to_numpy(np.float64)
+        venue = ~matches['neutral'].to_numpy(bool)
+
+        def per_team(home_values, away_values):
+            return (np.bincount(home, home_values, size) + np.bincount(away, away_values, size))
+
+        scored = per_team(weight * home_goals, weight * away_goals)
+        conceded = per_team(weight * away_goals, weight * home_goals)
+        venue_goals = (weight * home_goals)[venue].sum()
+        attack = np.full(size, scored.sum() / weight.sum() / 2)
+        defence = np.ones(size)
+        home_effect = 1.0
+        for _ in range(iterations):
+            boost = np.where(venue, home_effect, 1.0)
+            exposure = per_team(weight * boost * defence[away], weight * defence[home])
+            new_attack = ((scored + PRIOR_MATCHES * scored.sum() / exposure.sum()) /
+                          (exposure + PRIOR_MATCHES))
+            faced = per_team(weight * new_attack[away], weight * boost * new_attack[home])
+            new_defence = ((conceded + PRIOR_MATCHES * conceded.sum() / faced.sum()) /
+                           (faced + PRIOR_MATCHES))
+            scale = new_defence.mean()
+            new_defence /= scale
+            new_attack *= scale
+            expected = (weight * new_attack[home] * new_defence[away])[venue].sum()
+            new_home = venue_goals / expected if expected else 1.0
+            change = max(np.abs(np.log(new_attack / attack)).max(),
+                         np.abs(np.log(new_defence / defence)).max(),
+                         abs(np.log(new_home / home_effect)))
+            attack, defence, home_effect = new_attack, new_defence, new_home
+            if change < tolerance:
+                break
+
+        shootout = np.full(size, 0.5)
+        if shootouts is not None and len(shootouts):
+            played = shootouts[shootouts['date'] <= end]
+            index = pd.Index(teams)
+            sides = index.get_indexer(pd.concat([played['home_team'].astype(str),
+                                                 played['away_team'].astype(str)]))
+            winners = index.get_indexer(played['winner'].astype(str))
+            taken = np.bincount(sides[sides >= 0], minlength=size)
+            won = np.bincount(winners[winners >= 0], minlength=size)
+            shootout = (won + SHOOTOUT_PRIOR) / (taken + 2 * SHOOTOUT_PRIOR)
+        return cls(teams, attack, defence, home_effect, shootout, n, int(venue.sum()))
+
+    def codes(self, names):
+        """Team codes for names, with close spellings suggested for unknown ones."""
+        missing = [name for name in names if name not in self.team_index]
+        if missing:
+            hints = []
+            for name in missing:
+                close = difflib.get_close_matches(name, self.teams, n=1)
+                hints.append(f"'{name}'" + (f" (did you mean '{close[0]}'?)" if close else ''))
+            raise ValueError(f"No fitted matches for {', '.join(hints)}")
+        return np.array([self.team_index[name] for name in names], dtype=np.int64)
+
+    def goal_rates(self, names, hosts=()):
+        """(n, n) matrix of goals expected from names[i] against names[j]."""
+        codes = self.codes(names)
+        hosting = np.isin(np.asarray(names, dtype=object), list(hosts))
+        boost = np.where(hosting[:, None] & ~hosting[None, :], self.home, 1.0)
+        return np.outer(self.attack[codes], self.defence[codes]) * boost
+
+    def shootout_odds(self, names):
+        """(n, n) matrix of the chance names[i] wins a shootout against names[j] (log5)."""
+        p = self.shootout[self.codes(names)]
+        win = p[:, None] * (1 - p[None, :])
+        return win / (win + p[None, :] * (1 - p[:, None]))
+
+    def table(self):
+        """Strengths per team, strongest expected goal difference first."""
+        table = pd.DataFrame({'attack': self.attack, 'defence': self.defence,
+                              'shootout': self.shootout}, index=pd.Index(self.teams, name='team'))
+        net = np.log(table['attack']) - np.log(table['defence'])
+        return table.iloc[np.argsort(-net.to_numpy(), kind='stable')]
+
+
+class Bracket:
+    """Optional group stage feeding a single-elimination knockout.
+
+    Built from a config like brackets/world_cup_2022.json:
+    {"name", "as_of", "hosts": [...], "groups": {"A": [teams], ...},
+     "knockout": ["A1", "B2", ...]}. Knockout slots are a group name plus
+    finishing position, or a team name. Adjacent slots meet in the first
+    round and the winners of adjacent ties meet in the next. Groups are a
+    round robin ranked on points, goal difference and goals scored, with
+    remaining ties drawn by lot.
+    """
+
+    def __init__(self, config):
+        self.name = config.get('name', 'Tournament')
+        self.as_of = config.get('as_of')
+        self.hosts = list(config.get('hosts', []))
+        groups = config.get('groups', {})
+        knockout = list(config.get('knockout', []))
+        if len(knockout) < 2 or len(knockout) & (len(knockout) - 1):
+            raise ValueError("Bracket 'knockout' needs a power-of-two number of slots (2, 4, 8, ...)")
+        if any(len(teams) < 2 for teams in groups.values()):
+            raise ValueError("Every group needs at least two teams")
+
+        self.teams = []
+        for teams in groups.values():
+            self.teams.extend(teams)
+        self.group_names = list(groups)
+        position = {name: i for i, name in enumerate(self.teams)}
+        self.groups = [np.array([position[team] for team in teams]) for teams in groups.values()]
+
+        # Each slot is (group, place) for a group finisher or (-1, team) for a seeded team
+        self.slots = []
+        for slot in knockout:
+            group, place = slot[:-1], slot[-1:]
+            if group in groups and place.isdigit():
+                place = int(place)
+                if not 1 <= place <= len(groups[group]):
+                    raise ValueError(f"Knockout slot '{slot}': group {group} has "
+                                     f"{len(groups[group])} teams")
+                self.slots.append((self.group_names.index(group), place - 1))
+            else:
+                if slot not in position:
+                    position[slot] = len(self.teams)
+                    self.teams.append(slot)
+                self.slots.append((-1, position[slot]))
+        if len(set(self.teams)) != len(self.teams):
+            raise ValueError("A team appears in more than one group")
+        if len(set(knockout)) != len(knockout):
+            raise ValueError("A knockout slot is listed twice")
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def columns(self):
+        """Outcome columns counted per team: group winner, each round reached, champion."""
+        rounds = []
+        size = len(self.slots)
+        while size > 1:
+            rounds.append(_round_name(size))
+            size //= 2
+        return (['Win Group'] if self.groups else []) + rounds + ['Champion']
+
+    def group_of(self):
+        labels = [''] * len(self.teams)
+        for name, members in zip(self.group_names, self.groups):
+            for i in members:
+                labels[i] = name
+        return labels
+
+
+def _play_groups(bracket, rates, sims, rng):
+    """Final standings of every group, as (sims, group size) arrays of team indices."""
+    standings = []
+    for members in bracket.groups:
+        size = len(members)
+        first, second = np.array(list(combinations(range(size), 2))).T
+        # Float goal counts are exact and let the matrix products below use BLAS
+        goals_first = rng.poisson(rates[members[first], members[second]],
+                                  (sims, len(first))).astype(np.float64)
+        goals_second = rng.poisson(rates[members[second], members[first]],
+                                   (sims, len(first))).astype(np.float64)
+        # One-hot (fixture x team) incidence turns per-fixture arrays into per-team sums
+        on_first = np.eye(size)[first]
+        on_second = np.eye(size)[second]
+        draws = goals_first == goals_second
+        points = ((3 * (goals_first > goals_second) + draws) @ on_first +
+                  (3 * (goals_second > goals_first) + draws) @ on_second)
+        scored = goals_first @ on_first + goals_second @ on_second
+        conceded = goals_second @ on_first + goals_first @ on_second
+        # Goal counts stay far below 2**10, so one float key sorts on all three criteria
+        key = (points * 2 ** 20 + (scored - conceded + 2 ** 9) * 2 ** 10 + scored +
+               rng.random((sims, size)))
+        standings.append(members[np.argsort(-key, axis=1)])
+    return standings
+
+
+def _play_knockout(first, second, rates, odds, rng):
+    """Winners of ties first[i, k] vs second[i, k]: 90 minutes, extra time, shootout."""
+    rate_first, rate_second = rates[first, second], rates[second, first]
+    goals_first = rng.poisson(rate_first)
+    goals_second = rng.poisson(rate_second)
+    level = goals_first == goals_second
+    goals_first[level] += rng.poisson(rate_first[level] * EXTRA_TIME)
+    goals_second[level] += rng.poisson(rate_second[level] * EXTRA_TIME)
+    level = goals_first == goals_second
+    first_wins = goals_first > goals_second
+    first_wins[level] = rng.random(int(level.sum())) < odds[first[level], second[level]]
+    return np.where(first_wins, first, second)
+
+
+def simulate(bracket, rates, odds, sims, rng):
+    """Counts per team (rows in bracket.teams order) of each bracket.columns() outcome."""
+    counts = []
+    size = len(bracket.teams)
+    standings = _play_groups(bracket, rates, sims, rng)
+    if standings:
+        counts.append(np.bincount(np.concatenate([table[:, 0] for table in standings]),
+                                  minlength=size))
+    alive = np.column_stack([standings[group][:, place] if group >= 0 else np.full(sims, place)
+                             for group, place in bracket.slots])
+    while True:
+        counts.append(np.bincount(alive.ravel(), minlength=size))
+        if alive.shape[1] == 1:
+            break
+        alive = _play_knockout(alive[:, 0::2], alive[:, 1::2], rates, odds, rng)
+    return np.column_stack(counts)
+
+
+def _simulate_shard(bracket, rates, odds, sims, seed):
+    return simulate(bracket, rates, odds, sims, np.random.default_rng(seed))
+
+
+def run_simulation(model, bracket, sims=DEFAULT_SIMS, jobs=1, seed=0, shard_sims=SHARD_SIMS):
+    """Advancement probabilities per team, plus throughput statistics.
+
+    The sims are split into fixed-size shards, each with its own child of
+    SeedSequence(seed), so the counts are the same for any number of jobs.
+    """
+    if sims < 1 or shard_sims < 1:
+        raise ValueError('sims and shard size must be positive')
+    rates = model.goal_rates(bracket.teams, bracket.hosts)
+    odds = model.shootout_odds(bracket.teams)
+    sizes = [min(shard_sims, sims - start) for start in range(0, sims, shard_sims)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    start = time.perf_counter()
+    if jobs <= 1 or len(sizes) == 1:
+        counts = sum(_simulate_shard(bracket, rates, odds, n, s) for n, s in zip(sizes, seeds))
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(sizes))) as pool:
+            counts = sum(pool.map(_simulate_shard, *zip(*[(bracket, rates, odds, n, s)
+                                                          for n, s in zip(sizes, seeds)])))
+    elapsed = time.perf_counter() - start
+
+    table = pd.DataFrame(counts / sims, index=pd.Index(bracket.teams, name='team'),
+                         columns=bracket.columns())
+    if bracket.groups:
+        table.insert(0, 'Group', bracket.group_of())
+    order = np.lexsort([-table[column].to_numpy() for column in bracket.columns()])
+    stats = {'sims': sims, 'shards': len(sizes), 'jobs': min(max(jobs, 1), len(sizes)),
+             'seconds': elapsed, 'sims_per_sec': sims / elapsed if elapsed else float('inf')}
+    return table.iloc[order], stats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('bracket', help='bracket config, e.g. brackets/world_cup_2022.json')
+    parser.add_argument('--data-dir', default='data', help='directory holding the CSV datasets')
+    parser.add_argument('--sims', type=int, default=DEFAULT_SIMS,
+                        help=f'tournaments to simulate (default: {DEFAULT_SIMS:,})')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='simulate shards in N worker processes (0 = one per CPU)')
+    parser.add_argument('--seed', type=int, default=0, help='root seed (default: 0)')
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIMS, metavar='SIMS',
+                        help=f'tournaments per shard (default: {SHARD_SIMS:,})')
+    parser.add_argument('--as-of', metavar='DATE',
+                        help="fit strengths on matches up to DATE (default: the bracket's "
+                             "'as_of', else the latest match)")
+    parser.add_argument('--json', metavar='PATH', help='also write the probabilities to PATH')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from data_loader import load_datasets
+
+    args = parse_args(argv)
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+    try:
+        bracket = Bracket.from_file(args.bracket)
+        results, _, shootouts = load_datasets(args.data_dir, verbose=False)
+        start = time.perf_counter()
+        model = PoissonModel.fit(results, shootouts, as_of=args.as_of or bracket.as_of)
+        fit_seconds = time.perf_counter() - start
+        table, stats = run_simulation(model, bracket, args.sims, jobs, args.seed, args.shard_size)
+    except (OSError, ValueError) as exc:
+        raise SystemExit(str(exc))
+
+    print(f"{bracket.name}: strengths fitted on {model.matches:,} matches "
+          f"({model.venue_matches:,} non-neutral, home effect x{model.home:.2f}) "
+          f"in {fit_seconds:.2f}s")
+    shown = table.copy()
+    shown[bracket.columns()] = (shown[bracket.columns()] * 100).round(1)
+    with pd.option_context('display.max_rows', None, 'display.width', 120):
+        print(shown.to_string())
+    print(f"\n{stats['sims']:,} tournaments in {stats['seconds']:.2f}s "
+          f"({stats['sims_per_sec']:,.0f} sims/sec, {stats['shards']} shard(s), "
+          f"{stats['jobs']} worker(s), seed {args.seed})")
+    if args.json:
+        document = {'bracket': bracket.name, 'as_of': args.as_of or bracket.as_of,
+                    'home_effect': model.home, 'seed': args.seed, 'throughput': stats,
+                    'probabilities': table.reset_index().to_dict(orient='records')}
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2, ensure_ascii=False)
+        print(f"Probabilities written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
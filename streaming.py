@@ -0,0 +1,417 @@
+"""
+Football Match Analysis - Streaming Aggregation
+Builds every chart table from chunked CSV reads with mergeable accumulators
+"""
+
+import json
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from chart_stats import (cube_decades, cube_venues, decade_table, home_outcome_table,
+                         intensity_table, rated_teams_table, rivalries_table,
+                         tournament_frequency_table, tournament_type_table, venue_table,
+                         volume_table)
+from data_loader import load_alias_index
+from elo import EloEngine, RatingHistory, chronological
+from goal_events import minute_histogram, minute_profile
+from head_to_head import HeadToHead
+from features import OUTCOMES, FeatureSet
+from match_cube import MatchCube
+from team_names import canonicalize_teams
+from tournament_taxonomy import load_taxonomy
+from validation import validate_chunk
+
+DEFAULT_CHUNKSIZE = 100_000
+# Bump whenever the saved layout of an accumulator changes
+ACCUMULATOR_VERSION = 1
+
+
+def _merge_records(target, source):
+    """Add per-key count vectors from source into target, keeping key order."""
+    for key, values in source.items():
+        if key in target:
+            target[key] = target[key] + values
+        else:
+            target[key] = values.copy()
+
+
+def _grouped_records(keys, columns):
+    """{key: int64 vector of column sums plus a row count} in first-appearance order."""
+    frame = pd.DataFrame(dict(columns, _rows=1), index=None)
+    frame['_key'] = np.asarray(keys, dtype=object)
+    sums = frame.groupby('_key', sort=False).sum()
+    return dict(zip(sums.index, sums.to_numpy(dtype=np.int64)))
+
+
+def _records_arrays(name, records, width):
+    """Arrays for saving a {key: count vector} dict, keeping its key order."""
+    values = np.array(list(records.values()), dtype=np.int64).reshape(len(records), width)
+    return {f'{name}_keys': np.array(list(records), dtype=str), f'{name}_values': values}
+
+
+def _records_from(saved, name):
+    return dict(zip(saved[f'{name}_keys'].tolist(), saved[f'{name}_values']))
+
+
+def _save_checkpoint(path, fingerprint, rows, arrays):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp.npz')
+    meta = {'version': ACCUMULATOR_VERSION, 'rows': rows, 'fingerprint': fingerprint}
+    np.savez(tmp, meta=np.array(json.dumps(meta)), **arrays)
+    tmp.replace(path)
+
+
+def _load_checkpoint(path):
+    """(arrays, meta) of a saved accumulator, or (None, None) if unreadable or outdated."""
+    try:
+        with np.load(path, allow_pickle=False) as saved:
+            meta = json.loads(str(saved['meta']))
+            if meta.get('version') != ACCUMULATOR_VERSION:
+                return None, None
+            return {name: saved[name] for name in saved.files}, meta
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _ordered_union(first, second):
+    """Team order used by the in-memory path: home sides first, then away-only teams."""
+    return list(first) + [key for key in second if key not in first]
+
+
+class ResultsAccumulator:
+    """Partial aggregates over results.csv rows.
+
+    Match counts and goal sums go into a MatchCube, per-team records into
+    count vectors keyed by team, so two accumulators built from different
+    chunks can be merged exactly.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.cube = MatchCube()
+        self.home_records = {}            # team -> [wins, draws, losses, gf, ga, matches]
+        self.away_records = {}
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        features = FeatureSet(chunk)
+        self.cube.update(chunk, features)
+        home_score, away_score = chunk['home_score'], chunk['away_score']
+        home_win = features['home_win'].to_numpy()
+        away_win = features['away_win'].to_numpy()
+        draw = features['draw'].to_numpy()
+        _merge_records(self.home_records, _grouped_records(chunk['home_team'], {
+            'wins': home_win, 'draws': draw, 'losses': away_win,
+            'goals_for': home_score.to_numpy(), 'goals_against': away_score.to_numpy()}))
+        _merge_records(self.away_records, _grouped_records(chunk['away_team'], {
+            'wins': away_win, 'draws': draw, 'losses': home_win,
+            'goals_for': away_score.to_numpy(), 'goals_against': home_score.to_numpy()}))
+        return self
+
+    def merge(self, other):
+        """Fold in an accumulator built from rows that come after this one's."""
+        self.rows += other.rows
+        self.cube.merge(other.cube)
+        _merge_records(self.home_records, other.home_records)
+        _merge_records(self.away_records, other.away_records)
+        return self
+
+    def team_records(self):
+        """Per-team totals matching chart_stats.team_records() on the full frame."""
+        teams = _ordered_union(self.home_records, self.away_records)
+        zero = np.zeros(6, dtype=np.int64)
+        rows = np.array([self.home_records.get(t, zero) + self.away_records.get(t, zero)
+                         for t in teams])
+        records = pd.DataFrame(rows.reshape(-1, 6), index=pd.Index(teams, name='team'),
+                               columns=['wins', 'draws', 'losses', 'goals_for', 'goals_against',
+                                        'matches'])
+        return records[['matches', 'wins', 'draws', 'losses', 'goals_for', 'goals_against']]
+
+    def save(self, path, fingerprint):
+        """Save the records; the cube goes to its own file next to path."""
+        path = Path(path)
+        self.cube.save(path.with_name(path.stem + '_cube.npz'), fingerprint)
+        _save_checkpoint(path, fingerprint, self.rows,
+                         {**_records_arrays('home', self.home_records, 6),
+                          **_records_arrays('away', self.away_records, 6)})
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        saved, meta = _load_checkpoint(path)
+        cube, cube_meta = MatchCube.load(path.with_name(path.stem + '_cube.npz'))
+        if saved is None or cube is None or cube_meta['fingerprint'] != meta['fingerprint']:
+            return None, None
+        accumulator = cls()
+        accumulator.rows = meta['rows']
+        accumulator.cube = cube
+        accumulator.home_records = _records_from(saved, 'home')
+        accumulator.away_records = _records_from(saved, 'away')
+        return accumulator, meta
+
+
+class GoalscorersAccumulator:
+    """Partial aggregates over goalscorers.csv rows: minute histogram, methods, scorers."""
+
+    def __init__(self):
+        self.rows = 0
+        self.minutes = Counter()          # minute (or None when unknown) -> goals
+        self.methods = np.zeros(3, dtype=np.int64)  # open play / penalty / own goal
+        self.scorers = Counter()          # scorer -> goals (own goals excluded)
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        minute = chunk['minute']
+        self.minutes.update(minute.value_counts(sort=False).to_dict())
+        self.minutes[None] += int(minute.isna().sum())
+        own_goal = chunk['own_goal'].astype(bool)
+        penalty = chunk['penalty'].astype(bool)
+        self.methods += [(~penalty & ~own_goal).sum(), penalty.sum(), own_goal.sum()]
+        self.scorers.update(chunk.loc[~own_goal, 'scorer'].value_counts(sort=False).to_dict())
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.minutes.update(other.minutes)
+        self.methods += other.methods
+        self.scorers.update(other.scorers)
+        return self
+
+    def save(self, path, fingerprint):
+        # Unknown minutes (the None key) are saved as NaN
+        minutes = np.array([np.nan if minute is None else minute for minute in self.minutes],
+                           dtype=np.float64)
+        _save_checkpoint(path, fingerprint, self.rows, {
+            'minutes': minutes,
+            'minute_goals': np.array(list(self.minutes.values()), dtype=np.int64),
+            'methods': self.methods,
+            'scorers': np.array(list(self.scorers), dtype=str),
+            'scorer_goals': np.array(list(self.scorers.values()), dtype=np.int64),
+        })
+
+    @classmethod
+    def load(cls, path):
+        saved, meta = _load_checkpoint(path)
+        if saved is None:
+            return None, None
+        accumulator = cls()
+        accumulator.rows = meta['rows']
+        accumulator.minutes = Counter(dict(zip(
+            [None if np.isnan(minute) else minute for minute in saved['minutes'].tolist()],
+            saved['minute_goals'].tolist())))
+        accumulator.methods = saved['methods']
+        accumulator.scorers = Counter(dict(zip(saved['scorers'].tolist(),
+                                               saved['scorer_goals'].tolist())))
+        return accumulator, meta
+
+
+class ShootoutsAccumulator:
+    """Partial aggregates over shootouts.csv rows: per-team shootouts and wins."""
+
+    def __init__(self):
+        self.rows = 0
+        self.home_records = {}            # team -> [wins, shootouts]
+        self.away_records = {}
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for side, records in (('home_team', self.home_records), ('away_team', self.away_records)):
+            won = (chunk[side] == chunk['winner']).to_numpy()
+            _merge_records(records, _grouped_records(chunk[side], {'won': won}))
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        _merge_records(self.home_records, other.home_records)
+        _merge_records(self.away_records, other.away_records)
+        return self
+
+    def shootout_records(self):
+        teams = _ordered_union(self.home_records, self.away_records)
+        zero = np.zeros(2, dtype=np.int64)
+        rows = np.array([self.home_records.get(t, zero) + self.away_records.get(t, zero)
+                         for t in teams])
+        records = pd.DataFrame(rows.reshape(-1, 2), index=pd.Index(teams, name='team'),
+                               columns=['wins', 'shootouts'])
+        return records[['shootouts', 'wins']]
+
+    def save(self, path, fingerprint):
+        _save_checkpoint(path, fingerprint, self.rows,
+                         {**_records_arrays('home', self.home_records, 2),
+                          **_records_arrays('away', self.away_records, 2)})
+
+    @classmethod
+    def load(cls, path):
+        saved, meta = _load_checkpoint(path)
+        if saved is None:
+            return None, None
+        accumulator = cls()
+        accumulator.rows = meta['rows']
+        accumulator.home_records = _records_from(saved, 'home')
+        accumulator.away_records = _records_from(saved, 'away')
+        return accumulator, meta
+
+
+def accumulate_csv(path, accumulator, chunksize=DEFAULT_CHUNKSIZE, alias_index=None,
+                   consumers=(), report=None):
+    """Feed a CSV through an accumulator chunk by chunk.
+
+    consumers are extra objects with an update(chunk) method (such as an
+    EloEngine) that see the same canonicalized chunks. With a
+    ValidationReport, each chunk is validated first and rejected rows never
+    reach the accumulators.
+    """
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        if report is not None:
+            chunk = validate_chunk(Path(path).stem, chunk, report)
+        if alias_index is not None:
+            canonicalize_teams(chunk, alias_index)
+        accumulator.update(chunk)
+        for consumer in consumers:
+            consumer.update(chunk)
+    return accumulator
+
+
+class StreamingElo(EloEngine):
+    """EloEngine fed straight from CSV chunks.
+
+    Ratings are sequential, so unlike the accumulators this cannot be
+    merged; it relies on results.csv being in date order (rows are only
+    sorted within each chunk). Instead of the full rating history it keeps
+    each team's latest rating and the day of its latest match, so memory
+    grows with the number of teams and history() only answers for days on
+    or after last_day, which is all Chart 13 asks for.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.last_played = np.empty(0, dtype=np.int32)
+
+    def update(self, chunk):
+        chunk = chunk.assign(date=pd.to_datetime(chunk['date']))
+        return super().update(chronological(chunk))
+
+    def _record(self, teams, days, ratings):
+        if len(self.last_played) < len(self.teams):
+            missing = len(self.teams) - len(self.last_played)
+            self.last_played = np.concatenate([self.last_played,
+                                               np.full(missing, np.iinfo(np.int32).min, np.int32)])
+        # Days only grow, so each team's maximum is its latest match
+        np.maximum.at(self.last_played, teams, days.astype(np.int32))
+
+    def _events(self):
+        """One event per team that has played: its current rating on its latest match day."""
+        played = np.flatnonzero(self.last_played > np.iinfo(np.int32).min)
+        return (played.astype(np.int32), self.last_played[played],
+                self.ratings[played].astype(np.float32))
+
+    def history(self):
+        return RatingHistory(self.teams, *self._events(), valid_from=self.last_day)
+
+    def _history_arrays(self):
+        return {'last_played': self.last_played}
+
+    def _restore_history(self, saved):
+        self.last_played = saved['last_played']
+
+
+def accumulate_datasets(data_dir='data', chunksize=DEFAULT_CHUNKSIZE, canonicalize=True,
+                        report=None):
+    """Stream results, goalscorers and shootouts into fresh accumulators.
+
+    The results pass also drives an Elo engine, returned under 'elo', and
+    the results and shootouts passes fill a head-to-head matrix, returned
+    under 'head_to_head'. report, if given, collects per-chunk validation.
+    """
+    data_dir = Path(data_dir)
+    alias_index = load_alias_index(data_dir, verbose=False) if canonicalize else None
+    elo = StreamingElo()
+    h2h = HeadToHead()
+    consumers = {'results': [elo, h2h], 'shootouts': [h2h]}
+    accumulators = {
+        name: accumulate_csv(data_dir / f'{name}.csv', accumulator, chunksize, alias_index,
+                             consumers=consumers.get(name, ()), report=report)
+        for name, accumulator in (('results', ResultsAccumulator()),
+                                  ('goalscorers', GoalscorersAccumulator()),
+                                  ('shootouts', ShootoutsAccumulator()))
+    }
+    accumulators['elo'] = elo
+    accumulators['head_to_head'] = h2h
+    return accumulators
+
+
+# ============================================================================
+# Chart tables from accumulators (same shapes as chart_stats)
+# ============================================================================
+def _win_rate_table(records, count_column, count_label, min_count, top_n):
+    records = records[records[count_column] >= min_count]
+    stats = pd.DataFrame({
+        'Team': records.index,
+        count_label: records[count_column].values,
+        'Wins': records['wins'].values,
+        'Win Rate (%)': (records['wins'] / records[count_column] * 100).round(1).values
+    })
+    return stats.sort_values('Win Rate (%)', ascending=False).head(top_n).reset_index(drop=True)
+
+
+def stream_chart_tables(accumulators, chart_params, taxonomy=None):
+    """Chart tables keyed by chart id, built from finished accumulators.
+
+    chart_params maps chart id to its compute parameters (see charts.CHARTS);
+    taxonomy classifies tournaments for Chart 3 (default: the bundled config).
+    """
+    results = accumulators['results']
+    goalscorers = accumulators['goalscorers']
+    shootouts = accumulators['shootouts']
+    tables = {}
+
+    cube = results.cube
+    tables['01'] = volume_table(cube.rollup(['year']))
+    outcomes = cube.rollup(['outcome'], neutral=False)
+    tables['02'] = home_outcome_table(outcomes['matches'].reindex(OUTCOMES, fill_value=0).values)
+    tables['03'] = tournament_type_table(cube, taxonomy or load_taxonomy(),
+                                         chart_params['03']['facet'])
+
+    params = chart_params['04']
+    tables['04'] = _win_rate_table(results.team_records(), 'matches', 'Total Matches',
+                                   params['min_matches'], params['top_n'])
+
+    known = {minute: goals for minute, goals in goalscorers.minutes.items() if minute is not None}
+    minutes = np.repeat(np.fromiter(known, dtype=np.int64, count=len(known)),
+                        np.fromiter(known.values(), dtype=np.int64, count=len(known)))
+    tables['05'] = minute_profile(minute_histogram(minutes))
+
+    params = chart_params['06']
+    tables['06'] = _win_rate_table(shootouts.shootout_records(), 'shootouts', 'Shootouts',
+                                   params['min_shootouts'], params['top_n'])
+
+    tables['07'] = decade_table(cube_decades(cube), chart_params['07']['min_matches'])
+    tables['08'] = tournament_frequency_table(cube, chart_params['08']['top_n'])
+    tables['09'] = venue_table(*cube_venues(cube))
+
+    goal_methods = pd.DataFrame({'Method': ['Open Play', 'Penalty Kick', 'Own Goal'],
+                                 'Goals': goalscorers.methods})
+    goal_methods['Percentage'] = (goal_methods['Goals'] / goal_methods['Goals'].sum() * 100).round(1)
+    tables['10'] = goal_methods
+
+    scorers = pd.Series(list(goalscorers.scorers.values()),
+                        index=pd.Index(list(goalscorers.scorers), name='scorer'), name='count')
+    tables['11'] = scorers.sort_values(ascending=False, kind='stable').head(
+        chart_params['11']['top_n'])
+
+    tables['12'] = intensity_table(cube)
+
+    elo = accumulators.get('elo')
+    if elo is not None and elo.last_day is not None:
+        params = chart_params['13']
+        tables['13'] = rated_teams_table(elo.history(), np.datetime64(elo.last_day, 'D'),
+                                         params['top_n'], params['active_years'])
+
+    h2h = accumulators.get('head_to_head')
+    if h2h is not None:
+        tables['14'] = rivalries_table(h2h, chart_params['14']['top_n'])
+    return tables
@@ -0,0 +1,104 @@
+"""
+Football Match Analysis - Team Name Canonicalization
+Maps (team, date) to the team's current name using data/former_names.csv
+"""
+
+import numpy as np
+import pandas as pd
+
+TEAM_COLUMNS = ['home_team', 'away_team', 'team', 'winner', 'first_shooter']
+
+# Composite lookup key: former-name code in the high bits, day number (offset
+# so pre-1970 dates stay positive) in the low DAY_BITS bits.
+DAY_BITS = 20
+DAY_OFFSET = 1 << (DAY_BITS - 1)
+
+
+def _day_numbers(dates):
+    """Days since 1970-01-01 as int64 (NaT becomes a huge negative number)."""
+    return pd.to_datetime(dates).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+def build_alias_index(former_names):
+    """Sort the alias intervals by (former name, start date) for binary search.
+
+    Intervals for the same former name must not overlap; start and end
+    dates are inclusive.
+    """
+    former = pd.Categorical(former_names['former'].astype(str))
+    start = _day_numbers(former_names['start_date'])
+    end = _day_numbers(former_names['end_date'])
+    keys = (former.codes.astype(np.int64) << DAY_BITS) | (start + DAY_OFFSET)
+    order = np.argsort(keys, kind='stable')
+    return {
+        'names': former.categories,
+        'codes': former.codes[order].astype(np.int64),
+        'keys': keys[order],
+        'end': end[order],
+        'current': former_names['current'].astype(str).to_numpy(dtype=object)[order],
+    }
+
+
+def lookup_current_names(teams, dates, alias_index):
+    """Positions of rows whose team was a former name on that date, and their current names.
+
+    Vectorized sorted-interval join: every (team, date) is turned into a
+    composite key and located with one searchsorted over the alias table,
+    so the cost grows with log(aliases), not with aliases x rows.
+    """
+    codes = alias_index['names'].get_indexer(np.asarray(teams, dtype=object)).astype(np.int64)
+    positions = np.flatnonzero(codes >= 0)
+    if len(positions) == 0:
+        return positions, np.empty(0, dtype=object)
+
+    codes = codes[positions]
+    days = _day_numbers(pd.Series(dates).iloc[positions])
+    idx = np.searchsorted(alias_index['keys'], (codes << DAY_BITS) | (days + DAY_OFFSET),
+                          side='right') - 1
+    safe = np.maximum(idx, 0)
+    hit = (idx >= 0) & (alias_index['codes'][safe] == codes) & (days <= alias_index['end'][safe])
+    return positions[hit], alias_index['current'][idx[hit]]
+
+
+def canonicalize_teams(frame, alias_index, date_column='date', columns=TEAM_COLUMNS):
+    """Rewrite former team names in frame to current names, in place.
+
+    Categorical team columns keep one shared category set; plain string
+    columns (as read in streaming mode) are patched row by row only where
+    an alias matched. The country column is left alone because it records
+    the venue's name at the time of the match.
+    """
+    columns = [c for c in columns if c in frame.columns]
+    if not columns or len(alias_index['keys']) == 0:
+        return frame
+
+    replacements = {}
+    for column in columns:
+        positions, names = lookup_current_names(frame[column], frame[date_column], alias_index)
+        if len(positions):
+            replacements[column] = (positions, names)
+    if not replacements:
+        return frame
+
+    categorical = [c for c in columns if isinstance(frame[c].dtype, pd.CategoricalDtype)]
+    if categorical:
+        existing = set()
+        for column in categorical:
+            existing.update(frame[column].cat.categories)
+        for _, names in replacements.values():
+            existing.update(names)
+        team_dtype = pd.CategoricalDtype(sorted(existing))
+
+    for column in columns:
+        if column in categorical:
+            codes = frame[column].astype(team_dtype).cat.codes.to_numpy().copy()
+            if column in replacements:
+                positions, names = replacements[column]
+                codes[positions] = team_dtype.categories.get_indexer(names)
+            frame[column] = pd.Categorical.from_codes(codes, dtype=team_dtype)
+        elif column in replacements:
+            positions, names = replacements[column]
+            values = frame[column].to_numpy(dtype=object).copy()
+            values[positions] = names
+            frame[column] = values
+    return frame
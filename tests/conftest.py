@@ -0,0 +1,18 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(scope='session')
+def data():
+    """Validated and prepared bundled datasets, shared by every test."""
+    from chart_stats import prepare_data
+    from data_loader import load_datasets
+    from validation import validate_datasets
+
+    frames, _ = validate_datasets(*load_datasets(ROOT / 'data', verbose=False))
+    return prepare_data(*frames)
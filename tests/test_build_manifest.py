@@ -0,0 +1,42 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from build_manifest import RENDER_SOURCE, chart_fingerprint, source_fingerprint
+from charts import CHARTS
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_render_fingerprint_follows_module_constants(tmp_path):
+    source = RENDER_SOURCE.read_text(encoding='utf-8')
+    edited = tmp_path / 'chart_render.py'
+    edited.write_text(source.replace("'Extra Time': '#6A4C93'", "'Extra Time': '#000000'"),
+                      encoding='utf-8')
+    assert (source_fingerprint(edited, 'render_goal_timing') !=
+            source_fingerprint(RENDER_SOURCE, 'render_goal_timing'))
+    assert (source_fingerprint(edited, 'render_home_advantage') ==
+            source_fingerprint(RENDER_SOURCE, 'render_home_advantage'))
+
+
+def test_fingerprints_do_not_import_the_plotting_stack():
+    script = (
+        'import sys\n'
+        'from build_manifest import chart_fingerprint\n'
+        'from charts import CHARTS\n'
+        'from chart_stats import prepare_data\n'
+        'from data_loader import load_datasets\n'
+        'data = prepare_data(*load_datasets(verbose=False))\n'
+        'for chart in CHARTS.values():\n'
+        '    chart_fingerprint(chart, data)\n'
+        "assert 'matplotlib' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, '-c', script], cwd=ROOT, check=True)
+
+
+def test_date_range_fingerprints_every_date_column(data):
+    plain = chart_fingerprint(CHARTS['14'], data)['inputs']
+    ranged = chart_fingerprint(CHARTS['14'], data, {'start': '1990-01-01', 'end': None})['inputs']
+    assert 'results.date' not in plain and 'shootouts.date' not in plain
+    assert set(ranged) - set(plain) == {'results.date', 'shootouts.date'}
+    assert 'goalscorers.date' in chart_fingerprint(CHARTS['10'], data, {'start': '1990-01-01'})['inputs']
@@ -0,0 +1,15 @@
+import io
+
+import pytest
+
+from charts import CHARTS, compute_tables, renderer
+
+
+@pytest.mark.parametrize('start, end', [('1800-01-01', '1850-12-31'),
+                                        ('2025-01-01', '2025-01-02')])
+def test_every_chart_renders_a_short_or_empty_range(data, start, end):
+    tables = compute_tables(list(CHARTS), data, start, end)
+    for chart_id, table in tables.items():
+        buffer = io.BytesIO()
+        renderer(chart_id)(table, buffer)
+        assert buffer.getvalue().startswith(b'\x89PNG'), chart_id
@@ -0,0 +1,24 @@
+import pandas as pd
+import pytest
+
+from date_index import parse_date_range
+
+
+def test_year_and_month_ends_cover_the_whole_period():
+    assert parse_date_range('2009', '2009') == (pd.Timestamp('2009-01-01'),
+                                                pd.Timestamp('2009-12-31'))
+    assert parse_date_range('2008-02', '2008-02') == (pd.Timestamp('2008-02-01'),
+                                                      pd.Timestamp('2008-02-29'))
+
+
+def test_full_dates_and_timestamps_are_kept():
+    assert parse_date_range(None, '2009-06-14') == (None, pd.Timestamp('2009-06-14'))
+    # Already-parsed bounds pass through unchanged
+    assert parse_date_range(end=pd.Timestamp('2009-01-01'))[1] == pd.Timestamp('2009-01-01')
+
+
+def test_invalid_ranges_raise():
+    with pytest.raises(ValueError):
+        parse_date_range('not a date')
+    with pytest.raises(ValueError):
+        parse_date_range('2010', '2009')
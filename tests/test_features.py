@@ -0,0 +1,20 @@
+import numpy as np
+
+from chart_stats import date_index, features, match_cube, team_matches
+
+
+def test_chart_inputs_read_the_shared_feature_set(data):
+    date_index(data)
+    match_cube(data)
+    team_matches(data)
+    assert {'year', 'outcome', 'goal_difference', 'home_win', 'total_goals'} <= set(
+        features(data).computed)
+
+
+def test_team_results_follow_the_outcome_feature(data):
+    outcome = features(data)['outcome'].astype(str).to_numpy()
+    result = team_matches(data)['result'].astype(str).to_numpy()
+    home, away = result[:len(outcome)], result[len(outcome):]
+    assert np.array_equal(home == 'W', outcome == 'Home Win')
+    assert np.array_equal(away == 'W', outcome == 'Away Win')
+    assert np.array_equal(home == 'D', away == 'D')
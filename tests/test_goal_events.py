@@ -0,0 +1,10 @@
+from chart_stats import game_states
+
+
+def test_game_states_split_across_a_date_range(data):
+    whole = game_states(data)
+    before = game_states(data, end='1999-12-31')
+    after = game_states(data, start='2000-01-01')
+    for key in ('matches_with_timelines', 'goals', 'lead_changes', 'comebacks'):
+        assert before[key] + after[key] == whole[key]
+    assert 0 < before['comebacks'] < whole['comebacks']
@@ -0,0 +1,29 @@
+import numpy as np
+
+from aggregation import intern_codes, reduce_by_key
+from head_to_head import HeadToHead, update_head_to_head
+
+
+def test_intern_codes_appends_in_first_appearance_order():
+    known = ['Brazil']
+    codes, new = intern_codes(known, ['Chile', 'Brazil', 'Peru', 'Chile'])
+    assert codes.tolist() == [1, 0, 2, 1]
+    assert list(new) == ['Chile', 'Peru']
+    assert known == ['Brazil', 'Chile', 'Peru']
+
+
+def test_reduce_by_key_sums_rows_per_key():
+    keys, sums = reduce_by_key(np.array([3, 1, 3]), np.array([[1, 2], [3, 4], [5, 6]]))
+    assert keys.tolist() == [1, 3]
+    assert sums.tolist() == [[3, 4], [6, 8]]
+
+
+def test_resumed_matrix_matches_a_rebuild(data, tmp_path):
+    results, shootouts = data['results'], data['shootouts']
+    path = tmp_path / 'head_to_head.npz'
+    update_head_to_head(results.iloc[:-100], shootouts.iloc[:-5], path)
+    resumed = update_head_to_head(results, shootouts, path)
+    rebuilt = HeadToHead().update(results).update(shootouts)
+    assert resumed.teams == rebuilt.teams
+    assert np.array_equal(resumed.keys, rebuilt.keys)
+    assert np.array_equal(resumed.counts, rebuilt.counts)
@@ -0,0 +1,61 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from incremental import refresh
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    directory = tmp_path / 'data'
+    directory.mkdir()
+    for name in ('results', 'goalscorers', 'shootouts', 'former_names'):
+        shutil.copy(ROOT / 'data' / f'{name}.csv', directory)
+    refresh(directory)
+    return directory
+
+
+def _rows(changes):
+    return {name: (change['rows'], change['rebuilt']) for name, change in changes.items()}
+
+
+def test_appended_rows_are_folded_in(data_dir):
+    results = data_dir / 'results.csv'
+    last = results.read_text(encoding='utf-8').splitlines(keepends=True)[-1]
+    with open(results, 'a', encoding='utf-8') as f:
+        f.write(last)
+        f.write(last.rstrip('\n'))  # still being written: left for the next refresh
+    aggregates, changes = refresh(data_dir)
+    assert _rows(changes) == {'results': (1, None), 'goalscorers': (0, None),
+                              'shootouts': (0, None)}
+    # A touched file with nothing new keeps its checkpoint
+    os.utime(data_dir / 'goalscorers.csv')
+    _, changes = refresh(data_dir)
+    assert _rows(changes)['goalscorers'] == (0, None)
+
+
+def test_rewritten_tail_rebuilds_its_group(data_dir):
+    results = data_dir / 'results.csv'
+    text = results.read_text(encoding='utf-8')
+    results.write_text(text[:-2000] + text[-2000:].replace('Friendly', 'Friendlies', 1),
+                       encoding='utf-8')
+    _, changes = refresh(data_dir)
+    assert changes['results']['rebuilt'] == 'results.csv rewritten'
+    assert changes['shootouts']['rebuilt'] == 'results.csv rewritten'
+    assert changes['goalscorers']['rebuilt'] is None
+
+
+def test_edit_far_before_the_tail_is_detected(data_dir):
+    results = data_dir / 'results.csv'
+    lines = results.read_text(encoding='utf-8').splitlines(keepends=True)
+    # Same line length, so neither the size nor the header gives it away
+    fields = lines[1].split(',')
+    fields[3] = '9' if fields[3] != '9' else '8'
+    lines[1] = ','.join(fields)
+    results.write_text(''.join(lines) + lines[-1], encoding='utf-8')
+    _, changes = refresh(data_dir)
+    assert changes['results']['rebuilt'] == 'results.csv rewritten'
@@ -0,0 +1,57 @@
+from charts import CHARTS, compute_tables
+from match_cube import MEASURES, MatchCube
+
+
+def test_empty_cube_rolls_up_to_nothing():
+    cube = MatchCube()
+    assert len(cube.rollup(['year'])) == 0
+    assert len(cube.rollup(['tournament', 'outcome'], neutral=False)) == 0
+    assert cube.rollup().loc[0, MEASURES].tolist() == [0, 0, 0]
+
+
+def test_empty_year_slice(data):
+    from chart_stats import match_cube
+    empty = match_cube(data).slice_years(1800, 1850)
+    assert len(empty) == 0
+    assert len(empty.rollup(['year'])) == 0
+
+
+def test_charts_on_a_range_without_matches(data):
+    tables = compute_tables(list(CHARTS), data, '1800-01-01', '1850-12-31')
+    assert len(tables['01']) == 0
+    assert tables['02']['Matches'].sum() == 0
+    assert len(tables['08']) == 0
+
+
+def test_resumed_cube_matches_a_rebuild(data, tmp_path):
+    from match_cube import update_cube
+    results = data['results']
+    path = tmp_path / 'match_cube.npz'
+    update_cube(results.iloc[:-100], path)
+    resumed = update_cube(results, path)
+    rebuilt = MatchCube().update(results)
+    assert resumed.rows == len(results)
+    assert (resumed.rollup(['year', 'outcome']) == rebuilt.rollup(['year', 'outcome'])).all().all()
+    # An edited earlier row no longer matches the checkpoint
+    edited = results.copy()
+    edited.iloc[0, edited.columns.get_loc('home_score')] += 1
+    home_goals = rebuilt.rollup().loc[0, 'home_goals']
+    assert update_cube(edited, path).rollup().loc[0, 'home_goals'] == home_goals + 1
+
+
+def test_unchanged_source_skips_row_hashing(data, tmp_path, monkeypatch):
+    import match_cube
+    results = data['results']
+    path = tmp_path / 'match_cube.npz'
+    source = {'results': 'a' * 64, 'former_names': 'b' * 64}
+    match_cube.update_cube(results, path, source=source)
+
+    def fail(*args):
+        raise AssertionError('rows hashed for an unchanged source')
+    monkeypatch.setattr(match_cube, 'row_hashes', fail)
+    assert match_cube.update_cube(results, path, source=source).rows == len(results)
+    # A different source falls back to checking the rows
+    monkeypatch.undo()
+    resumed = match_cube.update_cube(results, path, source=dict(source, results='c' * 64))
+    assert resumed.rows == len(results)
+    assert match_cube.MatchCube.load(path)[1]['source']['results'] == 'c' * 64
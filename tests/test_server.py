@@ -0,0 +1,26 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from server import make_server
+
+
+class _FailingService:
+    def chart_params(self, chart_id, query):
+        raise RuntimeError('boom')
+
+
+def test_unexpected_error_is_a_json_500():
+    server = make_server(_FailingService(), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with pytest.raises(urllib.error.HTTPError) as raised:
+            urllib.request.urlopen(f'http://127.0.0.1:{server.server_port}/charts/01.png')
+        assert raised.value.code == 500
+        assert json.load(raised.value) == {'error': 'RuntimeError: boom'}
+    finally:
+        server.shutdown()
+        server.server_close()
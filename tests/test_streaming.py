@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from elo import EloEngine, chronological
+from streaming import StreamingElo
+
+
+def test_streaming_elo_keeps_only_the_latest_snapshot(data, tmp_path):
+    results = chronological(data['results'])
+    elo = StreamingElo()
+    for start in range(0, len(results), 10_000):
+        elo.update(results.iloc[start:start + 10_000])
+    assert elo._event_teams == []
+    assert len(elo.last_played) == len(elo.teams)
+
+    as_of = np.datetime64(elo.last_day, 'D')
+    snapshot = elo.history().ratings_on(as_of)
+    # Team codes follow registration order, which depends on the chunking
+    expected = EloEngine().update(results).history().ratings_on(as_of).loc[snapshot.index]
+    assert np.allclose(snapshot['rating'], expected['rating'], atol=0.01)
+    assert snapshot['last_match'].equals(expected['last_match'])
+    with pytest.raises(ValueError):
+        elo.history().ratings_on(as_of - np.timedelta64(1, 'D'))
+
+    elo.save(tmp_path / 'elo.npz', 'fingerprint')
+    restored, _ = StreamingElo.load(tmp_path / 'elo.npz')
+    pd.testing.assert_frame_equal(restored.history().ratings_on(as_of), snapshot)
@@ -0,0 +1,129 @@
+"""
+Football Match Analysis - Tournament Taxonomy
+Rule-driven tournament classification, evaluated once per distinct tournament
+"""
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_TAXONOMY = Path(__file__).resolve().with_name('tournament_taxonomy.json')
+
+
+def _compile_facet(facet, spec):
+    """One regex for a facet's ordered rules; the first rule that matches wins.
+
+    Every rule becomes a named alternative anchored at the start of the
+    name behind a lazy '.*?', so re.match tries the rules in order and
+    match.lastgroup names the winning rule.
+    """
+    alternatives = []
+    for i, rule in enumerate(spec.get('rules', [])):
+        try:
+            re.compile(rule['pattern'])
+        except KeyError:
+            raise ValueError(f"Taxonomy facet '{facet}': rule {i} needs a 'pattern'")
+        except re.error as exc:
+            raise ValueError(f"Taxonomy facet '{facet}': invalid pattern in rule {i}: {exc}")
+        alternatives.append(f"(?P<r{i}>.*?(?:{rule['pattern']}))")
+    return re.compile('|'.join(alternatives) or '(?!)', re.DOTALL)
+
+
+class TournamentTaxonomy:
+    """Classifies tournament names along the facets of a taxonomy config.
+
+    The config maps each facet (e.g. confederation, tier, stage) to an
+    ordered list of {"pattern", "value"} rules and a default value for
+    names no rule matches.
+    """
+
+    def __init__(self, config):
+        facets = config.get('facets')
+        if not isinstance(facets, dict) or not facets:
+            raise ValueError("Taxonomy config needs a non-empty 'facets' object")
+        self.facets = list(facets)
+        self.matchers = {}
+        self.values = {}
+        self.defaults = {}
+        for facet, spec in facets.items():
+            if 'default' not in spec:
+                raise ValueError(f"Taxonomy facet '{facet}' needs a 'default' value")
+            rules = spec.get('rules', [])
+            if any('value' not in rule for rule in rules):
+                raise ValueError(f"Taxonomy facet '{facet}': every rule needs a 'value'")
+            self.matchers[facet] = _compile_facet(facet, spec)
+            self.values[facet] = [rule['value'] for rule in rules]
+            self.defaults[facet] = spec['default']
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_TAXONOMY):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def facet_values(self, facet):
+        """Every value a facet can take, in rule order with the default last."""
+        self._check_facet(facet)
+        return list(dict.fromkeys(self.values[facet] + [self.defaults[facet]]))
+
+    def _check_facet(self, facet):
+        if facet not in self.matchers:
+            raise ValueError(f"Unknown taxonomy facet '{facet}' (available: {', '.join(self.facets)})")
+
+    def classify(self, name, facet):
+        """Facet value for one tournament name."""
+        self._check_facet(facet)
+        match = self.matchers[facet].match(str(name))
+        if match is None:
+            return self.defaults[facet]
+        return self.values[facet][int(match.lastgroup[1:])]
+
+    def categorize(self, tournaments, facet):
+        """Facet value for every row, as a categorical over facet_values(facet).
+
+        The matcher runs once per distinct tournament (the categories of a
+        categorical column, the uniques of anything else) and the result is
+        broadcast to the rows through their integer codes.
+        """
+        if isinstance(tournaments, pd.Series) and isinstance(tournaments.dtype, pd.CategoricalDtype):
+            codes, uniques = tournaments.cat.codes.to_numpy(), tournaments.cat.categories
+        else:
+            codes, uniques = pd.factorize(pd.Series(tournaments).astype(object))
+        values = self.facet_values(facet)
+        position = {value: i for i, value in enumerate(values)}
+        lookup = np.array([position[self.classify(name, facet)] for name in uniques] + [-1],
+                          dtype=np.int64)
+        # Missing tournaments have code -1, which picks the trailing -1 (NaN)
+        return pd.Categorical.from_codes(lookup[codes], categories=values)
+
+    def table(self, tournaments):
+        """Every facet for each distinct tournament, one row per name."""
+        names = pd.Index(pd.unique(pd.Series(tournaments).dropna().astype(str)), name='tournament')
+        return pd.DataFrame({facet: [self.classify(name, facet) for name in names]
+                             for facet in self.facets}, index=names)
+
+
+@lru_cache(maxsize=None)
+def load_taxonomy(path=DEFAULT_TAXONOMY):
+    """Taxonomy from a config file, parsed and compiled once per path."""
+    return TournamentTaxonomy.from_file(path)
+
+
+if __name__ == '__main__':
+    import time
+
+    from data_loader import load_datasets
+
+    results, _, _ = load_datasets(verbose=False)
+    taxonomy = load_taxonomy()
+    print(f"{len(results)} matches, {results['tournament'].nunique()} distinct tournaments")
+    for facet in taxonomy.facets:
+        start = time.perf_counter()
+        values = taxonomy.categorize(results['tournament'], facet)
+        elapsed = time.perf_counter() - start
+        counts = pd.Series(values).value_counts(sort=False)
+        print(f"\n{facet} ({elapsed * 1000:.2f} ms): " +
+              ', '.join(f'{value} {count:,}' for value, count in counts.items()))
@@ -0,0 +1,153 @@
+"""
+Football Match Analysis - Stage Tracing
+Wall time, CPU time and peak allocations per pipeline stage, as a Chrome trace
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+from pathlib import Path
+
+# A single shared no-op context, so a disabled span() costs one global lookup
+_DISABLED = nullcontext()
+_tracer = None
+
+
+class Span:
+    """One traced stage; nested spans report their own peak to the parent."""
+
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start_ns', 'cpu_ns', 'start_mem', 'peak',
+                 'parent')
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        stack = self.tracer.stack
+        self.parent = stack[-1] if stack else None
+        if self.parent is not None:
+            # Fold the parent's peak so far in before resetting for this span
+            self.parent.peak = max(self.parent.peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self.start_mem = tracemalloc.get_traced_memory()[0]
+        self.peak = 0
+        stack.append(self)
+        self.cpu_ns = time.process_time_ns()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end_ns = time.perf_counter_ns()
+        cpu_ns = time.process_time_ns() - self.cpu_ns
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        self.tracer.stack.pop()
+        if self.parent is not None:
+            self.parent.peak = max(self.parent.peak, self.peak)
+            tracemalloc.reset_peak()
+        self.tracer.record(self, end_ns, cpu_ns)
+        return False
+
+
+class Tracer:
+    """Collects completed spans as Chrome trace 'X' (complete) events."""
+
+    def __init__(self, origin_ns=None):
+        # perf_counter is a system-wide monotonic clock on Linux, so workers
+        # given the parent's origin produce spans on the same timeline
+        self.origin_ns = time.perf_counter_ns() if origin_ns is None else origin_ns
+        self.pid = os.getpid()
+        self.stack = []
+        self.events = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def span(self, name, category='stage', **args):
+        return Span(self, name, category, args)
+
+    def record(self, span, end_ns, cpu_ns):
+        self.events.append({
+            'name': span.name,
+            'cat': span.category,
+            'ph': 'X',
+            'ts': (span.start_ns - self.origin_ns) / 1000,
+            'dur': (end_ns - span.start_ns) / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            # Peak allocated above what was live when the span started
+            'args': dict(span.args, cpu_ms=round(cpu_ns / 1e6, 3),
+                         peak_alloc_mb=round(max(span.peak - span.start_mem, 0) / 2**20, 3)),
+        })
+
+
+# ============================================================================
+# Module-level switch
+# ============================================================================
+def enable(origin_ns=None):
+    """Start collecting spans (and tracemalloc) in this process.
+
+    A tracer inherited through fork is replaced, so pool workers only
+    report their own spans.
+    """
+    global _tracer
+    if _tracer is None or _tracer.pid != os.getpid():
+        _tracer = Tracer(origin_ns)
+    return _tracer
+
+
+def enabled():
+    return _tracer is not None
+
+
+def origin():
+    """Time origin of this process's trace, to hand to worker processes."""
+    return None if _tracer is None else _tracer.origin_ns
+
+
+def span(name, category='stage', **args):
+    """Context manager timing a stage; a shared no-op when tracing is off."""
+    if _tracer is None:
+        return _DISABLED
+    return _tracer.span(name, category, **args)
+
+
+def events():
+    return [] if _tracer is None else list(_tracer.events)
+
+
+def add_events(extra):
+    """Merge spans recorded in another process (e.g. a render worker)."""
+    if _tracer is not None:
+        _tracer.events.extend(extra)
+
+
+def drain_events():
+    """Hand over and forget the spans recorded so far (used by pool workers)."""
+    if _tracer is None:
+        return []
+    recorded, _tracer.events = _tracer.events, []
+    return recorded
+
+
+def write_chrome_trace(path):
+    """Write the spans as Chrome/Perfetto trace JSON (open in ui.perfetto.dev)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events(), 'displayTimeUnit': 'ms'}, f)
+    return path
+
+
+def summary_table():
+    """Fixed-width table of every span in start order."""
+    rows = sorted(events(), key=lambda e: (e['pid'] != os.getpid(), e['ts']))
+    lines = [f"{'stage':<28} {'wall ms':>10} {'cpu ms':>10} {'peak alloc MB':>14}"]
+    for event in rows:
+        lines.append(f"{event['name']:<28} {event['dur'] / 1000:>10.1f} "
+                     f"{event['args']['cpu_ms']:>10.1f} {event['args']['peak_alloc_mb']:>14.2f}")
+    return '\n'.join(lines)
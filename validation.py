@@ -0,0 +1,428 @@
+"""
+Football Match Analysis - Ingest Validation
+Vectorized data-quality checks run before any chart work, with a structured
+report, a quarantine file for rejected rows and a per-million-row time budget
+"""
+
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_loader import FLAG_VALUES, SCHEMAS
+
+# Validating every dataset must take less than this per million input rows
+BUDGET_SECONDS_PER_MILLION_ROWS = 1.0
+# Batches smaller than this are allowed the budget of this many rows
+BUDGET_MIN_ROWS = 50_000
+# Highest score accepted as plausible (the record is 31)
+MAX_SCORE = 40
+# Latest goal minute accepted: 120 plus extra-time stoppage
+MAX_MINUTE = 135
+# Row numbers kept per check as examples in the report
+SAMPLE_ROWS = 10
+
+ERROR = 'error'      # row is quarantined
+WARNING = 'warning'  # row is kept and reported
+
+CHECKS = {
+    'results': {
+        'missing_value': (ERROR, 'date, team, score, tournament or neutral flag missing or unparseable'),
+        'same_team': (ERROR, 'home_team and away_team are the same team'),
+        'negative_score': (ERROR, 'score below zero'),
+        'implausible_score': (ERROR, f'score above {MAX_SCORE}'),
+        'duplicate_row': (ERROR, 'exact copy of an earlier row'),
+        'duplicate_key': (WARNING, 'date, home_team and away_team shared with another match'),
+    },
+    'goalscorers': {
+        'missing_value': (ERROR, 'date, team or goal flag missing or unparseable'),
+        'team_not_playing': (ERROR, 'team is neither home_team nor away_team'),
+        'minute_out_of_range': (ERROR, f'minute outside 1-{MAX_MINUTE}'),
+        'own_goal_and_penalty': (ERROR, 'own_goal and penalty both set'),
+        'no_matching_result': (WARNING, 'no results row with the same date and teams'),
+        'duplicate_goal': (WARNING, 'same match, team, scorer and minute as another row'),
+    },
+    'shootouts': {
+        'missing_value': (ERROR, 'date, team or winner missing or unparseable'),
+        'winner_not_playing': (ERROR, 'winner is neither home_team nor away_team'),
+        'first_shooter_not_playing': (ERROR, 'first_shooter is neither home_team nor away_team'),
+        'duplicate_key': (ERROR, 'second shootout for the same date, home_team and away_team'),
+        'no_matching_result': (WARNING, 'no results row with the same date and teams'),
+    },
+}
+# Checks that compare rows with each other, so they need the whole file
+FRAME_CHECKS = {'duplicate_row', 'duplicate_key', 'duplicate_goal'}
+
+REQUIRED = {
+    'results': ['date', 'home_team', 'away_team', 'home_score', 'away_score', 'tournament',
+                'neutral'],
+    'goalscorers': ['date', 'home_team', 'away_team', 'team', 'own_goal', 'penalty'],
+    'shootouts': ['date', 'home_team', 'away_team', 'winner'],
+}
+MATCH_KEY = ['date', 'home_team', 'away_team']
+
+DTYPE_CHECKS = {
+    'date': ('datetime', pd.api.types.is_datetime64_any_dtype),
+    'team': ('categorical', lambda dtype: isinstance(dtype, pd.CategoricalDtype)),
+    'category': ('categorical', lambda dtype: isinstance(dtype, pd.CategoricalDtype)),
+    'int': ('integer', pd.api.types.is_integer_dtype),
+    'bool': ('boolean', pd.api.types.is_bool_dtype),
+    'string': ('string', pd.api.types.is_string_dtype),
+}
+
+
+# ============================================================================
+# Column coercion (typed frames pass through; raw CSV chunks are converted)
+# ============================================================================
+def _dates(values):
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values
+    return pd.to_datetime(values, errors='coerce', format='ISO8601')
+
+
+def _numbers(values):
+    """Column as float64 with NaN for missing or unparseable values."""
+    if not pd.api.types.is_numeric_dtype(values.dtype) or pd.api.types.is_bool_dtype(values.dtype):
+        values = pd.to_numeric(values, errors='coerce')
+    return values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _flags(values):
+    """Column as a nullable boolean, with NA for anything but TRUE/FALSE."""
+    if pd.api.types.is_bool_dtype(values.dtype):
+        return values
+    return values.map(FLAG_VALUES).astype('boolean')
+
+
+def _same_team(a, b):
+    """Row-wise team equality, on categorical codes when both columns share categories."""
+    if isinstance(a.dtype, pd.CategoricalDtype) and a.dtype == b.dtype:
+        codes = a.cat.codes.to_numpy()
+        return (codes == b.cat.codes.to_numpy()) & (codes >= 0)
+    return (a.astype(object) == b.astype(object)).to_numpy(dtype=bool)
+
+
+def _playing(frame, column):
+    values = frame[column]
+    return _same_team(values, frame['home_team']) | _same_team(values, frame['away_team'])
+
+
+def _missing(name, frame):
+    missing = np.zeros(len(frame), dtype=bool)
+    for column in REQUIRED[name]:
+        kind = SCHEMAS[name][column]
+        values = frame[column]
+        if kind == 'date':
+            missing |= _dates(values).isna().to_numpy()
+        elif kind == 'int':
+            missing |= np.isnan(_numbers(values))
+        elif kind == 'bool':
+            missing |= _flags(values).isna().to_numpy()
+        else:
+            missing |= values.isna().to_numpy()
+    return missing
+
+
+# ============================================================================
+# Checks
+# ============================================================================
+def check_schema(frames):
+    """Raise ValueError unless every dataset has its schema columns with the right dtypes."""
+    problems = []
+    for name, frame in frames.items():
+        for column, kind in SCHEMAS[name].items():
+            if column not in frame.columns:
+                problems.append(f"{name}: missing column '{column}'")
+                continue
+            label, accepts = DTYPE_CHECKS[kind]
+            if not accepts(frame[column].dtype):
+                problems.append(f"{name}: '{column}' is {frame[column].dtype}, expected {label}")
+    if problems:
+        raise ValueError('Schema check failed: ' + '; '.join(problems))
+
+
+def row_failures(name, frame):
+    """Boolean failure mask per check that looks at one row at a time."""
+    failures = {'missing_value': _missing(name, frame)}
+    if name == 'results':
+        home, away = _numbers(frame['home_score']), _numbers(frame['away_score'])
+        failures['same_team'] = _same_team(frame['home_team'], frame['away_team'])
+        failures['negative_score'] = (home < 0) | (away < 0)
+        failures['implausible_score'] = (home > MAX_SCORE) | (away > MAX_SCORE)
+    elif name == 'goalscorers':
+        minute = _numbers(frame['minute'])
+        both = _flags(frame['own_goal']) & _flags(frame['penalty'])
+        failures['team_not_playing'] = frame['team'].notna().to_numpy() & ~_playing(frame, 'team')
+        failures['minute_out_of_range'] = (minute < 1) | (minute > MAX_MINUTE)
+        failures['own_goal_and_penalty'] = both.fillna(False).to_numpy(dtype=bool)
+    elif name == 'shootouts':
+        failures['winner_not_playing'] = (frame['winner'].notna().to_numpy() &
+                                          ~_playing(frame, 'winner'))
+        failures['first_shooter_not_playing'] = (frame['first_shooter'].notna().to_numpy() &
+                                                 ~_playing(frame, 'first_shooter'))
+    if name != 'results' and 'match_id' in frame.columns:
+        failures['no_matching_result'] = frame['match_id'].to_numpy() < 0
+    return failures
+
+
+def _codes(values):
+    """Non-negative integer codes for one column; equal values get equal codes."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy().astype(np.int64)
+    elif pd.api.types.is_datetime64_any_dtype(values.dtype):
+        codes = values.to_numpy().astype('datetime64[D]').astype(np.int64)
+    elif pd.api.types.is_bool_dtype(values.dtype) or pd.api.types.is_integer_dtype(values.dtype):
+        numbers = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        codes = np.where(np.isnan(numbers), np.nanmin(numbers, initial=0) - 1,
+                         numbers).astype(np.int64)
+    else:
+        codes = pd.factorize(values)[0].astype(np.int64)
+    return codes - codes.min() if len(codes) else codes
+
+
+def _duplicated(frame, columns, keep='first'):
+    """DataFrame.duplicated with the columns' codes packed into one int64 key per row.
+
+    Sorting one integer key is several times faster than hashing the
+    columns; pandas is used when the packed codes would not fit in 63 bits.
+    """
+    key = np.zeros(len(frame), dtype=np.int64)
+    span = 1
+    for column in columns:
+        codes = _codes(frame[column])
+        size = int(codes.max()) + 1 if len(codes) else 1
+        span *= size
+        if span >= 1 << 63:
+            return frame.duplicated(columns, keep=keep).to_numpy()
+        key = key * size + codes
+    order = np.argsort(key, kind='stable')
+    ordered = key[order]
+    same = ordered[1:] == ordered[:-1]
+    later = np.concatenate([[False], same])
+    if keep is False:
+        later |= np.concatenate([same, [False]])
+    duplicated = np.empty(len(order), dtype=bool)
+    duplicated[order] = later
+    return duplicated
+
+
+def _duplicated_within(frame, candidates, columns, keep='first'):
+    """_duplicated over all columns, evaluated only for the rows in the candidates mask."""
+    duplicated = np.zeros(len(frame), dtype=bool)
+    rows = np.flatnonzero(candidates)
+    if len(rows):
+        duplicated[rows] = _duplicated(frame.iloc[rows], columns, keep)
+    return duplicated
+
+
+def frame_failures(name, frame):
+    """Boolean failure mask per check that compares rows with each other.
+
+    Copies must agree on a cheap integer key first (the match key, plus
+    team and minute for goals), so the full comparison, strings included,
+    only runs on the few rows that share one.
+    """
+    if name == 'results':
+        shared_key = _duplicated(frame, MATCH_KEY, keep=False)
+        columns = [column for column in SCHEMAS[name] if column in frame.columns]
+        return {'duplicate_row': _duplicated_within(frame, shared_key, columns),
+                'duplicate_key': shared_key}
+    if name == 'goalscorers':
+        timed = frame['minute'].notna().to_numpy()
+        columns = MATCH_KEY + ['team', 'minute']
+        shared = timed & _duplicated(frame, columns, keep=False)
+        return {'duplicate_goal': _duplicated_within(frame, shared, columns + ['scorer'],
+                                                     keep=False)}
+    return {'duplicate_key': _duplicated(frame, MATCH_KEY)}
+
+
+# ============================================================================
+# Report
+# ============================================================================
+class ValidationReport:
+    """Failure counts and sample rows per dataset and check, plus the rejected rows.
+
+    Row numbers are 0-based data rows of the source CSV (line number - 2).
+    Frames and streamed chunks are folded in with record().
+    """
+
+    def __init__(self, budget=BUDGET_SECONDS_PER_MILLION_ROWS):
+        self.budget = budget
+        self.datasets = {}
+        self.seconds = 0.0
+        self._quarantine = []
+
+    def record(self, name, frame, failures, offset=0):
+        """Count failures of one frame or chunk; returns the mask of rows to keep."""
+        entry = self.datasets.setdefault(name, {'rows': 0, 'quarantined': 0, 'checks': {},
+                                                'skipped': []})
+        entry['rows'] += len(frame)
+        rejected = np.zeros(len(frame), dtype=bool)
+        labels = np.full(len(frame), '', dtype=object)
+        for check, mask in failures.items():
+            severity, description = CHECKS[name][check]
+            stats = entry['checks'].setdefault(check, {'severity': severity,
+                                                       'description': description,
+                                                       'failures': 0, 'sample_rows': []})
+            failed = np.flatnonzero(mask)
+            stats['failures'] += len(failed)
+            room = SAMPLE_ROWS - len(stats['sample_rows'])
+            if room > 0:
+                stats['sample_rows'].extend((failed[:room] + offset).tolist())
+            if severity == ERROR and len(failed):
+                rejected[failed] = True
+                labels[failed] += check + ';'
+        if rejected.any():
+            rows = np.flatnonzero(rejected)
+            quarantined = frame.iloc[rows].astype(object)
+            quarantined.insert(0, 'dataset', name)
+            quarantined.insert(1, 'row', rows + offset)
+            quarantined.insert(2, 'checks', [label[:-1] for label in labels[rows]])
+            self._quarantine.append(quarantined.reset_index(drop=True))
+            entry['quarantined'] += len(rows)
+        return ~rejected
+
+    @property
+    def rows(self):
+        return sum(entry['rows'] for entry in self.datasets.values())
+
+    @property
+    def quarantined(self):
+        return sum(entry['quarantined'] for entry in self.datasets.values())
+
+    @property
+    def seconds_per_million_rows(self):
+        return self.seconds / self.rows * 1e6 if self.rows else 0.0
+
+    @property
+    def within_budget(self):
+        # Fixed per-check overhead dominates tiny batches such as an incremental refresh
+        return self.seconds <= self.budget * max(self.rows, BUDGET_MIN_ROWS) / 1e6
+
+    def quarantine(self):
+        """Every rejected row with its dataset, row number and failed checks."""
+        if not self._quarantine:
+            return pd.DataFrame(columns=['dataset', 'row', 'checks'])
+        return pd.concat(self._quarantine, ignore_index=True)
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'quarantined': self.quarantined,
+            'seconds': round(self.seconds, 6),
+            'seconds_per_million_rows': round(self.seconds_per_million_rows, 6),
+            'budget_seconds_per_million_rows': self.budget,
+            'within_budget': self.within_budget,
+            'datasets': self.datasets,
+        }
+
+    def summary(self):
+        """Printable lines: one per dataset, one per check that found anything."""
+        lines = [f"Validated {self.rows:,} rows in {self.seconds:.3f}s "
+                 f"({self.seconds_per_million_rows:.3f}s per million rows, budget "
+                 f"{self.budget:.3f}s): {self.quarantined:,} row(s) quarantined"]
+        for name, entry in self.datasets.items():
+            lines.append(f"  {name}: {entry['rows']:,} rows, {entry['quarantined']:,} quarantined"
+                         + (f" (not checked per chunk: {', '.join(entry['skipped'])})"
+                            if entry['skipped'] else ''))
+            for check, stats in entry['checks'].items():
+                if stats['failures']:
+                    lines.append(f"    {stats['severity']:<7} {check}: {stats['failures']:,} - "
+                                 f"{stats['description']} (rows {', '.join(map(str, stats['sample_rows']))}"
+                                 f"{', ...' if stats['failures'] > len(stats['sample_rows']) else ''})")
+        if not self.within_budget:
+            lines.append(f"  WARNING: validation exceeded its budget of {self.budget:.3f}s "
+                         f"per million rows")
+        return lines
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    def write_quarantine(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.quarantine().to_csv(path, index=False)
+
+
+# ============================================================================
+# Entry points
+# ============================================================================
+def _drop_rows(frames, keep):
+    """Frames without rejected rows, match IDs renumbered to the surviving results rows."""
+    kept = keep['results']
+    # Trailing -1 so that match ID -1 (no result) maps to itself
+    new_ids = np.append(np.where(kept, np.cumsum(kept) - 1, -1), -1)
+    cleaned = {}
+    for name, frame in frames.items():
+        if not keep[name].all():
+            frame = frame[keep[name]].reset_index(drop=True)
+            # Columns that were nullable only because of rejected values go back to numpy
+            plain = {column: frame[column].dtype.numpy_dtype
+                     for column, kind in SCHEMAS[name].items()
+                     if kind in ('int', 'bool') and column in frame.columns
+                     and pd.api.types.is_extension_array_dtype(frame[column].dtype)
+                     and not frame[column].hasnans}
+            if plain:
+                frame = frame.astype(plain)
+        if not kept.all() and 'match_id' in frame.columns:
+            ids = new_ids[frame['match_id'].to_numpy()]
+            frame = frame.assign(match_id=ids.astype(frame['match_id'].dtype))
+        cleaned[name] = frame
+    return cleaned
+
+
+def validate_datasets(results, goalscorers, shootouts, budget=BUDGET_SECONDS_PER_MILLION_ROWS):
+    """Run every check on loaded frames and drop the rows that fail an error check.
+
+    Returns (results, goalscorers, shootouts) and the ValidationReport. The
+    frames are returned unchanged when nothing is rejected; otherwise
+    match_id is renumbered so it still equals the row number in results.
+    Raises ValueError when a column is missing or has the wrong dtype.
+    """
+    start = time.perf_counter()
+    frames = {'results': results, 'goalscorers': goalscorers, 'shootouts': shootouts}
+    check_schema(frames)
+    report = ValidationReport(budget)
+    keep = {name: report.record(name, frame, {**row_failures(name, frame),
+                                              **frame_failures(name, frame)})
+            for name, frame in frames.items()}
+    if not all(mask.all() for mask in keep.values()):
+        frames = _drop_rows(frames, keep)
+    report.seconds += time.perf_counter() - start
+    return tuple(frames.values()), report
+
+
+def validate_chunk(name, chunk, report):
+    """Row checks for one chunk of a streamed CSV; returns the chunk without rejected rows.
+
+    Checks that compare rows with each other need the whole file and are
+    listed as skipped. Integer and flag columns that read_csv left as text
+    because of a malformed value are converted in the returned chunk.
+    """
+    start = time.perf_counter()
+    offset = chunk.index[0] if len(chunk) else 0
+    keep = report.record(name, chunk, row_failures(name, chunk), offset)
+    report.datasets[name]['skipped'] = sorted(FRAME_CHECKS & set(CHECKS[name]))
+    if not keep.all():
+        chunk = chunk[keep]
+    for column, kind in SCHEMAS[name].items():
+        if column not in chunk.columns:
+            continue
+        dtype = chunk[column].dtype
+        if kind == 'int' and not pd.api.types.is_numeric_dtype(dtype):
+            chunk = chunk.assign(**{column: pd.to_numeric(chunk[column], errors='coerce')})
+        elif kind == 'bool' and not pd.api.types.is_bool_dtype(dtype):
+            chunk = chunk.assign(**{column: _flags(chunk[column]).fillna(False).astype(bool)})
+    report.seconds += time.perf_counter() - start
+    return chunk
+
+
+if __name__ == '__main__':
+    from data_loader import load_datasets
+
+    frames = load_datasets(verbose=False)
+    _, report = validate_datasets(*frames)
+    print('\n'.join(report.summary()))